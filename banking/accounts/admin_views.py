@@ -5,6 +5,7 @@ Custom admin interface separate from Django admin
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction as db_transaction
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
@@ -12,21 +13,26 @@ from decimal import Decimal
 
 from .models import (
     User, Transaction, BillPayment, PaymentGateway,
-    WebhookLog, KYC, Wallet
+    WebhookLog, KYC, Wallet, FeeRule, APIKey
 )
+from rest_framework.settings import api_settings
 from .serializers import (
-    TransactionSerializer, BillPaymentSerializer,
+    TransactionSerializer, FastTransactionSerializer, BillPaymentSerializer,
     PaymentGatewaySerializer, WebhookLogSerializer,
-    KYCSerializer, UserSerializer
+    KYCSerializer, UserSerializer, FeeRuleSerializer,
+    BulkWithdrawalActionSerializer, AdminAPIKeySerializer, RateLimitSerializer
 )
 from .permissions import IsAdmin
+from .db_router import ReplicaReadMixin
+from .renderers import FastJSONRenderer
 from .utils.payment import PaymentProcessor
+from .utils.wallet_cache import wallet_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class AdminDashboardView(viewsets.ViewSet):
+class AdminDashboardView(ReplicaReadMixin, viewsets.ViewSet):
     """Admin dashboard with statistics"""
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
 
@@ -126,17 +132,37 @@ class AdminDashboardView(viewsets.ViewSet):
         })
 
 
-class AdminTransactionViewSet(viewsets.ModelViewSet):
-    """Admin transaction management"""
+class AdminTransactionViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Admin transaction management
+
+    Read-only apart from the withdrawal actions: postings are never edited
+    or deleted through the API.
+    """
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     filterset_fields = ['status', 'transaction_type', 'user']
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
+    renderer_classes = [FastJSONRenderer] + list(api_settings.DEFAULT_RENDERER_CLASSES)
 
     def get_queryset(self):
         return Transaction.objects.all().select_related('user', 'wallet')
 
+    def list(self, request, *args, **kwargs):
+        """List transactions through the fast serializer path"""
+        queryset = FastTransactionSerializer.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                FastTransactionSerializer(page).data
+            )
+
+        return Response(FastTransactionSerializer(queryset).data)
+
     @action(detail=True, methods=['post'])
     def approve_withdrawal(self, request, pk=None):
         """Approve a pending withdrawal"""
@@ -230,7 +256,177 @@ class AdminTransactionViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class AdminBillPaymentViewSet(viewsets.ReadOnlyModelViewSet):
+    def _bulk_withdrawals(self, request):
+        """
+        Validate a bulk request and lock the withdrawals it names
+
+        ids are taken from the body; with all_matching, the pending
+        withdrawals matching the list filters (query string) are used,
+        oldest first, up to limit.
+
+        Returns:
+            tuple: (validated data, ids in request order, locked rows by id),
+                or (errors, None, None)
+        """
+        serializer = BulkWithdrawalActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return serializer.errors, None, None
+
+        data = serializer.validated_data
+        if data.get('ids'):
+            ids = list(dict.fromkeys(data['ids']))
+        else:
+            ids = list(
+                self.filter_queryset(self.get_queryset())
+                .filter(transaction_type='withdrawal', status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)[:data['limit']]
+            )
+
+        rows = {
+            transaction.id: transaction
+            for transaction in Transaction.objects.select_for_update()
+            .filter(id__in=ids)
+            .order_by('id')
+            .only(
+                'id', 'user_id', 'wallet_id', 'reference', 'transaction_type',
+                'requires_approval', 'status', 'total_amount'
+            )
+        }
+        return data, ids, rows
+
+    @staticmethod
+    def _withdrawal_error(transaction, require_approval=False):
+        if transaction is None:
+            return 'Transaction not found'
+        if transaction.transaction_type != 'withdrawal':
+            return 'Not a withdrawal transaction'
+        if require_approval and not transaction.requires_approval:
+            return 'Transaction does not require approval'
+        if transaction.status != 'pending':
+            return 'Transaction is not pending'
+        return None
+
+    @action(detail=False, methods=['post'])
+    def bulk_approve_withdrawals(self, request):
+        """Approve pending withdrawals by ids or filter in one update"""
+        try:
+            with db_transaction.atomic():
+                data, ids, rows = self._bulk_withdrawals(request)
+                if ids is None:
+                    return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+                approved, results = [], []
+                for transaction_id in ids:
+                    transaction = rows.get(transaction_id)
+                    message = self._withdrawal_error(transaction, require_approval=True)
+                    if message:
+                        results.append({
+                            'id': str(transaction_id),
+                            'success': False,
+                            'message': message
+                        })
+                        continue
+
+                    approved.append(transaction)
+                    results.append({
+                        'id': str(transaction_id),
+                        'reference': transaction.reference,
+                        'success': True,
+                        'status': 'processing'
+                    })
+
+                # One UPDATE; post_save (handle_transaction_approval) has
+                # nothing left to do for these rows, but the wallet cache
+                # refresh it would have triggered is done here
+                now = timezone.now()
+                Transaction.objects.filter(
+                    id__in=[transaction.id for transaction in approved]
+                ).update(
+                    status='processing',
+                    approved_by=request.user,
+                    approved_at=now,
+                    updated_at=now
+                )
+                for user_id in {transaction.user_id for transaction in approved}:
+                    wallet_cache.refresh_on_commit(user_id)
+
+            logger.info(
+                f"Withdrawals approved: {len(approved)} by "
+                f"{request.user.username}"
+            )
+
+            return Response({
+                'success': True,
+                'approved': len(approved),
+                'failed': len(results) - len(approved),
+                'results': results
+            })
+
+        except Exception as e:
+            logger.error(f"Bulk approval error: {e}")
+            return Response({
+                'success': False,
+                'message': 'Approval failed'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'])
+    def bulk_reject_withdrawals(self, request):
+        """Reject pending withdrawals by ids or filter with batched reversals"""
+        try:
+            with db_transaction.atomic():
+                data, ids, rows = self._bulk_withdrawals(request)
+                if ids is None:
+                    return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+                rejected, results = [], []
+                for transaction_id in ids:
+                    transaction = rows.get(transaction_id)
+                    message = self._withdrawal_error(transaction)
+                    if message:
+                        results.append({
+                            'id': str(transaction_id),
+                            'success': False,
+                            'message': message
+                        })
+                        continue
+
+                    rejected.append(transaction)
+                    results.append({
+                        'id': str(transaction_id),
+                        'reference': transaction.reference,
+                        'success': True,
+                        'status': 'reversed'
+                    })
+
+                reversals = iter(PaymentProcessor.reverse_transactions(
+                    rejected, data['reason']
+                ))
+                for result in results:
+                    if result['success']:
+                        result['reversal_reference'] = next(reversals).reference
+
+            logger.info(
+                f"Withdrawals rejected: {len(rejected)} by "
+                f"{request.user.username}"
+            )
+
+            return Response({
+                'success': True,
+                'rejected': len(rejected),
+                'failed': len(results) - len(rejected),
+                'results': results
+            })
+
+        except Exception as e:
+            logger.error(f"Bulk rejection error: {e}")
+            return Response({
+                'success': False,
+                'message': 'Rejection failed'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AdminBillPaymentViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Admin bill payment management"""
     serializer_class = BillPaymentSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
@@ -241,7 +437,7 @@ class AdminBillPaymentViewSet(viewsets.ReadOnlyModelViewSet):
         return BillPayment.objects.all().select_related('user', 'transaction')
 
 
-class AdminPaymentGatewayViewSet(viewsets.ReadOnlyModelViewSet):
+class AdminPaymentGatewayViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Admin payment gateway management"""
     serializer_class = PaymentGatewaySerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
@@ -252,7 +448,7 @@ class AdminPaymentGatewayViewSet(viewsets.ReadOnlyModelViewSet):
         return PaymentGateway.objects.all().select_related('merchant')
 
 
-class AdminWebhookLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AdminWebhookLogViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Admin webhook log viewing"""
     serializer_class = WebhookLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
@@ -263,6 +459,49 @@ class AdminWebhookLogViewSet(viewsets.ReadOnlyModelViewSet):
         return WebhookLog.objects.all()
 
 
+class AdminFeeRuleViewSet(viewsets.ModelViewSet):
+    """Admin fee schedule management; changes apply without a deploy"""
+    serializer_class = FeeRuleSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    filterset_fields = ['fee_type', 'user_type', 'user', 'is_active']
+    ordering = ['fee_type', 'max_amount']
+
+    def get_queryset(self):
+        return FeeRule.objects.all()
+
+
+class AdminAPIKeyViewSet(viewsets.ReadOnlyModelViewSet):
+    """Admin view of merchant API keys and their throttle rates"""
+    serializer_class = AdminAPIKeySerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    filterset_fields = ['user', 'environment', 'is_active']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return APIKey.objects.all()
+
+    @action(detail=True, methods=['post'])
+    def set_rate_limit(self, request, pk=None):
+        """Set this key's throttle rate, or null for the api_key default"""
+        api_key = self.get_object()
+        serializer = RateLimitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        api_key.rate_limit = serializer.validated_data['rate_limit']
+        api_key.save(update_fields=['rate_limit'])
+
+        logger.info(
+            f"API key rate limit set: {api_key.prefix} = "
+            f"{api_key.rate_limit} by {request.user.username}"
+        )
+
+        return Response({
+            'success': True,
+            'api_key': AdminAPIKeySerializer(api_key).data
+        })
+
+
 class AdminKYCViewSet(viewsets.ModelViewSet):
     """Admin KYC management"""
     serializer_class = KYCSerializer
@@ -367,6 +606,27 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return User.objects.all()
 
+    @action(detail=True, methods=['post'])
+    def set_rate_limit(self, request, pk=None):
+        """Set a merchant's throttle rate, or null for the merchant default"""
+        user = self.get_object()
+        serializer = RateLimitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user.api_rate_limit = serializer.validated_data['rate_limit']
+        user.save(update_fields=['api_rate_limit', 'updated_at'])
+
+        logger.info(
+            f"Merchant rate limit set: {user.username} = "
+            f"{user.api_rate_limit} by {request.user.username}"
+        )
+
+        return Response({
+            'success': True,
+            'rate_limit': user.api_rate_limit
+        })
+
     @action(detail=True, methods=['post'])
     def freeze_wallet(self, request, pk=None):
         """Freeze user's wallet"""
@@ -11,18 +11,36 @@ from rest_framework_simplejwt.views import (
 from .api_views import (
     RegisterView, SetTransactionPINView,
     WalletViewSet, DepositView, WithdrawalView, TransferView,
+    NameEnquiryView, FeeQuoteView,
     AirtimeView, DataView, TVView, ElectricityView,
     InitiatePaymentView, VerifyPaymentView, PaymentStatusView,
     MoniepointWebhookView,
-    TransactionViewSet, APIKeyViewSet
+    TransactionViewSet, StatementExportViewSet, APIKeyViewSet
+)
+from .admin_views import (
+    AdminDashboardView, AdminTransactionViewSet, AdminBillPaymentViewSet,
+    AdminPaymentGatewayViewSet, AdminWebhookLogViewSet, AdminFeeRuleViewSet,
+    AdminAPIKeyViewSet, AdminKYCViewSet, AdminUserViewSet
 )
 
 # Create router
 router = DefaultRouter()
 router.register(r'wallets', WalletViewSet, basename='wallet')
 router.register(r'transactions', TransactionViewSet, basename='transaction')
+router.register(r'statements', StatementExportViewSet, basename='statement')
 router.register(r'api-keys', APIKeyViewSet, basename='apikey')
 
+# Admin API (IsAdmin)
+router.register(r'admin/dashboard', AdminDashboardView, basename='admin-dashboard')
+router.register(r'admin/transactions', AdminTransactionViewSet, basename='admin-transaction')
+router.register(r'admin/bill-payments', AdminBillPaymentViewSet, basename='admin-billpayment')
+router.register(r'admin/payment-gateways', AdminPaymentGatewayViewSet, basename='admin-paymentgateway')
+router.register(r'admin/webhook-logs', AdminWebhookLogViewSet, basename='admin-webhooklog')
+router.register(r'admin/fee-rules', AdminFeeRuleViewSet, basename='admin-feerule')
+router.register(r'admin/api-keys', AdminAPIKeyViewSet, basename='admin-apikey')
+router.register(r'admin/kyc', AdminKYCViewSet, basename='admin-kyc')
+router.register(r'admin/users', AdminUserViewSet, basename='admin-user')
+
 urlpatterns = [
     # Authentication
     path('auth/register/', RegisterView.as_view(), name='register'),
@@ -34,6 +52,8 @@ urlpatterns = [
     path('wallet/deposit/', DepositView.as_view(), name='deposit'),
     path('wallet/withdraw/', WithdrawalView.as_view(), name='withdraw'),
     path('wallet/transfer/', TransferView.as_view(), name='transfer'),
+    path('wallet/name-enquiry/', NameEnquiryView.as_view(), name='name_enquiry'),
+    path('fees/quote/', FeeQuoteView.as_view(), name='fee_quote'),
 
     # Bill payments
     path('bills/airtime/', AirtimeView.as_view(), name='airtime'),
@@ -11,32 +11,47 @@ from django.db import transaction as db_transaction
 from django.utils import timezone
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse, FileResponse
 from decimal import Decimal
 import logging
 
 from .models import (
     User, Profile, Wallet, BankAccount, Transaction,
-    BillPayment, PaymentGateway, APIKey, WebhookLog, KYC
+    BillPayment, PaymentGateway, APIKey, WebhookLog, KYC,
+    StatementExport
 )
 from .serializers import (
     UserSerializer, ProfileSerializer, WalletSerializer,
-    BankAccountSerializer, TransactionSerializer,
+    BankAccountSerializer, TransactionSerializer, FastTransactionSerializer,
     DepositSerializer, WithdrawalSerializer, TransferSerializer,
+    NameEnquirySerializer, FeeQuoteSerializer,
     BillPaymentSerializer, AirtimeSerializer, DataSerializer,
     TVSerializer, ElectricitySerializer,
     PaymentGatewaySerializer, InitiatePaymentSerializer,
     VerifyPaymentSerializer, APIKeySerializer,
     WebhookLogSerializer, KYCSerializer,
-    SetTransactionPINSerializer
+    SetTransactionPINSerializer,
+    StatementExportRequestSerializer, StatementExportSerializer
 )
 from .utils.payment import PaymentProcessor
 from .utils.moniepoint import MoniepointAPI
 from .utils.signature import SignatureVerifier
+from .utils.statements import StatementExporter
+from .utils.resolver import account_resolver
+from .utils.fees import fee_engine
+from .utils.wallet_cache import wallet_cache
 from .utils.bills import (
     AirtimeService, DataService, TVService, ElectricityService
 )
 from .permissions import IsOwnerOrReadOnly, IsMerchant, IsAPIKeyAuthenticated
-from .throttling import UserRateThrottle, MerchantRateThrottle
+from .authentication import APIKeyAuthentication
+from .db_router import ReplicaReadMixin, replica_stream
+from .throttling import (
+    UserRateThrottle, NameEnquiryRateThrottle, MerchantRateThrottle,
+    APIKeyRateThrottle
+)
+from .renderers import FastJSONRenderer
+from rest_framework.settings import api_settings
 
 logger = logging.getLogger(__name__)
 
@@ -94,13 +109,56 @@ class SetTransactionPINView(APIView):
 # ==================== WALLET OPERATIONS ====================
 
 class WalletViewSet(viewsets.ReadOnlyModelViewSet):
-    """Wallet viewset - Read only"""
+    """
+    Wallet viewset - Read only
+
+    Reads are served from the cached wallet snapshot (see
+    utils.wallet_cache), which is refreshed after every posting.
+    """
     serializer_class = WalletSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Wallet.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        snapshot = wallet_cache.get(request.user.pk)
+        results = [snapshot['wallet']] if snapshot else []
+
+        if self.paginator is None:
+            return Response(results)
+        return Response({
+            'count': len(results),
+            'next': None,
+            'previous': None,
+            'results': results
+        })
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = wallet_cache.get(request.user.pk)
+        if snapshot is None or snapshot['wallet']['id'] != kwargs.get('pk'):
+            return super().retrieve(request, *args, **kwargs)
+        return Response(snapshot['wallet'])
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Balance and recent transactions for home screens"""
+        snapshot = wallet_cache.get(request.user.pk)
+        if snapshot is None:
+            return Response({
+                'success': False,
+                'message': 'Wallet not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'success': True,
+            'wallet': snapshot['wallet'],
+            'recent_transactions': wallet_cache.transactions(snapshot)
+        })
+
 
 class DepositView(APIView):
     """Deposit funds to wallet"""
@@ -252,6 +310,91 @@ class TransferView(APIView):
         )
 
 
+class NameEnquiryView(APIView):
+    """
+    Resolve GAX account numbers to account names
+
+    GET ?account_number= for a single account, POST account_numbers for
+    a batch (e.g. a beneficiary list) resolved in one call. Every
+    account number counts against the name_enquiry rate, so batches
+    cannot be used to walk the account number space.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserRateThrottle, NameEnquiryRateThrottle]
+
+    def get(self, request):
+        serializer = NameEnquirySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        account_number = serializer.validated_data.get('account_number')
+        if not account_number:
+            return Response({
+                'success': False,
+                'message': 'Use POST for batch name enquiry'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        account = account_resolver.resolve(account_number)
+        if account is None:
+            return Response({
+                'success': False,
+                'message': 'Account not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({'success': True, 'account': account.to_dict()})
+
+    def post(self, request):
+        serializer = NameEnquirySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        account_numbers = serializer.validated_data.get('account_numbers') or [
+            serializer.validated_data['account_number']
+        ]
+        resolved = account_resolver.resolve_many(account_numbers)
+
+        return Response({
+            'success': True,
+            'accounts': [
+                resolved[number].to_dict()
+                for number in account_numbers if number in resolved
+            ],
+            'not_found': [
+                number for number in account_numbers if number not in resolved
+            ]
+        })
+
+
+class FeeQuoteView(APIView):
+    """
+    Quote the fee for a transaction before posting it
+
+    GET ?type=&amount= returns the fee the caller would be charged,
+    including any per-user or per-user-type override.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get(self, request):
+        serializer = FeeQuoteSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        quote = fee_engine.quote(
+            serializer.validated_data['type'],
+            serializer.validated_data['amount'],
+            request.user
+        )
+
+        return Response({
+            'success': True,
+            'quote': {
+                key: value if key == 'type' else str(value)
+                for key, value in quote.items()
+            }
+        })
+
+
 # ==================== BILL PAYMENTS ====================
 
 class AirtimeView(APIView):
@@ -440,8 +583,9 @@ class ElectricityView(APIView):
 
 class InitiatePaymentView(APIView):
     """Initiate payment for merchants"""
+    authentication_classes = [APIKeyAuthentication]
     permission_classes = [IsAPIKeyAuthenticated]
-    throttle_classes = [MerchantRateThrottle]
+    throttle_classes = [APIKeyRateThrottle, MerchantRateThrottle]
 
     @db_transaction.atomic
     def post(self, request):
@@ -453,7 +597,9 @@ class InitiatePaymentView(APIView):
                 email = serializer.validated_data['email']
 
                 # Calculate fee
-                fee = PaymentProcessor.calculate_payment_gateway_fee(amount)
+                fee = PaymentProcessor.calculate_payment_gateway_fee(
+                    amount, merchant
+                )
                 merchant_amount = amount - fee
 
                 # Create payment gateway record
@@ -514,7 +660,9 @@ class InitiatePaymentView(APIView):
 
 class VerifyPaymentView(APIView):
     """Verify payment status"""
+    authentication_classes = [APIKeyAuthentication]
     permission_classes = [IsAPIKeyAuthenticated]
+    throttle_classes = [APIKeyRateThrottle, MerchantRateThrottle]
 
     def post(self, request):
         serializer = VerifyPaymentSerializer(data=request.data)
@@ -700,17 +848,115 @@ class MoniepointWebhookView(APIView):
 
 # ==================== TRANSACTIONS ====================
 
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Transaction viewset"""
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['transaction_type', 'status']
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
+    renderer_classes = [FastJSONRenderer] + list(api_settings.DEFAULT_RENDERER_CLASSES)
 
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        """List transactions through the fast serializer path"""
+        queryset = FastTransactionSerializer.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                FastTransactionSerializer(page).data
+            )
+
+        return Response(FastTransactionSerializer(queryset).data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export account statement
+
+        Short ranges are streamed straight back; long ranges are queued
+        as a StatementExport job for process_statement_exports.
+        """
+        serializer = StatementExportRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = serializer.validated_data['file_format']
+        start_date = serializer.validated_data.get('start_date')
+        end_date = serializer.validated_data.get('end_date')
+
+        if not StatementExporter.is_format_available(file_format):
+            return Response({
+                'success': False,
+                'message': f'{file_format} export is not available'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if StatementExporter.requires_background_job(
+            request.user, start_date, end_date
+        ):
+            job = StatementExport.objects.create(
+                user=request.user,
+                file_format=file_format,
+                start_date=start_date,
+                end_date=end_date
+            )
+
+            logger.info(
+                f"Statement export queued: {job.id} - {request.user.username}"
+            )
+
+            return Response({
+                'success': True,
+                'export': StatementExportSerializer(job).data,
+                'message': 'Statement is being prepared'
+            }, status=status.HTTP_202_ACCEPTED)
+
+        exporter = StatementExporter(request.user, start_date, end_date)
+        response = StreamingHttpResponse(
+            replica_stream(exporter.stream(file_format)),
+            content_type=exporter.content_type(file_format)
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{exporter.filename(file_format)}"'
+        )
+        return response
+
+
+class StatementExportViewSet(viewsets.ReadOnlyModelViewSet):
+    """Background statement export jobs"""
+    serializer_class = StatementExportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return StatementExport.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download a completed statement"""
+        job = self.get_object()
+
+        if job.status != 'completed' or not job.file:
+            return Response({
+                'success': False,
+                'message': 'Statement is not ready'
+            }, status=status.HTTP_409_CONFLICT)
+
+        exporter = StatementExporter(job.user, job.start_date, job.end_date)
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=exporter.filename(job.file_format),
+            content_type=exporter.content_type(job.file_format)
+        )
+
 
 # ==================== API KEYS ====================
 
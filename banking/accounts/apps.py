@@ -7,4 +7,11 @@ class AccountsConfig(AppConfig):
     
     def ready(self):
         import accounts.signals  # noqa
+        from django.db.backends.signals import connection_created
+        from .db_connections import install_pooler_guard
+
+        connection_created.connect(
+            install_pooler_guard,
+            dispatch_uid='accounts.install_pooler_guard'
+        )
 
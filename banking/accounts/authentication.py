@@ -0,0 +1,232 @@
+"""
+Custom authentication classes for the banking application
+"""
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+from .metrics import record_cache_lookup
+from .models import APIKey
+from .utils.signature import SignatureVerifier
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAPIKey:
+    """Verified API key details attached to request.auth"""
+
+    __slots__ = (
+        'id', 'prefix', 'key_hash', 'user', 'environment', 'expires_at',
+        'rate_limit'
+    )
+
+    def __init__(self, id, prefix, key_hash, user, environment, expires_at,
+                 rate_limit=None):
+        self.id = id
+        self.prefix = prefix
+        self.key_hash = key_hash
+        self.user = user
+        self.environment = environment
+        self.expires_at = expires_at
+        self.rate_limit = rate_limit
+
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at < timezone.now()
+
+
+class LastUsedTracker:
+    """
+    Coalesce APIKey.last_used_at updates into periodic background writes
+
+    Each key is marked at most once per interval across all workers (via
+    cache.add), and marks are flushed by a daemon thread with a single
+    bulk_update instead of one UPDATE per request.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def interval(self):
+        return getattr(settings, 'API_KEY_LAST_USED_INTERVAL', 60)
+
+    def record(self, key_id, used_at=None):
+        """Note that a key was used; never touches the database"""
+        if not cache.add(f'apikey:used:{key_id}', 1, timeout=self.interval):
+            return
+
+        with self._lock:
+            self._pending[key_id] = used_at or timezone.now()
+            if self._thread is None:
+                self._start()
+
+    def flush(self):
+        """Write pending last_used_at values; returns number of keys"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            APIKey.objects.bulk_update(
+                [
+                    APIKey(id=key_id, last_used_at=used_at)
+                    for key_id, used_at in pending.items()
+                ],
+                ['last_used_at']
+            )
+        except Exception as e:
+            logger.error(f"API key last_used_at flush error: {e}")
+            return 0
+
+        return len(pending)
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run,
+            name='apikey-last-used',
+            daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+            close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+
+last_used_tracker = LastUsedTracker()
+
+
+class APIKeyAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate merchant requests with the X-API-Key header
+
+    Keys are looked up by their public prefix and the secret part is
+    checked against the stored HMAC, so no plaintext key is stored or
+    cached. Prefix lookups are cached in-process for
+    API_KEY_LOCAL_CACHE_TTL seconds and in the shared cache for
+    API_KEY_CACHE_TTL seconds. Saving or deleting an APIKey, or saving
+    its user, drops the shared entry once the change commits, so a
+    revoked key or deactivated user stops working everywhere within the
+    local TTL.
+    """
+    header = 'X-API-Key'
+
+    # Cached marker for prefixes that do not exist or are inactive
+    INVALID = 'invalid'
+
+    # Upper bound on in-process entries (guards against random key floods)
+    LOCAL_CACHE_SIZE = 10000
+
+    _local_cache = {}
+    _local_lock = threading.Lock()
+
+    def authenticate(self, request):
+        raw_key = request.headers.get(self.header, '')
+
+        if not raw_key:
+            return None
+
+        prefix, key_secret = APIKey.split_key(raw_key)
+        api_key = self.get_api_key(prefix)
+
+        if api_key is None or not SignatureVerifier.verify_api_key(
+            key_secret, api_key.key_hash
+        ) or api_key.is_expired():
+            raise exceptions.AuthenticationFailed('Invalid API key')
+
+        if not api_key.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted')
+
+        last_used_tracker.record(api_key.id)
+
+        return (api_key.user, api_key)
+
+    def authenticate_header(self, request):
+        return self.header
+
+    @classmethod
+    def get_api_key(cls, prefix):
+        """Resolve a key prefix through the local cache, shared cache, then DB"""
+        cache_key = cls.cache_key(prefix)
+        now = time.monotonic()
+
+        entry = cls._local_cache.get(cache_key)
+        if entry is not None and entry[0] > now:
+            record_cache_lookup(True)
+            return entry[1]
+
+        api_key = cache.get(cache_key)
+        record_cache_lookup(api_key is not None)
+        if api_key is None:
+            api_key = cls.load_api_key(prefix) or cls.INVALID
+            timeout = getattr(settings, 'API_KEY_CACHE_TTL', 300)
+            if api_key == cls.INVALID:
+                timeout = getattr(settings, 'API_KEY_INVALID_CACHE_TTL', 30)
+            cache.set(cache_key, api_key, timeout=timeout)
+
+        with cls._local_lock:
+            if len(cls._local_cache) >= cls.LOCAL_CACHE_SIZE:
+                cls._local_cache.clear()
+            cls._local_cache[cache_key] = (
+                now + getattr(settings, 'API_KEY_LOCAL_CACHE_TTL', 5),
+                None if api_key == cls.INVALID else api_key
+            )
+
+        return None if api_key == cls.INVALID else api_key
+
+    @staticmethod
+    def load_api_key(prefix):
+        """Fetch an active key by its indexed prefix"""
+        try:
+            key_obj = APIKey.objects.select_related('user').get(
+                prefix=prefix,
+                is_active=True
+            )
+        except APIKey.DoesNotExist:
+            return None
+
+        return CachedAPIKey(
+            id=key_obj.id,
+            prefix=key_obj.prefix,
+            key_hash=key_obj.key_hash,
+            user=key_obj.user,
+            environment=key_obj.environment,
+            expires_at=key_obj.expires_at,
+            rate_limit=key_obj.rate_limit
+        )
+
+    @staticmethod
+    def cache_key(prefix):
+        return f'apikey:auth:{prefix}'
+
+    @classmethod
+    def invalidate(cls, prefix):
+        """Drop a key prefix from the shared and local caches"""
+        cache_key = cls.cache_key(prefix)
+        cache.delete(cache_key)
+        with cls._local_lock:
+            cls._local_cache.pop(cache_key, None)
+
+    @classmethod
+    def invalidate_user(cls, user_id):
+        """Drop the cached keys of a user (they carry the User object)"""
+        for prefix in APIKey.objects.filter(user_id=user_id).values_list(
+            'prefix', flat=True
+        ):
+            cls.invalidate(prefix)
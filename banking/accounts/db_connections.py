@@ -0,0 +1,149 @@
+"""
+Database connection management
+Persistent connections and transaction-pooler (PgBouncer) compatibility
+
+DB_CONNECTION_MODE selects how Django talks to Postgres:
+
+persistent (default)
+    Each worker thread keeps its connection for CONN_MAX_AGE seconds and
+    CONN_HEALTH_CHECKS checks it before reuse, so a restarted database
+    costs one failed ping instead of a failed request.
+
+pooler
+    Django connects to PgBouncer (or another pooler) in transaction
+    pooling mode, where consecutive transactions of one Django connection
+    may run on different server connections. Only transaction-scoped
+    state is safe there:
+
+    - select_for_update() and the atomic blocks in PaymentProcessor are
+      compatible: row locks, savepoints and on_commit callbacks all live
+      inside one transaction, which the pooler keeps on one server
+      connection. So are SET LOCAL, SET CONSTRAINTS and SET TRANSACTION.
+    - Locks taken outside a transaction, session settings (SET, LISTEN,
+      PREPARE, WITH HOLD cursors, session advisory locks) and server-side
+      cursors are not, because the next statement may run elsewhere.
+
+    In this mode DISABLE_SERVER_SIDE_CURSORS must be set (checked at
+    startup) and PoolerGuard rejects the unsafe statements at runtime.
+    Without server-side cursors QuerySet.iterator() fetches the whole
+    result set into the worker before the first row, so large scans must
+    page by key instead (as StatementExporter does on created_at, id)
+    or use a database alias that bypasses the pooler.
+"""
+from django.conf import settings
+from django.core import checks
+from django.db import NotSupportedError, connections
+from django.db.transaction import TransactionManagementError
+
+PERSISTENT_MODE = 'persistent'
+POOLER_MODE = 'pooler'
+CONNECTION_MODES = (PERSISTENT_MODE, POOLER_MODE)
+
+# Statements that leave state on the server connection
+SESSION_STATEMENTS = (
+    'SET ', 'RESET ', 'LISTEN ', 'UNLISTEN ', 'PREPARE ', 'DEALLOCATE ',
+)
+# SET forms scoped to the current transaction; SET CONSTRAINTS is issued
+# by Django's own check_constraints() during loaddata
+TRANSACTION_SET_STATEMENTS = (
+    'SET LOCAL ', 'SET CONSTRAINTS ', 'SET TRANSACTION ',
+)
+ROW_LOCK_CLAUSES = (
+    ' FOR UPDATE', ' FOR NO KEY UPDATE', ' FOR SHARE', ' FOR KEY SHARE',
+)
+
+
+def get_connection_mode():
+    return getattr(settings, 'DB_CONNECTION_MODE', PERSISTENT_MODE)
+
+
+class PoolerGuard:
+    """
+    Execute wrapper rejecting statements unsafe under transaction pooling
+
+    Adds a couple of substring checks per query; installed only in pooler
+    mode.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        self.check(sql, context['connection'])
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def check(sql, connection):
+        statement = ' '.join(sql[:32].split()[:2]).upper() + ' '
+
+        if statement.startswith(SESSION_STATEMENTS) and not statement.startswith(
+            TRANSACTION_SET_STATEMENTS
+        ):
+            raise NotSupportedError(
+                f"Session-level statement under transaction pooling: {sql[:60]}"
+            )
+
+        upper = sql.upper()
+        if 'PG_ADVISORY_LOCK' in upper or 'WITH HOLD' in upper:
+            raise NotSupportedError(
+                "Session advisory locks and WITH HOLD cursors are not "
+                "supported under transaction pooling"
+            )
+
+        if connection.get_autocommit() and any(
+            clause in upper for clause in ROW_LOCK_CLAUSES
+        ):
+            raise TransactionManagementError(
+                "Row locks must be taken inside transaction.atomic() under "
+                "transaction pooling"
+            )
+
+
+pooler_guard = PoolerGuard()
+
+
+def install_pooler_guard(sender, connection, **kwargs):
+    """connection_created receiver: add the guard to pooled connections"""
+    if get_connection_mode() != POOLER_MODE or connection.vendor != 'postgresql':
+        return
+    if pooler_guard not in connection.execute_wrappers:
+        # First in the list, so execute_wrapper() context managers that
+        # pop the last wrapper never remove it
+        connection.execute_wrappers.insert(0, pooler_guard)
+
+
+@checks.register()
+def check_connection_settings(app_configs=None, **kwargs):
+    """Validate CONN_MAX_AGE / pooler settings for every database"""
+    errors = []
+    mode = get_connection_mode()
+
+    if mode not in CONNECTION_MODES:
+        return [checks.Error(
+            f"DB_CONNECTION_MODE must be one of {', '.join(CONNECTION_MODES)}",
+            id='accounts.E001',
+        )]
+
+    for alias in connections:
+        db = connections.settings[alias]
+        if 'postgresql' not in db['ENGINE']:
+            continue
+
+        if mode == POOLER_MODE and not db.get('DISABLE_SERVER_SIDE_CURSORS'):
+            errors.append(checks.Error(
+                f"Database '{alias}' needs DISABLE_SERVER_SIDE_CURSORS under "
+                f"transaction pooling",
+                hint='QuerySet.iterator() would otherwise declare cursors '
+                     'that outlive the transaction. With the setting, '
+                     'iterator() loads whole result sets into memory; page '
+                     'large scans by key instead.',
+                id='accounts.E002',
+            ))
+
+        if db.get('CONN_MAX_AGE') and not db.get('CONN_HEALTH_CHECKS'):
+            errors.append(checks.Warning(
+                f"Database '{alias}' reuses connections without "
+                f"CONN_HEALTH_CHECKS",
+                hint='A dropped connection fails the next request instead '
+                     'of being replaced.',
+                id='accounts.W001',
+            ))
+
+    return errors
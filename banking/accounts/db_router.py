@@ -0,0 +1,257 @@
+"""
+Read replica routing
+Send reporting and history reads to replicas, everything else to the primary
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import empty
+from rest_framework import permissions
+
+logger = logging.getLogger(__name__)
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def get_replica_aliases():
+    """Configured replica aliases (REPLICA_DATABASES) that exist in DATABASES"""
+    return [
+        alias for alias in getattr(settings, 'REPLICA_DATABASES', [])
+        if alias in settings.DATABASES
+    ]
+
+
+def pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Read this user's data from the primary for REPLICA_PIN_SECONDS"""
+    cache.set(
+        pin_key(user_id), 1,
+        timeout=getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+    )
+
+
+class RoutingState:
+    """
+    Per-request (or per-block) routing decisions
+
+    The replica is chosen once per state, so all reads of a request (a
+    page and its count, say) see the same replica.
+    """
+
+    __slots__ = ('use_replica', 'wrote', 'request', '_pinned', '_replica')
+
+    def __init__(self, use_replica=False, request=None):
+        self.use_replica = use_replica
+        self.wrote = False
+        self.request = request
+        self._pinned = None
+        self._replica = empty
+
+    def get_user_id(self):
+        """Authenticated user id, without forcing a lazy session user"""
+        if self.request is None:
+            return None
+        user = self.request.__dict__.get('user')
+        if user is None or getattr(user, '_wrapped', None) is empty:
+            return None
+        if not user.is_authenticated:
+            return None
+        return user.pk
+
+    def is_pinned(self):
+        if self._pinned is None:
+            user_id = self.get_user_id()
+            if user_id is None:
+                return False
+            self._pinned = bool(cache.get(pin_key(user_id)))
+        return self._pinned
+
+    def reads_from_replica(self):
+        """Whether reads may go to a replica now"""
+        return self.use_replica and not self.wrote and not self.is_pinned()
+
+    def get_replica(self):
+        """Replica alias for this state's reads, or None for the primary"""
+        if self._replica is empty:
+            self._replica = choose_replica()
+        return self._replica
+
+
+class ReplicaLagMonitor:
+    """
+    Track how far each replica is behind the primary
+
+    Lag is measured at most once per REPLICA_LAG_CHECK_INTERVAL seconds
+    per replica and process. A replica that is more than
+    REPLICA_MAX_LAG_SECONDS behind, or cannot be queried, is skipped.
+    """
+    POSTGRES_LAG_SQL = (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+        "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+        "pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self):
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+
+    @property
+    def max_lag(self):
+        return getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        entry = self._checked.get(alias)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        lag = self.get_lag(alias)
+        healthy = lag is not None and lag <= self.max_lag
+        if not healthy:
+            logger.warning(f"Replica {alias} unavailable or lagging ({lag}s)")
+
+        with self._lock:
+            self._checked[alias] = (now + self.interval, healthy)
+        return healthy
+
+    def get_lag(self, alias):
+        """Replica lag in seconds, or None if it cannot be measured"""
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(self.POSTGRES_LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+        except Exception as e:
+            logger.error(f"Replica lag check failed for {alias}: {e}")
+            return None
+
+
+replica_monitor = ReplicaLagMonitor()
+
+
+def choose_replica():
+    """A healthy replica alias, or None to use the primary"""
+    aliases = get_replica_aliases()
+    random.shuffle(aliases)
+    for alias in aliases:
+        if replica_monitor.is_healthy(alias):
+            return alias
+    return None
+
+
+def route_reads_to_replica():
+    """Allow the rest of the current request to read from a replica"""
+    state = _routing.get()
+    if state is not None:
+        state.use_replica = True
+
+
+@contextmanager
+def routing(state):
+    """Apply a RoutingState inside the block"""
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def use_replica():
+    """
+    Read from a replica inside the block (reports, scans)
+
+    Writes still go to the primary, and once the block has written,
+    its later reads do too.
+    """
+    return routing(RoutingState(use_replica=True))
+
+
+def replica_stream(iterable):
+    """
+    Iterate a streaming response body with its reads on a replica
+
+    Streaming bodies are consumed after the view (and the request's
+    routing state) has returned, so the decision is taken here, when the
+    response is built: a request that wrote or whose user is pinned to
+    the primary streams from the primary. Each step then re-applies it.
+    """
+    current = _routing.get()
+    state = RoutingState(use_replica=True)
+    if current is not None:
+        state._pinned = current.wrote or current.is_pinned()
+
+    def stream():
+        iterator = iter(iterable)
+        while True:
+            with routing(state):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            yield chunk
+
+    return stream()
+
+
+def request_routing(request):
+    """Routing state for one request; used by ReplicaRoutingMiddleware"""
+    return routing(RoutingState(request=request))
+
+
+class ReplicaRouter:
+    """
+    Database router for read replicas
+
+    Reads only go to a replica when the request or block opted in (see
+    ReplicaReadMixin and use_replica), nothing has been written in it yet,
+    the user is not pinned to the primary after a recent write, and a
+    replica is within the lag limit. Everything else uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.reads_from_replica():
+            return None
+        return state.get_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve GET/HEAD/OPTIONS requests of a DRF view from a read replica"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            route_reads_to_replica()
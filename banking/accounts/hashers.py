@@ -0,0 +1,128 @@
+"""
+Transaction PIN hashers
+
+A 4-6 digit PIN has at most a million values, so no work factor makes a
+leaked PIN hash safe on its own. PIN hashes are protected by a
+server-side pepper (TRANSACTION_PIN_PEPPER) and online guessing by the
+attempt lockout, which lets verification stay cheap on the payment path.
+"""
+import hashlib
+import hmac
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    BasePasswordHasher, ScryptPasswordHasher, check_password, mask_hash
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+def get_pin_pepper():
+    return getattr(settings, 'TRANSACTION_PIN_PEPPER', settings.SECRET_KEY)
+
+
+class PINHMACHasher(BasePasswordHasher):
+    """Salted HMAC-SHA256 keyed with the PIN pepper"""
+
+    algorithm = 'pin_hmac_sha256'
+
+    def encode(self, password, salt):
+        self._check_encode_args(password, salt)
+        hash_ = hmac.new(
+            get_pin_pepper().encode('utf-8'),
+            f'{salt}${password}'.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        return f'{self.algorithm}${salt}${hash_}'
+
+    def decode(self, encoded):
+        algorithm, salt, hash_ = encoded.split('$', 2)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'hash': hash_,
+            'salt': salt,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        return constant_time_compare(
+            encoded, self.encode(password, decoded['salt'])
+        )
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+class PINScryptHasher(ScryptPasswordHasher):
+    """Peppered scrypt with a small, tunable work factor"""
+
+    algorithm = 'pin_scrypt'
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'TRANSACTION_PIN_SCRYPT_WORK_FACTOR', 2**12)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        return super().encode(get_pin_pepper() + password, salt, n, r, p)
+
+
+PIN_HASHERS = {
+    hasher.algorithm: hasher
+    for hasher in (PINHMACHasher, PINScryptHasher)
+}
+
+
+def get_pin_hasher(algorithm=None):
+    """Return the configured (or named) PIN hasher"""
+    if algorithm is None:
+        algorithm = getattr(
+            settings, 'TRANSACTION_PIN_HASHER', PINHMACHasher.algorithm
+        )
+    try:
+        return PIN_HASHERS[algorithm]()
+    except KeyError:
+        raise ValueError(f"Unknown transaction PIN hasher: {algorithm}")
+
+
+def make_pin(pin):
+    """Hash a PIN with the configured hasher"""
+    hasher = get_pin_hasher()
+    return hasher.encode(pin, hasher.salt())
+
+
+def check_pin(pin, encoded):
+    """
+    Check a PIN against its stored hash
+
+    Hashes written by make_password before the PIN hashers existed are
+    still accepted.
+
+    Returns:
+        tuple: (is_valid, must_update) - must_update is True when a valid
+        PIN should be rehashed with the configured hasher
+    """
+    if not pin or not encoded:
+        return False, False
+
+    algorithm = encoded.split('$', 1)[0]
+    hasher = PIN_HASHERS.get(algorithm)
+
+    if hasher is None:
+        is_valid = check_password(pin, encoded)
+        return is_valid, is_valid
+
+    hasher = hasher()
+    is_valid = hasher.verify(pin, encoded)
+    must_update = is_valid and (
+        algorithm != get_pin_hasher().algorithm or hasher.must_update(encoded)
+    )
+    return is_valid, must_update
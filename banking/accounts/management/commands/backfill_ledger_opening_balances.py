@@ -0,0 +1,56 @@
+"""
+Backfill opening balances for the core_ledger blockchain
+Queue one opening credit per wallet for the balance it held before the
+ledger outbox, so later debits from it are accepted by the chain
+"""
+from django.core.management.base import BaseCommand, CommandError
+from accounts.utils.ledger_sync import ledger_sync
+
+
+class Command(BaseCommand):
+    help = 'Queue opening-balance outbox rows for balances the outbox does not cover'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Wallets locked per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--replay',
+            action='store_true',
+            help='Then rebuild the chain from the start of the outbox '
+                 '(stop the sync_ledger_chain worker first)'
+        )
+
+    def handle(self, *args, **options):
+        report = ledger_sync.backfill_opening_balances(
+            chunk_size=options['chunk_size']
+        )
+
+        for account_number, amount in report['negative']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{account_number}: postings exceed the balance by ₦{-amount}'
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Opening balances: {report['created']} of "
+                f"{report['wallets']} wallets, ₦{report['amount']}"
+            )
+        )
+
+        if options['replay']:
+            try:
+                ledger_sync.replay()
+            except (OSError, RuntimeError) as e:
+                raise CommandError(
+                    f'{e}; stop the sync_ledger_chain worker and re-run '
+                    f'with --replay'
+                )
+            self.stdout.write(
+                'Chain truncated to genesis; the next sync replays the outbox'
+            )
@@ -0,0 +1,146 @@
+"""
+Benchmark database connection handling
+Compare a new connection per request with persistent connections
+"""
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = 'Benchmark requests/sec with and without persistent connections at different pool sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/payments/status/BENCH-CONNECTIONS/',
+            help='Endpoint to request (default: public payment status)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Requests per run (default: 2000)'
+        )
+        parser.add_argument(
+            '--pool-sizes',
+            default='1,2,4,8',
+            help='Comma-separated numbers of concurrent workers, each '
+                 'holding one connection (default: 1,2,4,8)'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            default=60,
+            help='CONN_MAX_AGE for the persistent runs (default: 60)'
+        )
+        parser.add_argument(
+            '--host',
+            help='Host header (default: first entry of ALLOWED_HOSTS)'
+        )
+
+    def handle(self, *args, **options):
+        pool_sizes = [int(size) for size in options['pool_sizes'].split(',')]
+        total = options['requests']
+        host = options['host'] or next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'),
+            'testserver'
+        )
+
+        self.handler = WSGIHandler()
+        self.factory = RequestFactory()
+        self.opened = Counter()
+        connection_created.connect(self.count_connection)
+
+        db = connections.settings['default']
+        original_max_age = db.get('CONN_MAX_AGE', 0)
+
+        self.stdout.write(
+            f"Database: {db['ENGINE']} ({connections['default'].vendor}), "
+            f"{total} requests to {options['path']} per run\n"
+        )
+        self.stdout.write(
+            f"{'workers':>8} {'mode':>12} {'req/s':>10} "
+            f"{'connections':>12}  statuses"
+        )
+
+        try:
+            for pool_size in pool_sizes:
+                for mode, max_age in (
+                    ('per-request', 0),
+                    ('persistent', options['conn_max_age'])
+                ):
+                    db['CONN_MAX_AGE'] = max_age
+                    connections.close_all()
+                    self.opened.clear()
+
+                    rate, statuses = self.run(
+                        options['path'], host, pool_size, total
+                    )
+                    self.stdout.write(
+                        f"{pool_size:>8} {mode:>12} {rate:>10.0f} "
+                        f"{self.opened['default']:>12}  "
+                        f"{dict(statuses)}"
+                    )
+        finally:
+            db['CONN_MAX_AGE'] = original_max_age
+            connection_created.disconnect(self.count_connection)
+            connections.close_all()
+
+    def count_connection(self, sender, connection, **kwargs):
+        self.opened[connection.alias] += 1
+
+    def run(self, path, host, pool_size, total):
+        """Send total requests from pool_size threads; returns (req/s, statuses)"""
+        per_worker = total // pool_size
+        statuses = Counter()
+        lock = threading.Lock()
+        start = threading.Barrier(pool_size + 1)
+
+        def worker(index):
+            local = Counter()
+            start.wait()
+            for number in range(per_worker):
+                # A distinct client address per request keeps anonymous
+                # throttling out of the measurement
+                environ = self.factory.get(
+                    path,
+                    secure=True,
+                    HTTP_HOST=host,
+                    REMOTE_ADDR=f'10.{index}.{number // 256 % 256}.{number % 256}'
+                ).environ
+                response = self.handler(environ, self.start_response(local))
+                for _ in response:
+                    pass
+                # Fires request_finished, which closes per-request connections
+                response.close()
+            connections.close_all()
+            with lock:
+                statuses.update(local)
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(pool_size)
+        ]
+        for thread in threads:
+            thread.start()
+
+        start.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return per_worker * pool_size / elapsed, statuses
+
+    @staticmethod
+    def start_response(statuses):
+        def start_response(status, headers, exc_info=None):
+            statuses[status.split(' ', 1)[0]] += 1
+        return start_response
@@ -0,0 +1,101 @@
+"""
+Benchmark request logging
+Measure LogRequestMiddleware overhead on the request thread
+
+Log output goes to /dev/null, so the synchronous run shows only
+formatting cost; with a real stream the request thread would also wait on
+its writes.
+"""
+import logging
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from accounts.middleware import log_request
+from accounts.middleware.log_request import (
+    AccessLogFormatter, LogRequestMiddleware
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark LogRequestMiddleware overhead per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='Requests per run (default: 20000)'
+        )
+        parser.add_argument(
+            '--sample-rate',
+            type=float,
+            default=0.1,
+            help='Sample rate for the sampled run (default: 0.1)'
+        )
+
+    def handle(self, *args, **options):
+        total = max(options['requests'], 1)
+        request = RequestFactory().get(
+            '/api/transactions/', HTTP_USER_AGENT='bench'
+        )
+        response = HttpResponse(status=200)
+
+        def view(request):
+            return response
+
+        devnull = open(os.devnull, 'w')
+        sync_handler = logging.StreamHandler(devnull)
+        sync_handler.setFormatter(AccessLogFormatter())
+
+        logger = log_request.logger
+        saved = (logger.handlers, logger.propagate, logger.level)
+        logger.setLevel(logging.INFO)
+
+        try:
+            baseline, _ = self.run(view, request, total)
+            self.stdout.write(
+                f'No middleware: {baseline:.2f} us request-thread CPU'
+            )
+
+            # Same record written synchronously on the request thread
+            logger.handlers = [sync_handler]
+            logger.propagate = False
+            self.report('Synchronous handler', view, request, total, 1.0, baseline)
+
+            # Queue handler; the listener writes to /dev/null
+            listener = log_request.start_access_log_listener()
+            if listener is not None:
+                listener.handlers = (sync_handler,)
+            self.report('Queue handler', view, request, total, 1.0, baseline)
+            self.report(
+                f'Queue handler, sample rate {options["sample_rate"]}',
+                view, request, total, options['sample_rate'], baseline
+            )
+        finally:
+            log_request.stop_access_log_listener()
+            logger.handlers, logger.propagate, level = saved
+            logger.setLevel(level)
+            devnull.close()
+
+    def report(self, label, view, request, total, sample_rate, baseline):
+        middleware = LogRequestMiddleware(view)
+        middleware.sample_rate = sample_rate
+        cpu, wall = self.run(middleware, request, total)
+        self.stdout.write(
+            f'{label}: {cpu:.2f} us request-thread CPU '
+            f'(+{cpu - baseline:.2f} us), {wall:.2f} us wall'
+        )
+
+    @staticmethod
+    def run(handler, request, total):
+        """Returns (request-thread CPU, wall time) per request in us"""
+        start_cpu = time.thread_time()
+        start_wall = time.perf_counter()
+        for _ in range(total):
+            handler(request)
+        return (
+            (time.thread_time() - start_cpu) / total * 1e6,
+            (time.perf_counter() - start_wall) / total * 1e6
+        )
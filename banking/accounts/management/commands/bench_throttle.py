@@ -0,0 +1,106 @@
+"""
+Benchmark request throttling
+Compare DRF's timestamp-list throttle with the sliding-window throttle
+"""
+import threading
+import time
+import uuid
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle as DRFUserRateThrottle
+from accounts.throttling import UserRateThrottle
+
+
+class _User:
+    """Minimal authenticated user for throttle identity"""
+    is_authenticated = True
+
+    def __init__(self):
+        self.pk = uuid.uuid4()
+
+
+class _Request:
+    def __init__(self, user):
+        self.user = user
+        self._request = APIRequestFactory().get('/')
+        self.META = self._request.META
+
+
+class Command(BaseCommand):
+    help = 'Benchmark throttle overhead and admission accuracy on the configured cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Requests per throttle (default: 5000)'
+        )
+        parser.add_argument(
+            '--rate',
+            type=int,
+            default=1000,
+            help='Allowed requests per minute (default: 1000)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent clients sharing one identity (default: 8)'
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        rate = f"{options['rate']}/min"
+        threads = max(options['threads'], 1)
+
+        class LegacyThrottle(DRFUserRateThrottle):
+            pass
+
+        class SlidingThrottle(UserRateThrottle):
+            pass
+
+        LegacyThrottle.rate = rate
+        SlidingThrottle.rate = rate
+
+        self.stdout.write(f'Cache: {type(caches["default"]).__name__}, rate: {rate}')
+
+        for label, throttle_class in (
+            ('DRF timestamp list', LegacyThrottle),
+            ('Sliding window', SlidingThrottle),
+        ):
+            elapsed, allowed = self.run(throttle_class, total, 1)
+            self.stdout.write(
+                f'{label}: {elapsed / total * 1e6:.1f} us per request, '
+                f'{allowed} of {total} allowed'
+            )
+
+            _, allowed = self.run(throttle_class, total, threads)
+            self.stdout.write(
+                f'{label} ({threads} threads): {allowed} allowed '
+                f'(limit {options["rate"]})'
+            )
+
+    @staticmethod
+    def run(throttle_class, total, threads):
+        """Send total requests from one identity; returns (seconds, allowed)"""
+        request = _Request(_User())
+        allowed = [0] * threads
+        per_thread = total // threads
+
+        def worker(index):
+            throttle = throttle_class()
+            for _ in range(per_thread):
+                if throttle.allow_request(request, None):
+                    allowed[index] += 1
+
+        workers = [
+            threading.Thread(target=worker, args=(i,)) for i in range(threads)
+        ]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - start, sum(allowed)
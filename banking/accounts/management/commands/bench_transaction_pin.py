@@ -0,0 +1,51 @@
+"""
+Benchmark transaction PIN verification
+Compare CPU time per check for the legacy password hasher and PIN hashers
+"""
+import time
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from accounts.hashers import PIN_HASHERS, check_pin
+
+
+class Command(BaseCommand):
+    help = 'Benchmark transaction PIN hashing (CPU time per verification)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Verifications per hasher (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(options['iterations'], 1)
+        pin = '4821'
+
+        legacy_hash = make_password(pin)
+        legacy_time = self.cpu_per_call(
+            lambda: check_password(pin, legacy_hash), iterations
+        )
+        self.report('legacy (make_password)', legacy_time)
+
+        for algorithm, hasher_class in PIN_HASHERS.items():
+            hasher = hasher_class()
+            encoded = hasher.encode(pin, hasher.salt())
+            elapsed = self.cpu_per_call(
+                lambda: check_pin(pin, encoded), iterations
+            )
+            self.report(algorithm, elapsed, legacy_time)
+
+    def report(self, label, elapsed, baseline=None):
+        line = f'{label}: {elapsed * 1e6:.1f} us CPU per verify'
+        if baseline:
+            line += f' ({baseline / elapsed:.0f}x faster)'
+        self.stdout.write(line)
+
+    @staticmethod
+    def cpu_per_call(func, iterations):
+        start = time.process_time()
+        for _ in range(iterations):
+            func()
+        return (time.process_time() - start) / iterations
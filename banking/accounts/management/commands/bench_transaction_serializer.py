@@ -0,0 +1,113 @@
+"""
+Benchmark transaction list serialization
+Compare TransactionSerializer with the FastTransactionSerializer path
+"""
+import time
+import uuid
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from accounts.models import User, Transaction
+from accounts.renderers import FastJSONRenderer
+from accounts.serializers import (
+    TransactionSerializer, FastTransactionSerializer
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark transaction list serialization (runs in a rolled back transaction)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Number of transactions to serialize (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per path; the best run is reported'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with db_transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        # bulk_create skips the post_save wallet/profile provisioning
+        user, = User.objects.bulk_create([User(
+            username=f'bench-{uuid.uuid4().hex[:8]}',
+            phone_number=uuid.uuid4().hex[:15]
+        )])
+        now = timezone.now()
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=user,
+                transaction_type='transfer',
+                amount=Decimal('1500.00'),
+                fee=Decimal('25.00'),
+                total_amount=Decimal('1525.00'),
+                reference=f'BENCH-{uuid.uuid4().hex}',
+                status='completed',
+                description='Benchmark transfer',
+                metadata={'narration': 'benchmark', 'index': i},
+                recipient_account='2012345678',
+                recipient_name='Bench Recipient',
+                recipient_bank='GAX Bank',
+                balance_before=Decimal('100000.00'),
+                balance_after=Decimal('98475.00'),
+                completed_at=now
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        queryset = Transaction.objects.filter(user=user).order_by('-created_at')
+
+        def drf_path():
+            data = TransactionSerializer(
+                queryset.select_related('user'), many=True
+            ).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            data = FastTransactionSerializer(
+                FastTransactionSerializer.get_values(queryset)
+            ).data
+            return FastJSONRenderer().render(data)
+
+        drf_time = self.best_of(drf_path, repeat)
+        fast_time = self.best_of(fast_path, repeat)
+
+        self.stdout.write(f'Rows: {rows}')
+        self.stdout.write(
+            f'TransactionSerializer + JSONRenderer: {drf_time * 1000:.1f} ms'
+        )
+        self.stdout.write(
+            f'FastTransactionSerializer + FastJSONRenderer: '
+            f'{fast_time * 1000:.1f} ms'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Speedup: {drf_time / fast_time:.1f}x')
+        )
+
+    @staticmethod
+    def best_of(func, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
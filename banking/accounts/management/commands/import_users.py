@@ -0,0 +1,94 @@
+"""
+Bulk import users
+Create users, wallets and profiles from a CSV or JSONL file
+"""
+import itertools
+from django.core.management.base import BaseCommand, CommandError
+from accounts.utils.imports import UserImporter
+
+
+class Command(BaseCommand):
+    help = 'Bulk import users with wallets and profiles from CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: from file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=UserImporter.CHUNK_SIZE,
+            help=f'Rows per transaction (default: {UserImporter.CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue after the last checkpointed row'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <path>.checkpoint.json)'
+        )
+        parser.add_argument(
+            '--no-provision',
+            action='store_true',
+            help='Do not queue Paystack virtual accounts'
+        )
+        parser.add_argument(
+            '--error-file',
+            help='Write rejected rows to this JSONL file '
+                 '(default: <path>.errors.jsonl)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            importer = UserImporter(
+                options['path'],
+                file_format=options['format'],
+                chunk_size=options['chunk_size'],
+                checkpoint_path=options['checkpoint'],
+                error_path=options['error_file'],
+                provision=not options['no_provision']
+            )
+            results = importer.run(
+                resume=options['resume'],
+                on_chunk=self.report_progress
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in itertools.islice(importer.iter_errors(), 10):
+            self.stdout.write(
+                self.style.WARNING(f"Row {error['row']}: {error['error']}")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nUser import complete:\n'
+                f'Rows: {results["rows"]}\n'
+                f'Created: {results["created"]}\n'
+                f'Skipped (existing): {results["skipped"]}\n'
+                f'Invalid: {results["invalid"]}\n'
+                f'Elapsed: {results["elapsed"]:.1f}s '
+                f'({results["rows_per_second"]:.0f} rows/s)'
+            )
+        )
+
+        if results['invalid']:
+            self.stdout.write(f'Rejected rows written to {importer.error_path}')
+
+        if not options['no_provision'] and results['created']:
+            self.stdout.write(
+                'Virtual accounts are queued; run provision_virtual_accounts '
+                'to create them'
+            )
+
+    def report_progress(self, stats, rows_per_second):
+        self.stdout.write(
+            f"Rows {stats['rows']}: created {stats['created']}, "
+            f"skipped {stats['skipped']}, invalid {stats['invalid']} "
+            f"({rows_per_second:.0f} rows/s)"
+        )
@@ -0,0 +1,110 @@
+"""
+Build queued account statements
+Render pending StatementExport jobs to downloadable files
+"""
+import tempfile
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.db_router import use_replica
+from accounts.models import StatementExport
+from accounts.utils.statements import StatementExporter
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Build pending account statement exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Maximum number of exports to build'
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+
+        pending_ids = list(
+            StatementExport.objects.filter(
+                status='pending'
+            ).order_by('created_at').values_list('id', flat=True)[:limit]
+        )
+
+        self.stdout.write(f'Found {len(pending_ids)} pending exports')
+
+        completed = 0
+        failed = 0
+
+        for export_id in pending_ids:
+            # Claim the job so concurrent runs never build it twice
+            claimed = StatementExport.objects.filter(
+                id=export_id,
+                status='pending'
+            ).update(status='processing')
+
+            if not claimed:
+                continue
+
+            job = StatementExport.objects.select_related(
+                'user', 'user__wallet'
+            ).get(id=export_id)
+
+            try:
+                self.build(job)
+                completed += 1
+
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Built: {job.id} ({job.row_count} rows)'
+                    )
+                )
+
+            except Exception as e:
+                logger.error(f'Statement export error for {job.id}: {e}')
+                job.status = 'failed'
+                job.error_message = str(e)
+                job.save(update_fields=['status', 'error_message'])
+                failed += 1
+
+                self.stdout.write(
+                    self.style.ERROR(f'Error: {job.id} - {str(e)}')
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nStatement exports complete:\n'
+                f'Completed: {completed}\n'
+                f'Failed: {failed}'
+            )
+        )
+
+    def build(self, job):
+        """Stream the statement into a temporary file and attach it"""
+        exporter = StatementExporter(job.user, job.start_date, job.end_date)
+
+        with tempfile.TemporaryFile() as tmp:
+            # Statement reads go to a read replica when one is configured
+            with use_replica():
+                row_count = exporter.get_queryset().count()
+                for chunk in exporter.stream(job.file_format):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    tmp.write(chunk)
+            tmp.seek(0)
+
+            job.file.save(
+                exporter.filename(job.file_format),
+                File(tmp),
+                save=False
+            )
+
+        job.row_count = row_count
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        job.save(update_fields=[
+            'file', 'row_count', 'status', 'completed_at'
+        ])
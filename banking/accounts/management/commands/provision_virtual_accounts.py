@@ -0,0 +1,54 @@
+"""
+Provision Paystack virtual accounts
+Retry pending accounts and backfill users that have none
+"""
+from django.core.management.base import BaseCommand
+from accounts.utils.provisioning import virtual_account_provisioner
+
+
+class Command(BaseCommand):
+    help = 'Provision pending Paystack virtual accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum number of accounts to provision'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First queue accounts for users that have none'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users queued per batch when backfilling'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            queued = 0
+            for count in virtual_account_provisioner.backfill(
+                batch_size=options['batch_size']
+            ):
+                queued += count
+                self.stdout.write(f'Queued {queued} users')
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Backfill queued {queued} virtual accounts')
+            )
+
+        results = virtual_account_provisioner.process_due(
+            limit=options['limit']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nVirtual account provisioning complete:\n'
+                f'Provisioned: {results["provisioned"]}\n'
+                f'Unsuccessful: {results["unsuccessful"]}'
+            )
+        )
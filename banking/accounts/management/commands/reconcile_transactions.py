@@ -5,6 +5,7 @@ Check and update status of pending/failed transactions
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from banking.accounts.db_router import use_replica
 from banking.accounts.models import Transaction, PaymentGateway
 from banking.accounts.utils.moniepoint import MoniepointAPI
 from banking.accounts.utils.payment import PaymentProcessor
@@ -42,14 +43,20 @@ class Command(BaseCommand):
         # Get cutoff time
         cutoff_time = timezone.now() - timedelta(hours=hours)
 
-        # Reconcile transactions
+        # Scan on a read replica, then re-read each row from the primary
+        with use_replica():
+            pending_ids = list(Transaction.objects.filter(
+                status__in=['pending', 'processing'],
+                created_at__gte=cutoff_time
+            ).values_list('id', flat=True))
+
         pending_txns = Transaction.objects.filter(
-            status__in=['pending', 'processing'],
-            created_at__gte=cutoff_time
+            id__in=pending_ids,
+            status__in=['pending', 'processing']
         )
 
         self.stdout.write(
-            f'Found {pending_txns.count()} pending transactions'
+            f'Found {len(pending_ids)} pending transactions'
         )
 
         reconciled = 0
@@ -109,13 +116,19 @@ class Command(BaseCommand):
                 )
 
         # Reconcile payment gateway transactions
+        with use_replica():
+            pending_payment_ids = list(PaymentGateway.objects.filter(
+                status='pending',
+                created_at__gte=cutoff_time
+            ).values_list('id', flat=True))
+
         pending_payments = PaymentGateway.objects.filter(
-            status='pending',
-            created_at__gte=cutoff_time
+            id__in=pending_payment_ids,
+            status='pending'
         )
 
         self.stdout.write(
-            f'Found {pending_payments.count()} pending payments'
+            f'Found {len(pending_payment_ids)} pending payments'
         )
 
         for payment in pending_payments:
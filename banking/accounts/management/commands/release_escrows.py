@@ -0,0 +1,60 @@
+"""
+Release due escrows to sellers
+Auto-release held escrows whose release_at has passed, in batches
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from accounts.utils.escrow_release import escrow_release_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Release held escrows whose auto-release time has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Escrows released per transaction (default: ESCROW_RELEASE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, checking for due escrows every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'ESCROW_RELEASE_INTERVAL', 60),
+            help='Seconds between checks with --loop (default: ESCROW_RELEASE_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = 0
+            for result in escrow_release_scheduler.run(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches']
+            ):
+                released += result['released']
+                self.stdout.write(
+                    f"Released {result['released']} escrows to "
+                    f"{result['sellers']} sellers (₦{result['amount']})"
+                )
+
+            if released or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Escrow auto-release: {released} released')
+                )
+
+            if not options['loop']:
+                return
+
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+"""
+Send escrow notifications to TRINITY
+Retry notifications the background worker could not deliver
+"""
+from django.core.management.base import BaseCommand
+from accounts.utils.escrow_notifications import escrow_notifier
+
+
+class Command(BaseCommand):
+    help = 'Send pending escrow notifications to TRINITY'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum number of notifications to send'
+        )
+
+    def handle(self, *args, **options):
+        results = escrow_notifier.process_due(limit=options['limit'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nEscrow notifications complete:\n'
+                f'Sent: {results["sent"]}\n'
+                f'Unsuccessful: {results["unsuccessful"]}'
+            )
+        )
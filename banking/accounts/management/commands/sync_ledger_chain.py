@@ -0,0 +1,63 @@
+"""
+Sync ledger postings to the core_ledger blockchain
+Drain the ledger outbox, mining one block per batch
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from accounts.utils.ledger_sync import ledger_sync
+
+
+class Command(BaseCommand):
+    help = 'Mirror ledger outbox rows into the core_ledger blockchain'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Outbox rows per block (default: LEDGER_SYNC_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling the outbox every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'LEDGER_SYNC_INTERVAL', 5),
+            help='Seconds between polls with --loop (default: LEDGER_SYNC_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            synced = rejected = 0
+            for result in ledger_sync.sync(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches']
+            ):
+                synced += result['synced']
+                rejected += result['rejected']
+                self.stdout.write(
+                    f"Block {result['block']}: {result['synced']} synced, "
+                    f"{result['rejected']} rejected, "
+                    f"checkpoint {result['last_outbox_id']}"
+                )
+
+            if synced or rejected or not options['loop']:
+                style = self.style.WARNING if rejected else self.style.SUCCESS
+                self.stdout.write(
+                    style(f'Ledger sync: {synced} synced, {rejected} rejected')
+                )
+
+            if not options['loop']:
+                return
+
+            close_old_connections()
+            time.sleep(options['interval'])
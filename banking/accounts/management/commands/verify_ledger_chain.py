@@ -0,0 +1,112 @@
+"""
+Verify the core_ledger blockchain against the ledger
+Check chain integrity (new blocks, or all with --full), then compare
+per-account posting totals with chain balances
+"""
+from django.core.management.base import BaseCommand, CommandError
+from accounts.utils.ledger_sync import ledger_sync
+
+
+class Command(BaseCommand):
+    help = 'Compare synced ledger totals with core_ledger chain balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Accounts compared per chain call (default: 1000)'
+        )
+        parser.add_argument(
+            '--no-sync',
+            action='store_true',
+            help='Compare without first syncing pending outbox rows'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-verify every block instead of only unverified ones'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            help='Worker threads for --full (default: CPU count)'
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=20,
+            help='Mismatched accounts to list (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if not options['no_sync']:
+                # Opening the chain store takes it over from the sync
+                # worker, so catch it up to the outbox first
+                for _ in ledger_sync.sync():
+                    pass
+            chain = ledger_sync.chain
+        except OSError as e:
+            raise CommandError(
+                f'{e}; stop the sync_ledger_chain worker or set '
+                f'LEDGER_CHAIN_PATH to a copy of the store'
+            )
+
+        self.check_integrity(chain, options)
+
+        report = ledger_sync.verify(
+            chunk_size=options['chunk_size'],
+            max_mismatches=options['show']
+        )
+
+        self.stdout.write(
+            f"Accounts: {report['accounts']}\n"
+            f"Ledger total: ₦{report['ledger_total']}\n"
+            f"Chain total: ₦{report['chain_total']}\n"
+            f"Postings rejected by the chain: {report['rejected']}\n"
+            f"Transactions without outbox rows: {report['unrecorded']}"
+        )
+
+        for account_number, ledger, chain in report['mismatches']:
+            self.stdout.write(
+                self.style.ERROR(
+                    f'{account_number}: ledger ₦{ledger}, chain ₦{chain}'
+                )
+            )
+
+        if report['mismatch_count'] or report['unrecorded']:
+            raise CommandError(
+                f"{report['mismatch_count']} accounts differ, "
+                f"{report['unrecorded']} transactions unrecorded"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Ledger and chain agree'))
+
+    def check_integrity(self, chain, options):
+        if options['full']:
+            def progress(checked, total):
+                self.stdout.write(f'Verified {checked}/{total} blocks')
+
+            result = chain.verify_full(
+                threads=options['threads'], progress=progress,
+                progress_interval=5
+            )
+            for segment in result['segments']:
+                self.stdout.write(
+                    f"Blocks {segment['start']}-{segment['end'] - 1}: "
+                    f"{'ok' if segment['valid'] else 'INVALID'} "
+                    f"in {segment['seconds']:.2f}s"
+                )
+        else:
+            result = chain.verify_incremental()
+            self.stdout.write(f"Verified {result['checked']} new blocks")
+
+        if not result['valid']:
+            raise CommandError(
+                f"Chain integrity check failed at block {result['failed_height']}"
+            )
+        self.stdout.write(
+            f"Chain verified to height {result['verified_height']} "
+            f"in {result['seconds']:.2f}s"
+        )
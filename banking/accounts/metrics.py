@@ -0,0 +1,283 @@
+"""
+In-process request metrics
+Histograms and counters per view, exposed in Prometheus text format
+
+Each worker process keeps its own metrics; Prometheus should scrape every
+worker (or sum across them). Collection is off unless METRICS_ENABLED is
+set, in which case InstrumentationMiddleware records per-request wall
+time, DB queries, provider call time and app cache lookups.
+
+App cache lookups cover only the caches that report through
+record_cache_lookup(): API key authentication, account number resolution
+and wallet snapshots. Other cache calls are not counted, so the hit ratio
+is theirs, not the cache backend's.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_enabled = None
+
+
+def metrics_enabled():
+    global _enabled
+    if _enabled is None:
+        _enabled = bool(getattr(settings, 'METRICS_ENABLED', False))
+    return _enabled
+
+
+def _format_labels(labelnames, labelvalues, extra=''):
+    pairs = [
+        '%s="%s"' % (
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in zip(labelnames, labelvalues)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labelvalues=(), amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield (
+                f'{self.name}{_format_labels(self.labelnames, labelvalues)} '
+                f'{value}'
+            )
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets keyed by label values"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labelvalues, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                # [per-bucket counts (last is +Inf), sum, count]
+                entry = self._values[labelvalues] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [
+                (labelvalues, list(counts), total, count)
+                for labelvalues, (counts, total, count) in self._values.items()
+            ]
+        for labelvalues, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float('inf'),), counts
+            ):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                labels = _format_labels(
+                    self.labelnames, labelvalues, f'le="{le}"'
+                )
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class MetricsRegistry:
+    """Request metrics for this process"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'gax_request_duration_seconds',
+            'Request wall time by view',
+            ('view',)
+        )
+        self.requests = Counter(
+            'gax_requests_total',
+            'Requests by view and status code',
+            ('view', 'status')
+        )
+        self.db_queries = Histogram(
+            'gax_db_queries_per_request',
+            'Database queries per request by view',
+            ('view',),
+            buckets=QUERY_COUNT_BUCKETS
+        )
+        self.db_duration = Histogram(
+            'gax_db_duration_seconds',
+            'Database time per request by view',
+            ('view',)
+        )
+        self.provider_duration = Histogram(
+            'gax_provider_duration_seconds',
+            'Outbound provider call time per request by view',
+            ('view',)
+        )
+        self.provider_calls = Histogram(
+            'gax_provider_call_duration_seconds',
+            'Duration of individual provider calls',
+            ('provider',)
+        )
+        self.cache_lookups = Counter(
+            'gax_app_cache_lookups_total',
+            'API key, account resolver and wallet cache lookups by view and result',
+            ('view', 'result')
+        )
+
+    def metrics(self):
+        return [
+            self.request_duration, self.requests, self.db_queries,
+            self.db_duration, self.provider_duration, self.provider_calls,
+            self.cache_lookups,
+        ]
+
+    def record_request(self, view, status_code, duration, stats):
+        labels = (view,)
+        self.request_duration.observe(labels, duration)
+        self.requests.inc((view, status_code))
+        self.db_queries.observe(labels, stats.db_queries)
+        self.db_duration.observe(labels, stats.db_time)
+        if stats.provider_calls:
+            self.provider_duration.observe(labels, stats.provider_time)
+        if stats.cache_hits:
+            self.cache_lookups.inc((view, 'hit'), stats.cache_hits)
+        if stats.cache_misses:
+            self.cache_lookups.inc((view, 'miss'), stats.cache_misses)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """Counters for the request being handled"""
+
+    __slots__ = (
+        'db_queries', 'db_time', 'provider_calls', 'provider_time',
+        'cache_hits', 'cache_misses'
+    )
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.provider_calls = 0
+        self.provider_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+request_stats = ContextVar('request_stats', default=None)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper hook timing each query"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += time.perf_counter() - start
+
+
+def record_cache_lookup(hit):
+    """
+    Count an app cache hit or miss against the current request
+
+    Called by the API key, account resolver and wallet caches only.
+    """
+    stats = request_stats.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def instrument_provider(provider):
+    """Decorator timing outbound calls to an external provider"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics_enabled():
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                registry.provider_calls.observe((provider,), elapsed)
+                stats = request_stats.get()
+                if stats is not None:
+                    stats.provider_calls += 1
+                    stats.provider_time += elapsed
+        return wrapper
+    return decorator
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    if not metrics_enabled():
+        raise Http404
+
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if token and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,34 @@
+"""
+Read replica routing middleware
+Track writes per request and pin writers to the primary database
+"""
+from django.core.exceptions import MiddlewareNotUsed
+from ..db_router import get_replica_aliases, pin_to_primary, request_routing
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Give each request its own routing state
+
+    After a request that wrote (or used an unsafe method) the user is
+    pinned to the primary for REPLICA_PIN_SECONDS, so their next reads
+    see their own writes even if the replicas lag.
+    """
+
+    def __init__(self, get_response):
+        if not get_replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_routing(request) as state:
+            response = self.get_response(request)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            user_id = state.get_user_id()
+            if user_id is not None:
+                pin_to_primary(user_id)
+
+        return response
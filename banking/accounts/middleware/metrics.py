@@ -0,0 +1,56 @@
+"""
+Request instrumentation middleware
+Records wall time, DB queries, provider calls and cache lookups per view
+"""
+import time
+from contextlib import ExitStack
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from ..metrics import (
+    RequestStats, db_execute_wrapper, metrics_enabled, registry,
+    request_stats
+)
+
+
+class InstrumentationMiddleware:
+    """
+    Collect per-request metrics into the in-process registry
+
+    Removed from the middleware chain entirely unless METRICS_ENABLED is
+    set. Should be placed first so timings cover the other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(db_execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+
+        registry.record_request(
+            self.get_view_label(request),
+            response.status_code,
+            time.perf_counter() - start,
+            stats
+        )
+        return response
+
+    @staticmethod
+    def get_view_label(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return 'unmatched'
+        return resolver_match.view_name or resolver_match._func_path
@@ -0,0 +1,82 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:00
+
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+LEGACY_PREFIX_LENGTH = 20
+
+
+def hash_key(key_secret):
+    """HMAC-SHA256 of a key secret with API_KEY_PEPPER (frozen copy of the runtime hash)"""
+    return hmac.new(
+        settings.API_KEY_PEPPER.encode("utf-8"),
+        key_secret.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def hash_existing_keys(apps, schema_editor):
+    """
+    Move plaintext keys to prefix + HMAC in batches
+
+    Legacy keys keep working: their first LEGACY_PREFIX_LENGTH characters
+    become the lookup prefix and the whole key is hashed as the secret.
+    """
+    APIKey = apps.get_model("accounts", "APIKey")
+    db_alias = schema_editor.connection.alias
+
+    batch = []
+    for api_key in (
+        APIKey.objects.using(db_alias)
+        .only("id", "key")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        api_key.prefix = api_key.key[:LEGACY_PREFIX_LENGTH]
+        api_key.key_hash = hash_key(api_key.key)
+        batch.append(api_key)
+
+        if len(batch) >= BATCH_SIZE:
+            APIKey.objects.using(db_alias).bulk_update(
+                batch, ["prefix", "key_hash"]
+            )
+            batch = []
+
+    if batch:
+        APIKey.objects.using(db_alias).bulk_update(batch, ["prefix", "key_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_statement_exports"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apikey",
+            name="prefix",
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="apikey",
+            name="key_hash",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        # Plaintext keys cannot be restored, so this step is irreversible
+        migrations.RunPython(hash_existing_keys),
+        migrations.AlterField(
+            model_name="apikey",
+            name="prefix",
+            field=models.CharField(editable=False, max_length=32, unique=True),
+        ),
+        migrations.RemoveField(
+            model_name="apikey",
+            name="key",
+        ),
+    ]
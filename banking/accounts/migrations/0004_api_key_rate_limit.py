@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_hashed_api_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='rate_limit',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
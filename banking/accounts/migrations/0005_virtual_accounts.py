@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:19
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_api_key_rate_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VirtualAccount',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('provider', models.CharField(choices=[('paystack', 'Paystack')], default='paystack', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('active', 'Active'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('account_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('account_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('bank_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('bank_slug', models.CharField(blank=True, max_length=50, null=True)),
+                ('provider_customer_code', models.CharField(blank=True, max_length=100, null=True)),
+                ('provider_response', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provisioned_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='virtual_accounts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'virtual_accounts',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='virtual_acc_status_4cb754_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='virtualaccount',
+            constraint=models.UniqueConstraint(fields=('user', 'provider'), name='unique_virtual_account_per_provider'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:25
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_virtual_accounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountNumberBlock',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('start', models.BigIntegerField(unique=True)),
+                ('size', models.PositiveIntegerField()),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'account_number_blocks',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_account_number_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_outbox_id', models.BigIntegerField(default=0)),
+                ('chain_length', models.PositiveIntegerField(default=0)),
+                ('synced_count', models.BigIntegerField(default=0)),
+                ('rejected_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ledger_sync_checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('account_number', models.CharField(db_index=True, max_length=10)),
+                ('entry_type', models.CharField(choices=[('credit', 'Credit'), ('debit', 'Debit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('rejected', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='accounts.transaction')),
+            ],
+            options={
+                'db_table': 'ledger_outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:05
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_ledger_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('transfer', 'Transfer'), ('payment', 'Payment'), ('refund', 'Refund'), ('bill_payment', 'Bill Payment'), ('airtime', 'Airtime'), ('data', 'Data'), ('tv', 'TV Subscription'), ('electricity', 'Electricity'), ('purchase', 'Purchase'), ('escrow_release', 'Escrow Release'), ('premium_activation', 'Premium Activation')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='EscrowAccount',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('product_id', models.CharField(max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('status', models.CharField(choices=[('held', 'Held'), ('disputed', 'Disputed'), ('released', 'Released'), ('refunded', 'Refunded')], default='held', max_length=20)),
+                ('external_id', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('settled_at', models.DateTimeField(blank=True, null=True)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='escrow_purchases', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='escrow_sales', to=settings.AUTH_USER_MODEL)),
+                ('settlement_transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='escrow_settlement', to='accounts.transaction')),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='escrow_account', to='accounts.transaction')),
+            ],
+            options={
+                'db_table': 'escrow_accounts',
+            },
+        ),
+        migrations.CreateModel(
+            name='EscrowNotification',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event', models.CharField(choices=[('created', 'Created')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('escrow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='accounts.escrowaccount')),
+            ],
+            options={
+                'db_table': 'escrow_notifications',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='escrowaccount',
+            index=models.Index(fields=['status', 'created_at'], name='escrow_acco_status_a91c41_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='escrownotification',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='escrow_noti_status_085ced_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:07
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_held_escrows(apps, schema_editor):
+    """Give escrows that are still held the default auto-release time"""
+    EscrowAccount = apps.get_model("accounts", "EscrowAccount")
+    hours = getattr(settings, "DEFAULT_ESCROW_AUTO_RELEASE_HOURS", 72)
+
+    EscrowAccount.objects.using(schema_editor.connection.alias).filter(
+        status="held", release_at__isnull=True
+    ).update(release_at=F("created_at") + timedelta(hours=hours))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_escrow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escrowaccount',
+            name='release_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='escrowaccount',
+            index=models.Index(fields=['status', 'release_at'], name='escrow_acco_status_2b9483_idx'),
+        ),
+        migrations.RunPython(schedule_held_escrows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_escrow_release_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeRule',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('fee_type', models.CharField(choices=[('transfer', 'Transfer'), ('withdrawal', 'Withdrawal'), ('payment', 'Payment Gateway'), ('airtime', 'Airtime'), ('data', 'Data'), ('tv', 'TV Subscription'), ('electricity', 'Electricity')], max_length=20)),
+                ('user_type', models.CharField(blank=True, choices=[('user', 'User'), ('merchant', 'Merchant'), ('admin', 'Admin')], max_length=20, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('flat_fee', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('percentage', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=6)),
+                ('min_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'fee_rules',
+                'ordering': ['fee_type', 'max_amount'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feerule',
+            constraint=models.CheckConstraint(check=models.Q(('user__isnull', True), ('user_type__isnull', True), _connector='OR'), name='fee_rule_single_scope'),
+        ),
+    ]
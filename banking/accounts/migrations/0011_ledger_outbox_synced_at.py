@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:23
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_synced_rows(apps, schema_editor):
+    """Rows up to the old checkpoint are already on the chain"""
+    LedgerOutbox = apps.get_model('accounts', 'LedgerOutbox')
+    LedgerSyncCheckpoint = apps.get_model('accounts', 'LedgerSyncCheckpoint')
+    db_alias = schema_editor.connection.alias
+
+    checkpoint = LedgerSyncCheckpoint.objects.using(db_alias).filter(
+        name='core_ledger'
+    ).first()
+    if checkpoint is not None and checkpoint.last_outbox_id:
+        LedgerOutbox.objects.using(db_alias).filter(
+            id__lte=checkpoint.last_outbox_id
+        ).update(synced_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_fee_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgeroutbox',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ledgeroutbox',
+            index=models.Index(fields=['synced_at', 'id'], name='ledger_outb_synced__278714_idx'),
+        ),
+        migrations.RunPython(mark_synced_rows, migrations.RunPython.noop),
+    ]
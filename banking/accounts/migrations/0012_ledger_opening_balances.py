@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_ledger_outbox_synced_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgeroutbox',
+            name='entry_type',
+            field=models.CharField(choices=[('credit', 'Credit'), ('debit', 'Debit'), ('opening', 'Opening balance')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='ledgeroutbox',
+            name='transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='accounts.transaction'),
+        ),
+    ]
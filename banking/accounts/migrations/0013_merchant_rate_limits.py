@@ -0,0 +1,54 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_rate_limits(apps, schema_editor):
+    """
+    Copy MERCHANT_THROTTLE_RATES (by username) onto the merchants and
+    clear API key rates that would not parse
+    """
+    User = apps.get_model('accounts', 'User')
+    APIKey = apps.get_model('accounts', 'APIKey')
+    db_alias = schema_editor.connection.alias
+
+    # Same format as accounts.throttling.validate_rate, kept inline so the
+    # migration does not depend on application code
+    def is_valid(rate):
+        try:
+            num, period = rate.split('/')
+            return int(num) > 0 and period[0] in 'smhd'
+        except (AttributeError, IndexError, ValueError):
+            return False
+
+    for username, rate in getattr(settings, 'MERCHANT_THROTTLE_RATES', {}).items():
+        if is_valid(rate):
+            User.objects.using(db_alias).filter(username=username).update(
+                api_rate_limit=rate
+            )
+
+    invalid = [
+        key_id
+        for key_id, rate in APIKey.objects.using(db_alias)
+        .exclude(rate_limit__isnull=True).exclude(rate_limit='')
+        .values_list('id', 'rate_limit')
+        if not is_valid(rate)
+    ]
+    APIKey.objects.using(db_alias).filter(id__in=invalid).update(rate_limit=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_ledger_opening_balances'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='api_rate_limit',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(move_rate_limits, migrations.RunPython.noop),
+    ]
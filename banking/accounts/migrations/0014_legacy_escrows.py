@@ -0,0 +1,72 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:10
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_legacy_escrows(apps, schema_editor):
+    """
+    Give purchases escrowed before EscrowAccount existed a held account
+
+    Those purchases were stored with status 'escrowed' and the TRINITY id
+    in metadata['escrow_id']; without an account the release webhook
+    cannot find them and the auto-release scheduler never sees them.
+    """
+    EscrowAccount = apps.get_model('accounts', 'EscrowAccount')
+    Transaction = apps.get_model('accounts', 'Transaction')
+    User = apps.get_model('accounts', 'User')
+    db_alias = schema_editor.connection.alias
+    hours = getattr(settings, 'DEFAULT_ESCROW_AUTO_RELEASE_HOURS', 72)
+
+    purchases = Transaction.objects.using(db_alias).filter(
+        transaction_type='purchase',
+        status='escrowed',
+        escrow_account__isnull=True
+    ).order_by('pk')
+
+    legacy = []
+    for purchase in purchases.iterator(chunk_size=1000):
+        metadata = purchase.metadata or {}
+        if not metadata.get('escrow_id'):
+            continue
+        try:
+            seller_id = uuid.UUID(str(metadata.get('seller_id')))
+        except ValueError:
+            continue
+        legacy.append((purchase, seller_id))
+
+    sellers = set(User.objects.using(db_alias).filter(
+        pk__in={seller_id for _, seller_id in legacy}
+    ).values_list('pk', flat=True))
+
+    escrows = [
+        EscrowAccount(
+            buyer_id=purchase.user_id,
+            seller_id=seller_id,
+            product_id=str(purchase.metadata.get('product_id') or ''),
+            amount=purchase.amount,
+            balance=purchase.amount,
+            status='held',
+            transaction_id=purchase.pk,
+            external_id=str(purchase.metadata['escrow_id']),
+            release_at=purchase.created_at + timedelta(hours=hours)
+        )
+        for purchase, seller_id in legacy
+        if seller_id in sellers
+    ]
+
+    EscrowAccount.objects.using(db_alias).bulk_create(escrows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_merchant_rate_limits'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_legacy_escrows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_legacy_escrows'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='escrownotification',
+            name='event',
+            field=models.CharField(choices=[('created', 'Created'), ('released', 'Released'), ('refunded', 'Refunded'), ('disputed', 'Disputed')], max_length=20),
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.core.validators import MinValueValidator
 from decimal import Decimal
 import uuid
 import secrets
+from .utils.signature import SignatureVerifier
 
 # Custom user model
 class User(AbstractUser):
@@ -23,6 +24,8 @@ class User(AbstractUser):
     email_verified = models.BooleanField(default=False)
     phone_verified = models.BooleanField(default=False)
     transaction_pin = models.CharField(max_length=255, blank=True, null=True)  # Hashed
+    # Overrides the merchant throttle rate for all of a merchant's keys
+    api_rate_limit = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -85,10 +88,21 @@ class Wallet(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.account_number:
-            # Generate 10-digit account number
-            self.account_number = '20' + str(uuid.uuid4().int)[:8]
+            self.account_number = self.generate_account_number()
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def generate_account_number():
+        """Allocate a 10-digit NUBAN account number"""
+        from .utils.account_numbers import account_number_allocator
+        return account_number_allocator.allocate_one()
+
+    @classmethod
+    def generate_account_numbers(cls, count):
+        """Allocate count account numbers for bulk onboarding"""
+        from .utils.account_numbers import account_number_allocator
+        return account_number_allocator.allocate(count)
+
     def __str__(self):
         return f"{self.user.username} - {self.account_number} - ₦{self.balance}"
 
@@ -96,6 +110,77 @@ class Wallet(models.Model):
         db_table = 'wallets'
 
 
+# AccountNumberBlock model - Ranges of account number serials reserved by workers
+class AccountNumberBlock(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    start = models.BigIntegerField(unique=True)
+    size = models.PositiveIntegerField()
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def end(self):
+        return self.start + self.size
+
+    def __str__(self):
+        return f"{self.start} - {self.end - 1}"
+
+    class Meta:
+        db_table = 'account_number_blocks'
+
+
+# VirtualAccount model - Provider accounts used to fund wallets
+class VirtualAccount(models.Model):
+    """
+    Dedicated account provisioned at a payment provider
+
+    Rows are created as 'pending' and provisioned in the background;
+    next_attempt_at doubles as a lease so a crashed worker's claim
+    expires and the row is retried.
+    """
+    PROVIDER_CHOICES = (
+        ('paystack', 'Paystack'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('active', 'Active'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='virtual_accounts')
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES, default='paystack')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    account_number = models.CharField(max_length=20, blank=True, null=True)
+    account_name = models.CharField(max_length=255, blank=True, null=True)
+    bank_name = models.CharField(max_length=100, blank=True, null=True)
+    bank_slug = models.CharField(max_length=50, blank=True, null=True)
+    provider_customer_code = models.CharField(max_length=100, blank=True, null=True)
+    provider_response = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    provisioned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.provider} - {self.status}"
+
+    class Meta:
+        db_table = 'virtual_accounts'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'provider'],
+                name='unique_virtual_account_per_provider'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
 # BankAccount model - For linking external bank accounts
 class BankAccount(models.Model):
     ACCOUNT_TYPES = (
@@ -136,6 +221,9 @@ class Transaction(models.Model):
         ('data', 'Data'),
         ('tv', 'TV Subscription'),
         ('electricity', 'Electricity'),
+        ('purchase', 'Purchase'),
+        ('escrow_release', 'Escrow Release'),
+        ('premium_activation', 'Premium Activation'),
     )
     
     STATUS_CHOICES = (
@@ -172,11 +260,15 @@ class Transaction(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = f"TXN-{uuid.uuid4().hex[:16].upper()}"
+            self.reference = self.generate_reference()
         if not self.total_amount:
             self.total_amount = self.amount + self.fee
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def generate_reference():
+        return f"TXN-{uuid.uuid4().hex[:16].upper()}"
+
     def __str__(self):
         return f"{self.reference} - {self.transaction_type.title()} - ₦{self.amount}"
 
@@ -187,6 +279,7 @@ class Transaction(models.Model):
             models.Index(fields=['reference']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
         ]
 
 
@@ -306,9 +399,17 @@ class APIKey(models.Model):
         ('live', 'Live'),
     )
 
+    # Keys look like "sk_live_3f9a2b7c1d4e.<secret>": an indexed public
+    # prefix and a secret stored only as an HMAC-SHA256 digest
+    SEPARATOR = '.'
+    PREFIX_TOKEN_BYTES = 6
+    # Legacy "sk_test_<token>" keys use their first characters as prefix
+    LEGACY_PREFIX_LENGTH = 20
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_keys')
-    key = models.CharField(max_length=255, unique=True, editable=False, db_index=True)
+    prefix = models.CharField(max_length=32, unique=True, editable=False)
+    key_hash = models.CharField(max_length=64, editable=False)
     secret = models.CharField(max_length=255, editable=False)
     environment = models.CharField(max_length=10, choices=ENVIRONMENT_CHOICES, default='test')
     is_active = models.BooleanField(default=True)
@@ -316,17 +417,35 @@ class APIKey(models.Model):
     last_used_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
+    # Overrides the default API key throttle rate, e.g. "5000/min"
+    rate_limit = models.CharField(max_length=20, blank=True, null=True)
 
     def save(self, *args, **kwargs):
-        if not self.key:
+        if not self.prefix:
             env_prefix = 'sk_test' if self.environment == 'test' else 'sk_live'
-            self.key = f"{env_prefix}_{secrets.token_urlsafe(32)}"
+            self.prefix = f"{env_prefix}_{secrets.token_hex(self.PREFIX_TOKEN_BYTES)}"
+            key_secret = secrets.token_urlsafe(32)
+            self.key_hash = SignatureVerifier.hash_api_key(key_secret)
+            # Plaintext key is only available on the instance that created it
+            self.raw_key = f"{self.prefix}{self.SEPARATOR}{key_secret}"
         if not self.secret:
             self.secret = secrets.token_urlsafe(48)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def split_key(cls, raw_key):
+        """
+        Split a presented key into (prefix, secret)
+
+        Legacy keys have no separator; the whole key is the secret.
+        """
+        prefix, separator, key_secret = raw_key.partition(cls.SEPARATOR)
+        if separator:
+            return prefix, key_secret
+        return raw_key[:cls.LEGACY_PREFIX_LENGTH], raw_key
+
     def __str__(self):
-        return f"{self.user.username} - {self.key[:20]}..."
+        return f"{self.user.username} - {self.prefix}..."
 
     class Meta:
         db_table = 'api_keys'
@@ -402,3 +521,235 @@ class KYC(models.Model):
 
     class Meta:
         db_table = 'kyc'
+
+
+# StatementExport model - Background account statement jobs
+class StatementExport(models.Model):
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('parquet', 'Parquet'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statement_exports')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='statements/', blank=True, null=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.file_format} statement - {self.status}"
+
+    class Meta:
+        db_table = 'statement_exports'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+
+# LedgerOutbox model - Wallet postings waiting to be mirrored to core_ledger
+class LedgerOutbox(models.Model):
+    ENTRY_TYPES = (
+        ('credit', 'Credit'),
+        ('debit', 'Debit'),
+        ('opening', 'Opening balance'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    # Empty for opening balances, which predate the outbox
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, null=True, blank=True, related_name='ledger_entries')
+    account_number = models.CharField(max_length=10, db_index=True)
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    rejected = models.BooleanField(default=False)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.entry_type} {self.account_number} - ₦{self.amount}"
+
+    class Meta:
+        db_table = 'ledger_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['synced_at', 'id']),
+        ]
+
+
+# LedgerSyncCheckpoint model - Progress of the core_ledger sync
+class LedgerSyncCheckpoint(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_outbox_id = models.BigIntegerField(default=0)
+    chain_length = models.PositiveIntegerField(default=0)
+    synced_count = models.BigIntegerField(default=0)
+    rejected_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_outbox_id}"
+
+    class Meta:
+        db_table = 'ledger_sync_checkpoints'
+
+
+# EscrowAccount model - Buyer funds held locally for one marketplace purchase
+class EscrowAccount(models.Model):
+    """
+    Internal escrow account for a purchase
+
+    The buyer's wallet is debited into the account when the purchase is
+    made; release credits the seller and refund credits the buyer from
+    the held balance. Status changes follow TRANSITIONS. Held escrows
+    are released automatically once release_at passes.
+    """
+    STATUS_CHOICES = (
+        ('held', 'Held'),
+        ('disputed', 'Disputed'),
+        ('released', 'Released'),
+        ('refunded', 'Refunded'),
+    )
+
+    TRANSITIONS = {
+        'held': ('disputed', 'released', 'refunded'),
+        'disputed': ('released', 'refunded'),
+        'released': (),
+        'refunded': (),
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    buyer = models.ForeignKey(User, on_delete=models.PROTECT, related_name='escrow_purchases')
+    seller = models.ForeignKey(User, on_delete=models.PROTECT, related_name='escrow_sales')
+    product_id = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    transaction = models.OneToOneField(Transaction, on_delete=models.PROTECT, related_name='escrow_account')
+    settlement_transaction = models.OneToOneField(
+        Transaction, on_delete=models.PROTECT, null=True, blank=True,
+        related_name='escrow_settlement'
+    )
+    external_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    release_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
+    def can_transition(self, status):
+        return status in self.TRANSITIONS[self.status]
+
+    def __str__(self):
+        return f"Escrow {self.id} - {self.status} - ₦{self.balance}"
+
+    class Meta:
+        db_table = 'escrow_accounts'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'release_at']),
+        ]
+
+
+# EscrowNotification model - Escrow events waiting to be sent to TRINITY
+class EscrowNotification(models.Model):
+    """
+    Outbox row for the external escrow service
+
+    Written in the same database transaction as the escrow change and
+    delivered afterwards; next_attempt_at doubles as a delivery lease.
+    """
+    EVENT_CHOICES = (
+        ('created', 'Created'),
+        ('released', 'Released'),
+        ('refunded', 'Refunded'),
+        ('disputed', 'Disputed'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    escrow = models.ForeignKey(EscrowAccount, on_delete=models.CASCADE, related_name='notifications')
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    response = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event} {self.escrow_id} - {self.status}"
+
+    class Meta:
+        db_table = 'escrow_notifications'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
+# FeeRule model - One tier of a fee schedule, compiled in memory by utils.fees
+class FeeRule(models.Model):
+    """
+    Fee tier for a transaction type
+
+    The active rules sharing a fee_type and scope (a user, a user type,
+    or neither for the default) form a rule set; each rule covers amounts
+    up to max_amount (no limit if empty) above the previous tier. The fee
+    is flat_fee plus percentage of the amount, kept between min_fee and
+    max_fee.
+    """
+    FEE_TYPES = (
+        ('transfer', 'Transfer'),
+        ('withdrawal', 'Withdrawal'),
+        ('payment', 'Payment Gateway'),
+        ('airtime', 'Airtime'),
+        ('data', 'Data'),
+        ('tv', 'TV Subscription'),
+        ('electricity', 'Electricity'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    fee_type = models.CharField(max_length=20, choices=FEE_TYPES)
+    user_type = models.CharField(max_length=20, choices=User.USER_TYPES, blank=True, null=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='fee_rules', null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    flat_fee = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    percentage = models.DecimalField(max_digits=6, decimal_places=3, default=Decimal('0.000'))
+    min_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        scope = self.user_id or self.user_type or 'default'
+        return f"{self.fee_type} ({scope}) up to {self.max_amount or '∞'}"
+
+    class Meta:
+        db_table = 'fee_rules'
+        ordering = ['fee_type', 'max_amount']
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(user__isnull=True) | models.Q(user_type__isnull=True),
+                name='fee_rule_single_scope'
+            ),
+        ]
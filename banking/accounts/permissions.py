@@ -2,8 +2,7 @@
 Custom permissions for the banking application
 """
 from rest_framework import permissions
-from .models import APIKey
-from django.utils import timezone
+from .authentication import CachedAPIKey
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -47,32 +46,9 @@ class IsAdmin(permissions.BasePermission):
 class IsAPIKeyAuthenticated(permissions.BasePermission):
     """
     Permission to check if request has valid API key
+
+    Use together with APIKeyAuthentication, which verifies the key.
     """
 
     def has_permission(self, request, view):
-        api_key = request.headers.get('X-API-Key', '')
-
-        if not api_key:
-            return False
-
-        try:
-            key_obj = APIKey.objects.get(
-                key=api_key,
-                is_active=True
-            )
-
-            # Check expiry
-            if key_obj.expires_at and key_obj.expires_at < timezone.now():
-                return False
-
-            # Update last used
-            key_obj.last_used_at = timezone.now()
-            key_obj.save(update_fields=['last_used_at'])
-
-            # Attach user to request
-            request.user = key_obj.user
-
-            return True
-
-        except APIKey.DoesNotExist:
-            return False
+        return isinstance(request.auth, CachedAPIKey)
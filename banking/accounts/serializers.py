@@ -1,11 +1,16 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth.hashers import make_password
-from django.db import transaction
+from django.db import models, transaction
+from django.utils import timezone
 from decimal import Decimal
 from .models import (
     User, Profile, Wallet, BankAccount, Transaction,
-    BillPayment, PaymentGateway, APIKey, WebhookLog, KYC
+    BillPayment, PaymentGateway, APIKey, WebhookLog, KYC,
+    StatementExport, FeeRule
 )
+from .throttling import validate_rate
+from .utils.resolver import account_resolver
 import re
 
 
@@ -131,6 +136,121 @@ class TransactionSerializer(serializers.ModelSerializer):
         ]
 
 
+class FastTransactionSerializer:
+    """
+    Read-only fast path for transaction list endpoints
+
+    Produces the same output as TransactionSerializer, but from
+    values_list() tuples with one precompiled converter per field instead
+    of DRF's field-by-field serialization of model instances.
+
+    Usage:
+        rows = FastTransactionSerializer.get_values(queryset)
+        data = FastTransactionSerializer(rows).data
+    """
+    fields = TransactionSerializer.Meta.fields
+    sources = {'username': 'user__username'}
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def get_values(cls, queryset):
+        """Restrict a Transaction queryset to the serialized columns"""
+        return queryset.values_list(
+            *[cls.sources.get(field, field) for field in cls.fields]
+        )
+
+    @classmethod
+    def compile_converters(cls):
+        """List of (column index, converter) for non-JSON-native columns"""
+        tz = timezone.get_current_timezone()
+        coerce_decimal = api_settings.COERCE_DECIMAL_TO_STRING
+
+        def convert_datetime(value):
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        converters = []
+        for index, field in enumerate(cls.fields):
+            model_field = cls._get_model_field(cls.sources.get(field, field))
+
+            if isinstance(model_field, models.UUIDField):
+                converters.append((index, str))
+            elif isinstance(model_field, models.DecimalField):
+                places = Decimal(1).scaleb(-model_field.decimal_places)
+                if coerce_decimal:
+                    converters.append(
+                        (index, lambda value, q=places: '{:f}'.format(value.quantize(q)))
+                    )
+                else:
+                    converters.append(
+                        (index, lambda value, q=places: value.quantize(q))
+                    )
+            elif isinstance(model_field, models.DateTimeField):
+                converters.append((index, convert_datetime))
+
+        return converters
+
+    @staticmethod
+    def _get_model_field(source):
+        model = Transaction
+        *relations, name = source.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    @property
+    def data(self):
+        fields = self.fields
+        converters = self.compile_converters()
+        data = []
+
+        for row in self.rows:
+            row = list(row)
+            for index, convert in converters:
+                value = row[index]
+                if value is not None:
+                    row[index] = convert(value)
+            data.append(dict(zip(fields, row)))
+
+        return data
+
+
+class StatementExportRequestSerializer(serializers.Serializer):
+    """Statement export request serializer"""
+    file_format = serializers.ChoiceField(
+        choices=['csv', 'parquet'],
+        default='csv'
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        """Validate date range"""
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({
+                "start_date": "Start date must be before end date"
+            })
+        return attrs
+
+
+class StatementExportSerializer(serializers.ModelSerializer):
+    """Statement export job serializer"""
+
+    class Meta:
+        model = StatementExport
+        fields = [
+            'id', 'file_format', 'start_date', 'end_date', 'status',
+            'row_count', 'error_message', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
 class DepositSerializer(serializers.Serializer):
     """Deposit serializer"""
     amount = serializers.DecimalField(
@@ -191,14 +311,55 @@ class TransferSerializer(serializers.Serializer):
         return value
 
     def validate_recipient_account(self, value):
-        """Validate account number"""
+        """Validate account number and resolve the recipient"""
         if not re.match(r'^\d{10}$', value):
             raise serializers.ValidationError(
                 "Account number must be 10 digits"
             )
+
+        recipient = account_resolver.resolve(value)
+        if recipient is None or not recipient.is_active:
+            raise serializers.ValidationError("Recipient account not found")
         return value
 
 
+class NameEnquirySerializer(serializers.Serializer):
+    """Name enquiry for one account number or a batch"""
+    MAX_BATCH_SIZE = 50
+
+    account_number = serializers.RegexField(
+        r'^\d{10}$',
+        required=False,
+        error_messages={'invalid': 'Account number must be 10 digits'}
+    )
+    account_numbers = serializers.ListField(
+        child=serializers.RegexField(
+            r'^\d{10}$',
+            error_messages={'invalid': 'Account number must be 10 digits'}
+        ),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+
+    def validate(self, attrs):
+        if not attrs.get('account_number') and not attrs.get('account_numbers'):
+            raise serializers.ValidationError(
+                "Provide account_number or account_numbers"
+            )
+        return attrs
+
+
+class FeeQuoteSerializer(serializers.Serializer):
+    """Fee quote for an amount before posting"""
+    type = serializers.ChoiceField(choices=FeeRule.FEE_TYPES)
+    amount = serializers.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        min_value=Decimal('0.01')
+    )
+
+
 class BillPaymentSerializer(serializers.ModelSerializer):
     """Bill payment serializer"""
     username = serializers.CharField(source='user.username', read_only=True)
@@ -340,15 +501,51 @@ class VerifyPaymentSerializer(serializers.Serializer):
 
 class APIKeySerializer(serializers.ModelSerializer):
     """API key serializer"""
+    key = serializers.SerializerMethodField()
     secret = serializers.CharField(read_only=True)
 
     class Meta:
         model = APIKey
         fields = [
-            'id', 'key', 'secret', 'environment', 'is_active',
-            'name', 'created_at', 'expires_at'
+            'id', 'key', 'prefix', 'secret', 'environment', 'is_active',
+            'name', 'rate_limit', 'last_used_at', 'created_at', 'expires_at'
         ]
-        read_only_fields = ['id', 'key', 'secret', 'created_at']
+        read_only_fields = [
+            'id', 'prefix', 'secret', 'rate_limit', 'last_used_at',
+            'created_at'
+        ]
+
+    def get_key(self, obj):
+        """Full key, only returned in the response that creates it"""
+        return getattr(obj, 'raw_key', None)
+
+
+class AdminAPIKeySerializer(serializers.ModelSerializer):
+    """API key as seen by admins (no secret)"""
+
+    class Meta:
+        model = APIKey
+        fields = [
+            'id', 'user', 'prefix', 'environment', 'is_active', 'name',
+            'rate_limit', 'last_used_at', 'created_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+
+class RateLimitSerializer(serializers.Serializer):
+    """Set or clear (null) a merchant or API key throttle rate"""
+    rate_limit = serializers.CharField(
+        max_length=20, allow_null=True, allow_blank=True
+    )
+
+    def validate_rate_limit(self, value):
+        if not value:
+            return None
+        try:
+            validate_rate(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
 
 
 class WebhookLogSerializer(serializers.ModelSerializer):
@@ -409,3 +606,64 @@ class SetTransactionPINSerializer(serializers.Serializer):
                 "pin": "PINs do not match"
             })
         return attrs
+
+
+class FeeRuleSerializer(serializers.ModelSerializer):
+    """Fee rule serializer"""
+
+    class Meta:
+        model = FeeRule
+        fields = [
+            'id', 'fee_type', 'user_type', 'user', 'max_amount', 'flat_fee',
+            'percentage', 'min_fee', 'max_fee', 'is_active', 'description',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        """A rule applies to a user or a user type, not both"""
+        user = attrs.get('user', getattr(self.instance, 'user', None))
+        user_type = attrs.get('user_type', getattr(self.instance, 'user_type', None))
+        if user and user_type:
+            raise serializers.ValidationError(
+                "Set user or user_type, not both"
+            )
+
+        min_fee = attrs.get('min_fee', getattr(self.instance, 'min_fee', None))
+        max_fee = attrs.get('max_fee', getattr(self.instance, 'max_fee', None))
+        if min_fee is not None and max_fee is not None and min_fee > max_fee:
+            raise serializers.ValidationError({
+                "min_fee": "min_fee cannot exceed max_fee"
+            })
+        return attrs
+
+
+class BulkWithdrawalActionSerializer(serializers.Serializer):
+    """Bulk withdrawal approval/rejection by ids or by the list filters"""
+    MAX_BATCH_SIZE = 500
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+    all_matching = serializers.BooleanField(required=False, default=False)
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_BATCH_SIZE,
+        default=MAX_BATCH_SIZE
+    )
+    reason = serializers.CharField(
+        max_length=255,
+        required=False,
+        default='Rejected by admin'
+    )
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('all_matching'):
+            raise serializers.ValidationError(
+                "Provide ids or set all_matching"
+            )
+        return attrs
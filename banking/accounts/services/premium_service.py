@@ -4,10 +4,9 @@ Handles seller premium activation payments
 """
 
 from django.db import transaction
-from django.utils import timezone
 from decimal import Decimal
 from accounts.models import User, Transaction as TransactionModel
-import uuid
+from accounts.utils.payment import PaymentProcessor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,10 +29,9 @@ class PremiumService:
         Process:
         1. Validate user exists and doesn't have premium
         2. Check wallet balance
-        3. Deduct premium fee from wallet
+        3. Deduct premium fee from wallet and create transaction record
+           (PaymentProcessor.debit_wallet, which queues the blockchain sync)
         4. Update user profile (is_seller_premium=True)
-        5. Create transaction record
-        6. Sync to blockchain (via webhook/signal)
         
         Returns:
             {
@@ -62,24 +60,13 @@ class PremiumService:
                     'message': f'Insufficient balance. Required: ₦{self.premium_fee}, Available: ₦{wallet.balance}'
                 }
             
-            # Deduct from wallet
-            wallet.balance -= self.premium_fee
-            wallet.save(update_fields=['balance'])
-            
-            # Update user type
-            user.user_type = 'merchant'  # Seller premium
-            user.save(update_fields=['user_type'])
-            
-            # Create transaction record
-            tx_reference = f'PREM-{timezone.now().strftime("%Y%m%d")}-{uuid.uuid4().hex[:6].upper()}'
-            tx = TransactionModel.objects.create(
-                user=user,
-                transaction_type='premium_activation',
+            # Deduct from wallet and create transaction record
+            tx = PaymentProcessor.debit_wallet(
+                wallet=wallet,
                 amount=self.premium_fee,
-                currency='NGN',
-                status='completed',
-                reference=tx_reference,
+                fee=Decimal('0.00'),
                 description='Seller Premium Activation (One-time fee)',
+                transaction_type='premium_activation',
                 metadata={
                     'user_id': str(user_id),
                     'premium_type': 'seller',
@@ -87,12 +74,16 @@ class PremiumService:
                 }
             )
             
+            # Update user type
+            user.user_type = 'merchant'  # Seller premium
+            user.save(update_fields=['user_type'])
+            
             logger.info(f'Premium activated for user {user_id}, tx: {tx.id}')
             
             return {
                 'success': True,
                 'transaction_id': str(tx.id),
-                'reference': tx_reference,
+                'reference': tx.reference,
                 'message': 'Seller Premium activated successfully'
             }
             
@@ -5,11 +5,14 @@ Handles product purchases with escrow integration
 
 from django.db import transaction
 from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
-from accounts.models import User, Wallet, Transaction as TransactionModel
+from accounts.models import EscrowAccount, Wallet
+from accounts.utils.escrow_notifications import escrow_notifier
+from accounts.utils.payment import PaymentProcessor
 import uuid
 import logging
-import requests
 
 logger = logging.getLogger(__name__)
 
@@ -17,61 +20,49 @@ logger = logging.getLogger(__name__)
 class PurchaseService:
     """
     Service for handling product purchases
-    Integrates with TRINITY escrow system
+
+    Escrowed purchases move the buyer's funds into a local EscrowAccount
+    in one short database transaction; the TRINITY escrow system is told
+    afterwards through the EscrowNotification outbox, so a slow escrow
+    service never holds a wallet lock. Releases and refunds settle from
+    the escrow account's balance; held escrows are also released in
+    batches once their release_at passes (see escrow_release).
     """
-    
-    def __init__(self):
-        self.trinity_url = settings.TRINITY_API_URL
-        self.service_key = settings.SHARED_SERVICE_SECRET
-    
-    def _create_escrow(self, buyer_id, seller_id, amount, product_id, tx_ref):
-        """
-        Create escrow in TRINITY system
-        """
-        try:
-            response = requests.post(
-                f"{self.trinity_url}/api/escrow/create/",
-                json={
-                    'buyer_id': str(buyer_id),
-                    'seller_id': str(seller_id),
-                    'amount': str(amount),
-                    'product_id': str(product_id),
-                    'transaction_ref': tx_ref,
-                    'auto_release_hours': settings.DEFAULT_ESCROW_AUTO_RELEASE_HOURS
-                },
-                headers={
-                    'X-Service-Key': self.service_key,
-                    'Content-Type': 'application/json'
-                },
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f'Escrow creation failed: {str(e)}')
-            return None
-    
-    @transaction.atomic
+
+    @property
+    def auto_release_hours(self):
+        return getattr(settings, 'DEFAULT_ESCROW_AUTO_RELEASE_HOURS', 72)
+
+    def _escrow_payload(self, escrow, reference):
+        return {
+            'escrow_ref': str(escrow.id),
+            'buyer_id': str(escrow.buyer_id),
+            'seller_id': str(escrow.seller_id),
+            'amount': str(escrow.amount),
+            'product_id': escrow.product_id,
+            'transaction_ref': reference,
+            'auto_release_hours': self.auto_release_hours
+        }
+
     def process_purchase(self, buyer_id, seller_id, product_id, amount, use_escrow=True):
         """
         Process a product purchase
-        
+
         Flow:
         1. Validate buyer and seller exist
-        2. Check buyer has sufficient balance
-        3. Deduct from buyer wallet (atomic)
-        4. If use_escrow: Create escrow in TRINITY
+        2. Lock the buyer's wallet and check the balance
+        3. Debit buyer wallet (PaymentProcessor.debit_wallet)
+        4. If use_escrow: Hold the funds in a new EscrowAccount and queue
+           the TRINITY notification (sent after commit, with retries)
         5. If not use_escrow: Credit seller immediately
-        6. Create transaction record
-        7. Sync to blockchain
-        
+
         Args:
             buyer_id: UUID of buyer
             seller_id: UUID of seller
             product_id: UUID of product
             amount: Decimal amount
             use_escrow: Whether to use escrow (default: True)
-        
+
         Returns:
             {
                 'success': bool,
@@ -83,134 +74,215 @@ class PurchaseService:
             }
         """
         try:
-            # Get users and wallets with row-level lock
-            buyer = User.objects.select_related('wallet').select_for_update().get(id=buyer_id)
-            seller = User.objects.select_related('wallet').select_for_update().get(id=seller_id)
-            
-            buyer_wallet = buyer.wallet
-            seller_wallet = seller.wallet
-            
             amount = Decimal(str(amount))
-            
+
             # Validate
-            if buyer_id == seller_id:
+            if str(buyer_id) == str(seller_id):
                 return {
                     'success': False,
                     'message': 'Cannot purchase from yourself'
                 }
-            
-            if buyer_wallet.balance < amount:
-                return {
-                    'success': False,
-                    'message': f'Insufficient balance. Required: ₦{amount}, Available: ₦{buyer_wallet.balance}'
-                }
-            
-            # Generate transaction reference
-            tx_ref = f'TXN-{timezone.now().strftime("%Y%m%d")}-{uuid.uuid4().hex[:6].upper()}'
-            
-            # Deduct from buyer wallet
-            buyer_wallet.balance -= amount
-            buyer_wallet.save(update_fields=['balance'])
-            
-            escrow_id = None
-            status = 'completed'
-            
-            if use_escrow:
-                # Create escrow
-                escrow_result = self._create_escrow(
-                    buyer_id, seller_id, amount, product_id, tx_ref
+
+            with transaction.atomic():
+                # Only the buyer's wallet is locked, for the local postings only
+                buyer_wallet = Wallet.objects.select_related('user').select_for_update().get(
+                    user_id=buyer_id
                 )
-                
-                if escrow_result and escrow_result.get('success'):
-                    escrow_id = escrow_result.get('escrow_id')
-                    status = 'escrowed'
-                else:
-                    # Escrow creation failed, refund buyer
-                    buyer_wallet.balance += amount
-                    buyer_wallet.save(update_fields=['balance'])
+                seller_wallet = Wallet.objects.select_related('user').get(user_id=seller_id)
+
+                if buyer_wallet.balance < amount:
                     return {
                         'success': False,
-                        'message': 'Failed to create escrow. Payment refunded.'
+                        'message': f'Insufficient balance. Required: ₦{amount}, Available: ₦{buyer_wallet.balance}'
                     }
-            else:
-                # Direct payment to seller
-                seller_wallet.balance += amount
-                seller_wallet.save(update_fields=['balance'])
-            
-            # Create transaction record
-            tx = TransactionModel.objects.create(
-                user=buyer,
-                transaction_type='purchase',
-                amount=amount,
-                currency='NGN',
-                status=status,
-                reference=tx_ref,
-                recipient=seller,
-                description=f'Purchase of product {product_id}',
-                metadata={
-                    'buyer_id': str(buyer_id),
-                    'seller_id': str(seller_id),
-                    'product_id': str(product_id),
-                    'escrow_id': str(escrow_id) if escrow_id else None,
-                    'use_escrow': use_escrow
-                }
-            )
-            
+
+                escrow_id = uuid.uuid4() if use_escrow else None
+
+                # Deduct from buyer wallet
+                tx = PaymentProcessor.debit_wallet(
+                    wallet=buyer_wallet,
+                    amount=amount,
+                    fee=Decimal('0.00'),
+                    description=f'Purchase of product {product_id}',
+                    transaction_type='purchase',
+                    metadata={
+                        'buyer_id': str(buyer_id),
+                        'seller_id': str(seller_id),
+                        'product_id': str(product_id),
+                        'escrow_id': str(escrow_id) if escrow_id else None,
+                        'use_escrow': use_escrow
+                    },
+                    recipient_account=seller_wallet.account_number,
+                    recipient_name=seller_wallet.user.get_full_name() or seller_wallet.user.username,
+                    recipient_bank='GAX Bank'
+                )
+
+                if use_escrow:
+                    escrow = EscrowAccount.objects.create(
+                        id=escrow_id,
+                        buyer_id=buyer_wallet.user_id,
+                        seller_id=seller_wallet.user_id,
+                        product_id=str(product_id),
+                        amount=amount,
+                        balance=amount,
+                        transaction=tx,
+                        release_at=timezone.now() + timedelta(hours=self.auto_release_hours)
+                    )
+                    escrow_notifier.queue(
+                        escrow, 'created', self._escrow_payload(escrow, tx.reference)
+                    )
+                    status = 'escrowed'
+                else:
+                    # Direct payment to seller
+                    PaymentProcessor.credit_wallet(
+                        wallet=seller_wallet,
+                        amount=amount,
+                        description=f'Sale of product {product_id}',
+                        transaction_type='payment',
+                        metadata={
+                            'buyer_id': str(buyer_id),
+                            'product_id': str(product_id),
+                            'purchase_reference': tx.reference
+                        }
+                    )
+                    status = 'completed'
+
             logger.info(
                 f'Purchase processed: buyer={buyer_id}, seller={seller_id}, '
                 f'amount={amount}, escrow={use_escrow}, tx={tx.id}'
             )
-            
+
             return {
                 'success': True,
                 'transaction_id': str(tx.id),
-                'reference': tx_ref,
+                'reference': tx.reference,
                 'escrow_id': str(escrow_id) if escrow_id else None,
                 'status': status,
                 'buyer_balance': str(buyer_wallet.balance)
             }
-            
-        except User.DoesNotExist:
+
+        except Wallet.DoesNotExist:
             logger.error(f'User not found: buyer={buyer_id} or seller={seller_id}')
             return {
                 'success': False,
                 'message': 'User not found'
             }
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }
         except Exception as e:
             logger.error(f'Purchase error: {str(e)}')
             return {
                 'success': False,
                 'message': 'Purchase failed'
             }
-    
-    @transaction.atomic
+
+    def _lock_escrow(self, escrow_id, transaction_ref):
+        """Find an escrow by purchase reference or id and lock its row"""
+        lookup = EscrowAccount.objects.filter(transaction__reference=transaction_ref)
+        pk = lookup.values_list('pk', flat=True).first()
+        if pk is None and escrow_id:
+            pk = EscrowAccount.objects.filter(external_id=str(escrow_id)).values_list(
+                'pk', flat=True
+            ).first()
+        if pk is None:
+            raise EscrowAccount.DoesNotExist
+        return EscrowAccount.objects.select_for_update().select_related('transaction').get(pk=pk)
+
+    def settle(self, escrow, status, description):
+        """
+        Pay out the held balance of a locked escrow account
+
+        'released' credits the seller and 'refunded' the buyer; TRINITY
+        is told through the outbox in the same transaction.
+
+        Returns:
+            Transaction: Credit posting
+        """
+        if not escrow.can_transition(status) or status not in ('released', 'refunded'):
+            raise ValueError(f'Escrow is {escrow.status}')
+
+        recipient_id = escrow.seller_id if status == 'released' else escrow.buyer_id
+        credit = PaymentProcessor.credit_wallet(
+            wallet=Wallet.objects.get(user_id=recipient_id),
+            amount=escrow.balance,
+            description=description,
+            transaction_type='escrow_release' if status == 'released' else 'refund',
+            metadata={
+                'escrow_id': str(escrow.id),
+                'purchase_reference': escrow.transaction.reference
+            }
+        )
+
+        escrow.status = status
+        escrow.balance = Decimal('0.00')
+        escrow.settlement_transaction = credit
+        escrow.settled_at = timezone.now()
+        escrow.save(update_fields=[
+            'status', 'balance', 'settlement_transaction', 'settled_at', 'updated_at'
+        ])
+
+        purchase = escrow.transaction
+        purchase.metadata['escrow_status'] = status
+        if purchase.status == 'escrowed':
+            # Purchases escrowed before EscrowAccount existed
+            purchase.status = 'completed'
+        purchase.save(update_fields=['status', 'metadata', 'updated_at'])
+
+        escrow_notifier.queue(
+            escrow, status,
+            escrow_notifier.settlement_payload(escrow, purchase.reference, credit.reference)
+        )
+        return credit
+
     def release_escrow_funds(self, seller_id, amount, escrow_id, transaction_ref):
         """
         Release funds to seller when escrow is released
-        Called by webhook from TRINITY
+        Called by webhook from TRINITY; a repeated webhook is a no-op
         """
         try:
-            seller = User.objects.select_related('wallet').select_for_update().get(id=seller_id)
-            seller_wallet = seller.wallet
-            
-            amount = Decimal(str(amount))
-            
-            # Credit seller wallet
-            seller_wallet.balance += amount
-            seller_wallet.save(update_fields=['balance'])
-            
-            # Update transaction status
-            tx = TransactionModel.objects.get(reference=transaction_ref)
-            tx.status = 'completed'
-            tx.metadata['escrow_released'] = True
-            tx.save(update_fields=['status', 'metadata'])
-            
-            logger.info(f'Escrow released: seller={seller_id}, amount={amount}, escrow={escrow_id}')
-            
+            with transaction.atomic():
+                escrow = self._lock_escrow(escrow_id, transaction_ref)
+
+                if escrow.status == 'released':
+                    return {
+                        'success': True,
+                        'message': 'Funds already released'
+                    }
+
+                if str(escrow.seller_id) != str(seller_id):
+                    return {
+                        'success': False,
+                        'message': 'Seller does not match escrow'
+                    }
+
+                if amount is not None and Decimal(str(amount)) != escrow.balance:
+                    return {
+                        'success': False,
+                        'message': f'Amount does not match escrow balance ₦{escrow.balance}'
+                    }
+
+                released = escrow.balance
+                self.settle(escrow, 'released', f'Escrow release for product {escrow.product_id}')
+
+            logger.info(f'Escrow released: seller={seller_id}, amount={released}, escrow={escrow.id}')
+
             return {
                 'success': True,
                 'message': 'Funds released to seller'
             }
+        except EscrowAccount.DoesNotExist:
+            return {
+                'success': False,
+                'message': 'Escrow not found'
+            }
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }
         except Exception as e:
             logger.error(f'Escrow release error: {str(e)}')
             return {
@@ -218,6 +290,68 @@ class PurchaseService:
                 'message': 'Failed to release funds'
             }
 
+    def refund_escrow_funds(self, escrow_id, transaction_ref, reason=''):
+        """
+        Return held funds to the buyer (cancelled order, lost dispute)
+        """
+        try:
+            with transaction.atomic():
+                escrow = self._lock_escrow(escrow_id, transaction_ref)
+
+                if escrow.status == 'refunded':
+                    return {
+                        'success': True,
+                        'message': 'Funds already refunded'
+                    }
+
+                refunded = escrow.balance
+                self.settle(
+                    escrow, 'refunded',
+                    f'Escrow refund for product {escrow.product_id}' + (f': {reason}' if reason else '')
+                )
+
+            logger.info(f'Escrow refunded: buyer={escrow.buyer_id}, amount={refunded}, escrow={escrow.id}')
+
+            return {
+                'success': True,
+                'message': 'Funds refunded to buyer'
+            }
+        except EscrowAccount.DoesNotExist:
+            return {
+                'success': False,
+                'message': 'Escrow not found'
+            }
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }
+        except Exception as e:
+            logger.error(f'Escrow refund error: {str(e)}')
+            return {
+                'success': False,
+                'message': 'Failed to refund funds'
+            }
+
+    def dispute_escrow(self, escrow_id, transaction_ref):
+        """
+        Hold an escrow until the dispute is resolved by release or refund
+        Disputed escrows are skipped by the auto-release scheduler
+        """
+        with transaction.atomic():
+            escrow = self._lock_escrow(escrow_id, transaction_ref)
+            if escrow.status == 'disputed':
+                return escrow
+            if not escrow.can_transition('disputed'):
+                raise ValueError(f'Escrow is {escrow.status}')
+            escrow.status = 'disputed'
+            escrow.save(update_fields=['status', 'updated_at'])
+            escrow_notifier.queue(
+                escrow, 'disputed',
+                escrow_notifier.settlement_payload(escrow, escrow.transaction.reference)
+            )
+        return escrow
+
 
 # Singleton instance
 purchase_service = PurchaseService()
@@ -1,12 +1,16 @@
 """
 Django signals for automatic wallet and transaction operations
-Integrated with Paystack for virtual account creation
+Queues Paystack virtual account creation for new users
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction as db_transaction
-from .models import User, Wallet, Profile, Transaction
-from .utils.paystack import get_paystack_client
+from .models import User, Wallet, Profile, Transaction, APIKey, FeeRule
+from .authentication import APIKeyAuthentication
+from .utils.fees import fee_engine
+from .utils.provisioning import virtual_account_provisioner
+from .utils.resolver import account_resolver
+from .utils.wallet_cache import wallet_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,50 +19,18 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=User)
 def create_user_wallet_and_profile(sender, instance, created, **kwargs):
     """
-    Automatically create wallet, profile, and Paystack virtual account when user is created
+    Automatically create wallet and profile when user is created
+
+    The Paystack virtual account is only queued here; it is created in the
+    background after the transaction commits.
     """
     if created:
         try:
             with db_transaction.atomic():
                 # Create wallet
                 if not hasattr(instance, 'wallet'):
-                    wallet = Wallet.objects.create(user=instance)
+                    Wallet.objects.create(user=instance)
                     logger.info(f"Wallet created for user: {instance.username}")
-                    
-                    # Create Paystack virtual account
-                    try:
-                        paystack = get_paystack_client()
-                        result = paystack.create_dedicated_account(
-                            customer_email=instance.email,
-                            customer_name=instance.get_full_name(),
-                            customer_phone=instance.phone_number or '+2348000000000',
-                            preferred_bank='wema-bank'
-                        )
-                        
-                        if result.get('status'):
-                            data = result.get('data', {})
-                            # Update wallet with Paystack virtual account details
-                            wallet.metadata = {
-                                'paystack_customer': data.get('customer', {}),
-                                'paystack_account': {
-                                    'account_name': data.get('account_name'),
-                                    'account_number': data.get('account_number'),
-                                    'bank_name': data.get('bank', {}).get('name'),
-                                    'bank_slug': data.get('bank', {}).get('slug'),
-                                }
-                            }
-                            wallet.save(update_fields=['metadata'])
-                            logger.info(
-                                f"Paystack virtual account created: "
-                                f"{data.get('account_number')} for {instance.username}"
-                            )
-                        else:
-                            logger.warning(
-                                f"Paystack virtual account creation failed for {instance.username}: "
-                                f"{result.get('message')}"
-                            )
-                    except Exception as e:
-                        logger.error(f"Error creating Paystack virtual account: {e}")
 
                 # Create profile
                 if not hasattr(instance, 'profile'):
@@ -69,6 +41,9 @@ def create_user_wallet_and_profile(sender, instance, created, **kwargs):
                     )
                     logger.info(f"Profile created for user: {instance.username}")
 
+                # Queue Paystack virtual account
+                virtual_account_provisioner.queue([instance.pk])
+
         except Exception as e:
             logger.error(f"Error creating wallet/profile for user {instance.username}: {e}")
 
@@ -104,4 +79,77 @@ def handle_transaction_approval(sender, instance, **kwargs):
                 )
 
         except Exception as e:
-            logger.error(f"Error handling transaction approval: {e}")
\ No newline at end of file
+            logger.error(f"Error handling transaction approval: {e}")
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_key_cache(sender, instance, **kwargs):
+    """
+    Drop cached credentials when a key is changed, revoked or deleted
+
+    Dropped again after commit: a concurrent request may reload the old,
+    still committed row in between and cache it for API_KEY_CACHE_TTL.
+    """
+    prefix = instance.prefix
+    APIKeyAuthentication.invalidate(prefix)
+    db_transaction.on_commit(lambda: APIKeyAuthentication.invalidate(prefix))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_api_key_cache(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drop the user's cached API keys when the user changes (e.g. deactivated)
+    """
+    if created or update_fields == frozenset({'last_login'}):
+        return
+
+    user_id = instance.pk
+    db_transaction.on_commit(lambda: APIKeyAuthentication.invalidate_user(user_id))
+
+
+@receiver(post_save, sender=FeeRule)
+@receiver(post_delete, sender=FeeRule)
+def invalidate_fee_tables(sender, instance, **kwargs):
+    """
+    Recompile fee tables once a rule change commits
+    """
+    fee_engine.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def invalidate_wallet_resolver_cache(sender, instance, **kwargs):
+    """
+    Drop the cached name enquiry when a wallet is frozen, closed or deleted
+    """
+    account_resolver.invalidate([instance.account_number])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_resolver_cache(sender, instance, created, update_fields=None,
+                                   **kwargs):
+    """
+    Drop cached name enquiries when the account holder's name changes
+    """
+    if created:
+        return
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+
+    account_resolver.invalidate(
+        Wallet.objects.filter(user=instance).values_list(
+            'account_number', flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_save, sender=Transaction)
+def refresh_wallet_cache(sender, instance, created, **kwargs):
+    """
+    Refresh the cached wallet snapshot after a wallet or transaction
+    changes outside PaymentProcessor (freezes, approvals, reversals)
+    """
+    if not created:
+        wallet_cache.refresh_on_commit(instance.user_id)
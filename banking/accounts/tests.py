@@ -1,3 +1,403 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from types import SimpleNamespace
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .admin_views import AdminTransactionViewSet
+from .hashers import make_pin
+from .models import (
+    BankAccount, EscrowAccount, EscrowNotification, FeeRule, Transaction, User,
+    Wallet
+)
+from .services.purchase_service import purchase_service
+from .utils.account_numbers import (
+    AccountNumberAllocator, is_valid_account_number, nuban_check_digit
+)
+from .utils.escrow_notifications import escrow_notifier
+from .utils.escrow_release import escrow_release_scheduler
+from .utils.fees import fee_engine
+from .utils.payment import PaymentProcessor
+
+
+class WithdrawalRejectionTests(TestCase):
+    """Rejecting a pending withdrawal releases the hold from balance only"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create_user(
+            username='admin', password='x', phone_number='08000000001',
+            user_type='admin'
+        )
+        self.user = User.objects.create_user(
+            username='customer', password='x', phone_number='08000000002'
+        )
+        self.user.transaction_pin = make_pin('1234')
+        self.user.save()
+
+        Wallet.objects.filter(user=self.user).update(
+            balance=Decimal('1000.00'), ledger_balance=Decimal('1000.00')
+        )
+        self.bank_account = BankAccount.objects.create(
+            user=self.user, bank_name='Test Bank', bank_code='001',
+            account_number='0123456789', account_name='Customer'
+        )
+
+    def withdraw(self, amount):
+        wallet = Wallet.objects.get(user=self.user)
+        return PaymentProcessor.process_withdrawal(
+            wallet, Decimal(amount), self.bank_account, '1234'
+        )
+
+    def post(self, action, data, **kwargs):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=self.admin)
+        view = AdminTransactionViewSet.as_view({'post': action})
+        return view(request, **kwargs)
+
+    def assertBalances(self, balance, ledger_balance):
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(wallet.balance, Decimal(balance))
+        self.assertEqual(wallet.ledger_balance, Decimal(ledger_balance))
+
+    def test_reject_withdrawal(self):
+        withdrawal = self.withdraw('100.00')
+        self.assertBalances(1000 - withdrawal.total_amount, '1000.00')
+
+        response = self.post('reject_withdrawal', {}, pk=withdrawal.pk)
+
+        self.assertTrue(response.data['success'])
+        self.assertBalances('1000.00', '1000.00')
+
+    def test_bulk_reject_withdrawals(self):
+        withdrawals = [self.withdraw('100.00'), self.withdraw('200.00')]
+
+        response = self.post('bulk_reject_withdrawals', {
+            'ids': [str(withdrawal.pk) for withdrawal in withdrawals],
+            'reason': 'Rejected in test'
+        })
+
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertBalances('1000.00', '1000.00')
+
+    def test_pending_non_hold_not_reversible(self):
+        pending = Transaction.objects.create(
+            user=self.user,
+            wallet=Wallet.objects.get(user=self.user),
+            transaction_type='bill_payment',
+            amount=Decimal('100.00'),
+            status='pending'
+        )
+
+        with self.assertRaises(ValueError):
+            PaymentProcessor.reverse_transaction(pending, 'Not a hold')
+        self.assertBalances('1000.00', '1000.00')
+
+
+class EscrowReleaseTests(TestCase):
+    """Escrowed purchases settle once, by auto-release or webhook"""
+
+    def setUp(self):
+        self.buyer = User.objects.create_user(
+            username='buyer', password='x', phone_number='08000000003'
+        )
+        self.seller = User.objects.create_user(
+            username='seller', password='x', phone_number='08000000004'
+        )
+        Wallet.objects.filter(user=self.buyer).update(
+            balance=Decimal('1000.00'), ledger_balance=Decimal('1000.00')
+        )
+
+    def purchase(self, amount, product_id='product-1'):
+        result = purchase_service.process_purchase(
+            self.buyer.id, self.seller.id, product_id, Decimal(amount)
+        )
+        self.assertTrue(result['success'], result)
+        return EscrowAccount.objects.get(transaction__reference=result['reference'])
+
+    def make_due(self, *escrows):
+        EscrowAccount.objects.filter(id__in=[escrow.id for escrow in escrows]).update(
+            release_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def balance(self, user):
+        return Wallet.objects.get(user=user).balance
+
+    def test_due_escrow_released_to_seller(self):
+        escrow = self.purchase('250.00')
+        self.make_due(escrow)
+
+        result = escrow_release_scheduler.release_batch()
+
+        self.assertEqual(result['released'], 1)
+        self.assertEqual(result['amount'], Decimal('250.00'))
+        escrow.refresh_from_db()
+        self.assertEqual(escrow.status, 'released')
+        self.assertEqual(escrow.balance, Decimal('0.00'))
+        self.assertEqual(escrow.settlement_transaction.amount, Decimal('250.00'))
+        self.assertEqual(self.balance(self.seller), Decimal('250.00'))
+        self.assertEqual(self.balance(self.buyer), Decimal('750.00'))
+        self.assertEqual(
+            Transaction.objects.get(pk=escrow.transaction_id).metadata['escrow_status'],
+            'released'
+        )
+
+    def test_disputed_escrow_not_released(self):
+        escrow = self.purchase('250.00')
+        purchase_service.dispute_escrow(escrow.id, escrow.transaction.reference)
+        self.make_due(escrow)
+
+        result = escrow_release_scheduler.release_batch()
+
+        self.assertEqual(result['released'], 0)
+        escrow.refresh_from_db()
+        self.assertEqual(escrow.status, 'disputed')
+        self.assertEqual(self.balance(self.seller), Decimal('0.00'))
+
+    def events(self, escrow):
+        return list(
+            EscrowNotification.objects.filter(escrow=escrow)
+            .order_by('id').values_list('event', flat=True)
+        )
+
+    def test_settlements_queue_trinity_notifications(self):
+        released = self.purchase('100.00', 'product-1')
+        disputed = self.purchase('150.00', 'product-2')
+        purchase_service.dispute_escrow(disputed.id, disputed.transaction.reference)
+        purchase_service.refund_escrow_funds(disputed.id, disputed.transaction.reference)
+        self.make_due(released)
+
+        escrow_release_scheduler.release_batch()
+
+        self.assertEqual(self.events(released), ['created', 'released'])
+        self.assertEqual(self.events(disputed), ['created', 'disputed', 'refunded'])
+        notification = EscrowNotification.objects.get(escrow=released, event='released')
+        self.assertEqual(notification.payload['escrow_ref'], str(released.id))
+        self.assertEqual(notification.payload['status'], 'released')
+
+    def test_later_event_waits_for_and_fails_with_created(self):
+        escrow = self.purchase('250.00')
+        purchase_service.dispute_escrow(escrow.id, escrow.transaction.reference)
+        created = EscrowNotification.objects.get(escrow=escrow, event='created')
+        disputed = EscrowNotification.objects.get(escrow=escrow, event='disputed')
+
+        self.assertFalse(escrow_notifier.deliver(disputed.id))
+        disputed.refresh_from_db()
+        self.assertEqual(disputed.status, 'pending')
+        self.assertEqual(disputed.attempts, 0)
+
+        created.attempts = escrow_notifier.max_attempts
+        escrow_notifier.record_failure(created, 'Unavailable')
+
+        disputed.refresh_from_db()
+        self.assertEqual(created.status, 'failed')
+        self.assertEqual(disputed.status, 'failed')
+
+    def test_legacy_escrow_released_and_completed(self):
+        purchase = Transaction.objects.create(
+            user=self.buyer,
+            transaction_type='purchase',
+            amount=Decimal('300.00'),
+            status='escrowed',
+            metadata={
+                'buyer_id': str(self.buyer.id),
+                'seller_id': str(self.seller.id),
+                'product_id': 'legacy-product',
+                'escrow_id': 'trinity-1',
+                'use_escrow': True
+            }
+        )
+        Transaction.objects.filter(pk=purchase.pk).update(
+            created_at=timezone.now() - timedelta(days=4)
+        )
+        migration = importlib.import_module('accounts.migrations.0014_legacy_escrows')
+        migration.create_legacy_escrows(apps, SimpleNamespace(connection=connection))
+
+        escrow = EscrowAccount.objects.get(transaction=purchase)
+        self.assertEqual(escrow.external_id, 'trinity-1')
+
+        result = escrow_release_scheduler.release_batch()
+
+        self.assertEqual(result['released'], 1)
+        purchase.refresh_from_db()
+        self.assertEqual(purchase.status, 'completed')
+        self.assertEqual(purchase.metadata['escrow_status'], 'released')
+        self.assertEqual(self.balance(self.seller), Decimal('300.00'))
+
+    def test_release_webhook_after_auto_release_is_noop(self):
+        escrow = self.purchase('250.00')
+        self.make_due(escrow)
+        escrow_release_scheduler.release_batch()
+
+        result = purchase_service.release_escrow_funds(
+            self.seller.id, Decimal('250.00'), escrow.id,
+            escrow.transaction.reference
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['message'], 'Funds already released')
+        self.assertEqual(self.balance(self.seller), Decimal('250.00'))
+        self.assertEqual(
+            Transaction.objects.filter(
+                user=self.seller, transaction_type='escrow_release'
+            ).count(),
+            1
+        )
+
+    def test_refund_after_release_refused(self):
+        escrow = self.purchase('250.00')
+        self.make_due(escrow)
+        escrow_release_scheduler.release_batch()
+
+        result = purchase_service.refund_escrow_funds(
+            escrow.id, escrow.transaction.reference, 'Changed mind'
+        )
+
+        self.assertFalse(result['success'])
+        escrow.refresh_from_db()
+        self.assertEqual(escrow.status, 'released')
+        self.assertEqual(self.balance(self.buyer), Decimal('750.00'))
+        self.assertEqual(self.balance(self.seller), Decimal('250.00'))
+
+    def test_release_after_refund_refused(self):
+        escrow = self.purchase('250.00')
+        purchase_service.refund_escrow_funds(escrow.id, escrow.transaction.reference)
+
+        result = purchase_service.release_escrow_funds(
+            self.seller.id, None, escrow.id, escrow.transaction.reference
+        )
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['message'], 'Escrow is refunded')
+        self.assertEqual(self.balance(self.seller), Decimal('0.00'))
+
+    def test_batch_credits_same_seller_in_sequence(self):
+        escrows = [
+            self.purchase('100.00', 'product-1'),
+            self.purchase('150.00', 'product-2'),
+        ]
+        self.make_due(*escrows)
+
+        result = escrow_release_scheduler.release_batch()
+
+        self.assertEqual(result['released'], 2)
+        self.assertEqual(result['sellers'], 1)
+        credits = list(
+            Transaction.objects.filter(
+                user=self.seller, transaction_type='escrow_release'
+            ).order_by('balance_before')
+        )
+        self.assertEqual(len(credits), 2)
+        self.assertEqual(credits[0].balance_before, Decimal('0.00'))
+        self.assertEqual(credits[0].balance_after, credits[1].balance_before)
+        self.assertEqual(credits[1].balance_after, Decimal('250.00'))
+        self.assertEqual(self.balance(self.seller), Decimal('250.00'))
+
+
+class FeeEngineTests(TestCase):
+    """Compiled fee rules keep the built-in schedule and override by scope"""
+
+    def setUp(self):
+        fee_engine.invalidate()
+        self.addCleanup(fee_engine.invalidate)
+        self.user = User.objects.create_user(
+            username='payer', password='x', phone_number='08000000005'
+        )
+        self.merchant = User.objects.create_user(
+            username='merchant', password='x', phone_number='08000000006',
+            user_type='merchant'
+        )
+        self.other_merchant = User.objects.create_user(
+            username='merchant2', password='x', phone_number='08000000007',
+            user_type='merchant'
+        )
+
+    def fee(self, fee_type, amount, user=None):
+        return fee_engine.calculate(fee_type, Decimal(amount), user)
+
+    def add_rule(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return FeeRule.objects.create(**kwargs)
+
+    def test_default_transfer_tiers(self):
+        self.assertEqual(self.fee('transfer', '5000.00'), Decimal('10.00'))
+        self.assertEqual(self.fee('transfer', '5000.01'), Decimal('25.00'))
+        self.assertEqual(self.fee('transfer', '50000.00'), Decimal('25.00'))
+        self.assertEqual(self.fee('transfer', '50000.01'), Decimal('50.00'))
+
+    def test_default_gateway_fee_capped(self):
+        self.assertEqual(self.fee('payment', '10000.00'), Decimal('150.00'))
+        self.assertEqual(self.fee('payment', '200000.00'), Decimal('2000.00'))
+
+    def test_default_bill_fees(self):
+        self.assertEqual(self.fee('tv', '5000.00'), Decimal('100.00'))
+        self.assertEqual(self.fee('electricity', '5000.00'), Decimal('100.00'))
+
+    def test_user_over_user_type_over_default(self):
+        self.add_rule(fee_type='transfer', flat_fee=Decimal('5.00'))
+        self.add_rule(
+            fee_type='transfer', user_type='merchant', flat_fee=Decimal('3.00')
+        )
+        self.add_rule(
+            fee_type='transfer', user=self.merchant, flat_fee=Decimal('1.00')
+        )
+
+        self.assertEqual(self.fee('transfer', '100.00', self.merchant), Decimal('1.00'))
+        self.assertEqual(
+            self.fee('transfer', '100.00', self.other_merchant), Decimal('3.00')
+        )
+        self.assertEqual(self.fee('transfer', '100.00', self.user), Decimal('5.00'))
+
+    def test_uncovered_amount_falls_through(self):
+        self.add_rule(
+            fee_type='transfer', user=self.merchant,
+            max_amount=Decimal('1000.00'), flat_fee=Decimal('1.00')
+        )
+        self.add_rule(
+            fee_type='transfer', max_amount=Decimal('2000.00'),
+            flat_fee=Decimal('5.00')
+        )
+
+        self.assertEqual(self.fee('transfer', '1000.00', self.merchant), Decimal('1.00'))
+        self.assertEqual(self.fee('transfer', '1500.00', self.merchant), Decimal('5.00'))
+        self.assertEqual(self.fee('transfer', '6000.00', self.merchant), Decimal('25.00'))
+
+    def test_saved_rule_invalidates_tables(self):
+        self.assertEqual(self.fee('tv', '5000.00'), Decimal('100.00'))
+        rule = self.add_rule(fee_type='tv', flat_fee=Decimal('80.00'))
+        self.assertEqual(self.fee('tv', '5000.00'), Decimal('80.00'))
+
+        rule.flat_fee = Decimal('60.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.save()
+        self.assertEqual(self.fee('tv', '5000.00'), Decimal('60.00'))
+
+
+class AccountNumberTests(TestCase):
+    """NUBAN check digits and block allocation"""
+
+    def test_check_digit_matches_cbn_example(self):
+        self.assertEqual(nuban_check_digit('000001457', '011'), '9')
+        self.assertTrue(is_valid_account_number('0000014579', '011'))
+        self.assertFalse(is_valid_account_number('0000014578', '011'))
+
+    @override_settings(ACCOUNT_NUMBER_BLOCK_SIZE=3)
+    def test_allocation_never_repeats_across_blocks(self):
+        first = AccountNumberAllocator()
+        second = AccountNumberAllocator()
+
+        numbers = []
+        for allocator, count in (
+            (first, 2), (second, 2), (first, 2), (second, 5), (first, 1),
+            (second, 1), (first, 4),
+        ):
+            numbers.extend(allocator.allocate(count))
+
+        self.assertEqual(len(numbers), 17)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertTrue(all(is_valid_account_number(number) for number in numbers))
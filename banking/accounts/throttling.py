@@ -1,29 +1,267 @@
 """
 Custom throttling classes
+
+All throttles use a sliding-window counter: two integer counters per
+client (current and previous window) updated with atomic increments. The
+previous window's count is weighted by how much of it still overlaps the
+sliding window, so memory per client is fixed and concurrent workers
+never overwrite each other's history. On Redis the whole check runs as a
+single Lua script.
+
+Rates per tier come from API_THROTTLE_RATES; API keys can carry their own
+rate_limit and merchants their own User.api_rate_limit, both set by admins
+through the admin API. A request can count as several (see
+get_request_cost), e.g. each account number in a batch name enquiry.
 """
-from rest_framework.throttling import UserRateThrottle as DRFUserRateThrottle
-from rest_framework.throttling import AnonRateThrottle
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+from .authentication import CachedAPIKey
+
+try:
+    from django_redis import get_redis_connection
+except ImportError:  # pragma: no cover - only used with django-redis caches
+    get_redis_connection = None
+
+
+SLIDING_WINDOW_SCRIPT = """
+local cost = tonumber(ARGV[4])
+local current = redis.call('INCRBY', KEYS[1], cost)
+if current == cost then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[2]) + current > tonumber(ARGV[3]) then
+    redis.call('DECRBY', KEYS[1], cost)
+    return {0, current - cost, previous}
+end
+return {1, current, previous}
+"""
+
+
+def validate_rate(rate):
+    """
+    Check a throttle rate such as "5000/min"
+
+    Raises:
+        ValueError: if the rate would not parse when throttling
+    """
+    try:
+        num_requests, duration = SimpleRateThrottle.parse_rate(None, rate)
+    except (AttributeError, IndexError, KeyError, ValueError):
+        raise ValueError(f'Invalid rate "{rate}", expected e.g. "1000/min"')
+    if num_requests is None or num_requests <= 0:
+        raise ValueError(f'Invalid rate "{rate}", expected e.g. "1000/min"')
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Base throttle with an atomic sliding-window counter
+
+    Subclasses set scope and default_rate and implement get_ident_key();
+    get_request_rate() may return a per-client rate.
+    """
+    default_rate = None
+
+    _script = None
+
+    def get_rate(self):
+        rates = getattr(settings, 'API_THROTTLE_RATES', {})
+        return rates.get(self.scope, self.default_rate)
+
+    def get_request_rate(self, request):
+        """Rate for this request (defaults to the tier rate)"""
+        return self.rate
+
+    def get_request_cost(self, request):
+        """Requests this request counts as (defaults to 1)"""
+        return 1
+
+    def get_ident_key(self, request, view):
+        """Unique client identifier, or None to skip throttling"""
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        rate = self.get_request_rate(request)
+        if rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        num_requests, duration = self.parse_rate(rate)
+        cost = self.get_request_cost(request)
+        now = self.timer()
+        window = int(now // duration)
+        elapsed = now - window * duration
+        weight = 1 - elapsed / duration
+
+        allowed, current, previous = self.hit(
+            f'{self.key}:{window}',
+            f'{self.key}:{window - 1}',
+            num_requests,
+            duration,
+            weight,
+            cost
+        )
 
+        if allowed:
+            return True
 
-class UserRateThrottle(DRFUserRateThrottle):
+        self._wait = self.compute_wait(
+            num_requests, duration, elapsed, current, previous, cost
+        )
+        return self.throttle_failure()
+
+    def hit(self, current_key, previous_key, num_requests, duration, weight,
+            cost=1):
+        """
+        Count a request (as cost requests) in the current window
+
+        Returns:
+            tuple: (allowed, current, previous) - counts exclude a rejected
+            request, which is not recorded
+        """
+        client = self.get_redis_client()
+        if client is not None:
+            allowed, current, previous = self.get_script(client)(
+                keys=[
+                    self.cache.make_key(current_key),
+                    self.cache.make_key(previous_key)
+                ],
+                args=[duration * 2, weight, num_requests, cost],
+                client=client
+            )
+            return bool(allowed), int(current), int(previous)
+
+        # Counters outlive their window so they can serve as "previous"
+        self.cache.add(current_key, 0, timeout=duration * 2)
+        try:
+            current = self.cache.incr(current_key, cost)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(current_key, cost, timeout=duration * 2)
+            current = cost
+        previous = self.cache.get(previous_key, 0)
+
+        if previous * weight + current > num_requests:
+            self.cache.decr(current_key, cost)
+            return False, current - cost, previous
+
+        return True, current, previous
+
+    def get_redis_client(self):
+        if get_redis_connection is None or not (
+            type(caches['default']).__module__.startswith('django_redis')
+        ):
+            return None
+        return get_redis_connection('default')
+
+    @classmethod
+    def get_script(cls, client):
+        if cls._script is None:
+            SlidingWindowRateThrottle._script = client.register_script(
+                SLIDING_WINDOW_SCRIPT
+            )
+        return cls._script
+
+    @staticmethod
+    def compute_wait(num_requests, duration, elapsed, current, previous,
+                     cost=1):
+        """Seconds until the weighted count leaves room for the request"""
+        remaining = duration - elapsed
+        if current + cost > num_requests or not previous:
+            return remaining
+        wait = duration * (1 - (num_requests - current - cost) / previous) - elapsed
+        return min(max(wait, 0), remaining)
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class UserRateThrottle(SlidingWindowRateThrottle):
     """
     Throttle for authenticated users
     100 requests per minute
     """
-    rate = '100/min'
+    scope = 'user'
+    default_rate = '100/min'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class NameEnquiryRateThrottle(UserRateThrottle):
+    """
+    Throttle for name enquiry, counting every account number looked up
+    200 account numbers per hour
+    """
+    scope = 'name_enquiry'
+    default_rate = '200/hour'
+
+    def get_request_cost(self, request):
+        if request.method != 'POST':
+            return 1
+        account_numbers = request.data.get('account_numbers')
+        if isinstance(account_numbers, list) and account_numbers:
+            return len(account_numbers)
+        return 1
 
 
-class MerchantRateThrottle(DRFUserRateThrottle):
+class MerchantRateThrottle(SlidingWindowRateThrottle):
     """
-    Throttle for merchant API requests
-    1000 requests per minute
+    Throttle for merchant API requests (all keys of a merchant)
+    1000 requests per minute unless the merchant has its own api_rate_limit
     """
-    rate = '1000/min'
+    scope = 'merchant'
+    default_rate = '1000/min'
 
+    def get_request_rate(self, request):
+        if request.user and request.user.is_authenticated:
+            return getattr(request.user, 'api_rate_limit', None) or self.rate
+        return self.rate
 
-class WebhookRateThrottle(AnonRateThrottle):
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class APIKeyRateThrottle(SlidingWindowRateThrottle):
+    """
+    Throttle for a single merchant API key
+    1000 requests per minute unless the key has its own rate_limit
+    """
+    scope = 'api_key'
+    default_rate = '1000/min'
+
+    def get_request_rate(self, request):
+        if isinstance(request.auth, CachedAPIKey) and request.auth.rate_limit:
+            return request.auth.rate_limit
+        return self.rate
+
+    def get_ident_key(self, request, view):
+        if isinstance(request.auth, CachedAPIKey):
+            return request.auth.id
+        return None
+
+
+class WebhookRateThrottle(SlidingWindowRateThrottle):
     """
     Throttle for webhook endpoints
     500 requests per minute
     """
-    rate = '500/min'
+    scope = 'webhook'
+    default_rate = '500/min'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
@@ -0,0 +1,177 @@
+"""
+Account number allocation
+Hand out unique 10-digit NUBAN account numbers from reserved blocks
+"""
+import threading
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction as db_transaction
+
+# CBN NUBAN weights for the 3-digit bank code followed by the 9-digit serial
+NUBAN_WEIGHTS = (3, 7, 3, 3, 7, 3, 3, 7, 3, 3, 7, 3)
+
+
+def get_bank_code():
+    return getattr(settings, 'NUBAN_BANK_CODE', '999')
+
+
+def nuban_check_digit(serial, bank_code=None):
+    """
+    Check digit for a 9-digit serial number
+
+    Args:
+        serial: 9-digit serial (str or int)
+        bank_code: 3-digit bank code (optional, uses settings if not provided)
+
+    Returns:
+        str: Single check digit
+    """
+    digits = f'{bank_code or get_bank_code()}{int(serial):09d}'
+    total = sum(int(digit) * weight for digit, weight in zip(digits, NUBAN_WEIGHTS))
+    return str((10 - total % 10) % 10)
+
+
+def make_account_number(serial, bank_code=None):
+    """Serial plus check digit: the 10-digit account number"""
+    return f'{int(serial):09d}{nuban_check_digit(serial, bank_code)}'
+
+
+def is_valid_account_number(account_number, bank_code=None):
+    """True if account_number is 10 digits with a valid check digit"""
+    if len(account_number) != 10 or not account_number.isdigit():
+        return False
+    return account_number[-1] == nuban_check_digit(account_number[:9], bank_code)
+
+
+class _Block:
+    __slots__ = ('token', 'next', 'end', 'confirmed')
+
+    def __init__(self, token, start, end, confirmed):
+        self.token = token
+        self.next = start
+        self.end = end
+        self.confirmed = confirmed
+
+
+class AccountNumberAllocator:
+    """
+    Allocate account numbers without a database round trip per number
+
+    Each process reserves a block of ACCOUNT_NUMBER_BLOCK_SIZE serials by
+    inserting an AccountNumberBlock row (the start is unique, so two
+    processes can never hold the same range) and then hands out numbers
+    from memory in ascending order, which keeps wallet inserts at the end
+    of the account_number index.
+
+    A block reserved inside a transaction that is later rolled back is
+    detected on the next allocation and discarded, so its serials are
+    never handed out by two processes.
+    """
+    MAX_RESERVE_ATTEMPTS = 10
+
+    def __init__(self):
+        self._block = None
+        self._lock = threading.Lock()
+
+    @property
+    def block_size(self):
+        return getattr(settings, 'ACCOUNT_NUMBER_BLOCK_SIZE', 100)
+
+    @property
+    def first_serial(self):
+        # Legacy random numbers all start with "20"
+        return getattr(settings, 'ACCOUNT_NUMBER_FIRST_SERIAL', 300000000)
+
+    def allocate_one(self):
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """
+        Allocate count account numbers
+
+        Requests larger than the process block get a dedicated block of
+        exactly that size.
+
+        Returns:
+            list: 10-digit account number strings
+        """
+        bank_code = get_bank_code()
+
+        with self._lock:
+            block = self._usable_block()
+            serials = []
+
+            if block is not None:
+                take = min(count, block.end - block.next)
+                serials.extend(range(block.next, block.next + take))
+                block.next += take
+
+            remaining = count - len(serials)
+            if remaining > self.block_size:
+                start, _ = self._reserve(remaining)
+                serials.extend(range(start, start + remaining))
+            elif remaining:
+                self._block = block = self._new_block(self.block_size)
+                serials.extend(range(block.next, block.next + remaining))
+                block.next += remaining
+
+        return [make_account_number(serial, bank_code) for serial in serials]
+
+    def _usable_block(self):
+        block = self._block
+        if block is None or block.next >= block.end:
+            return None
+
+        if not block.confirmed:
+            from ..models import AccountNumberBlock
+
+            # Visible either once committed or inside the reserving
+            # transaction; missing means it was rolled back
+            if not AccountNumberBlock.objects.filter(token=block.token).exists():
+                self._block = None
+                return None
+
+        return block
+
+    def _new_block(self, size):
+        start, token = self._reserve(size)
+        block = _Block(token, start, start + size, confirmed=False)
+
+        if connection.in_atomic_block:
+            db_transaction.on_commit(lambda: self._confirm(block))
+        else:
+            block.confirmed = True
+
+        return block
+
+    def _confirm(self, block):
+        block.confirmed = True
+
+    def _reserve(self, size):
+        """Insert the next free block; returns (start, token)"""
+        from ..models import AccountNumberBlock
+
+        for _ in range(self.MAX_RESERVE_ATTEMPTS):
+            start = self._next_start()
+            try:
+                with db_transaction.atomic():
+                    block = AccountNumberBlock.objects.create(
+                        start=start, size=size
+                    )
+            except IntegrityError:
+                continue
+            return block.start, block.token
+
+        raise RuntimeError('Could not reserve an account number block')
+
+    def _next_start(self):
+        from ..models import AccountNumberBlock
+
+        last = AccountNumberBlock.objects.order_by('-start').values(
+            'start', 'size'
+        ).first()
+        if last is None:
+            return self.first_serial
+        return max(last['start'] + last['size'], self.first_serial)
+
+
+account_number_allocator = AccountNumberAllocator()
@@ -7,7 +7,9 @@ import requests
 from decimal import Decimal
 from django.conf import settings
 from django.db import transaction as db_transaction
+from ..metrics import instrument_provider
 from ..models import BillPayment, Transaction
+from .fees import fee_engine
 from .payment import PaymentProcessor
 
 logger = logging.getLogger(__name__)
@@ -26,6 +28,7 @@ class BillPaymentService:
         )
         self.api_key = getattr(settings, 'BILL_PAYMENT_API_KEY', '')
 
+    @instrument_provider('bills')
     def _make_request(self, endpoint, data):
         """Make API request to bill payment provider"""
         url = f"{self.api_url}{endpoint}"
@@ -61,7 +64,6 @@ class AirtimeService(BillPaymentService):
         '9mobile': '9MOBILE'
     }
 
-    @db_transaction.atomic
     def purchase_airtime(self, user, wallet, provider, phone_number,
                          amount, transaction_pin):
         """
@@ -86,71 +88,72 @@ class AirtimeService(BillPaymentService):
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Validate amount
-            if amount < Decimal('50.00') or amount > Decimal('10000.00'):
-                raise ValueError(
-                    "Amount must be between ₦50 and ₦10,000"
+            with db_transaction.atomic():
+                # Validate amount
+                if amount < Decimal('50.00') or amount > Decimal('10000.00'):
+                    raise ValueError(
+                        "Amount must be between ₦50 and ₦10,000"
+                    )
+
+                # Debit wallet
+                debit_txn = PaymentProcessor.debit_wallet(
+                    wallet=wallet,
+                    amount=amount,
+                    fee=fee_engine.calculate('airtime', amount, user),
+                    description=f"Airtime purchase - {provider.upper()}",
+                    transaction_type='airtime',
+                    metadata={
+                        'provider': provider,
+                        'phone_number': phone_number
+                    }
                 )
 
-            # Debit wallet
-            debit_txn = PaymentProcessor.debit_wallet(
-                wallet=wallet,
-                amount=amount,
-                fee=Decimal('0.00'),
-                description=f"Airtime purchase - {provider.upper()}",
-                transaction_type='airtime',
-                metadata={
-                    'provider': provider,
-                    'phone_number': phone_number
-                }
-            )
+                # Call external API
+                api_response = self._make_request('/airtime/purchase', {
+                    'provider': self.PROVIDER_CODES.get(provider, provider),
+                    'phone_number': phone_number,
+                    'amount': float(amount),
+                    'reference': debit_txn.reference
+                })
+
+                # Create bill payment record
+                bill_payment = BillPayment.objects.create(
+                    user=user,
+                    transaction=debit_txn,
+                    bill_type='airtime',
+                    provider=provider,
+                    amount=amount,
+                    phone_number=phone_number,
+                    status='completed' if api_response.get('status') else 'failed',
+                    response_data=api_response
+                )
 
-            # Call external API
-            api_response = self._make_request('/airtime/purchase', {
-                'provider': self.PROVIDER_CODES.get(provider, provider),
-                'phone_number': phone_number,
-                'amount': float(amount),
-                'reference': debit_txn.reference
-            })
-
-            # Create bill payment record
-            bill_payment = BillPayment.objects.create(
-                user=user,
-                transaction=debit_txn,
-                bill_type='airtime',
-                provider=provider,
-                amount=amount,
-                phone_number=phone_number,
-                status='completed' if api_response.get('status') else 'failed',
-                response_data=api_response
-            )
+                # Update transaction if failed
+                if not api_response.get('status'):
+                    debit_txn.status = 'failed'
+                    debit_txn.save()
 
-            # Update transaction if failed
-            if not api_response.get('status'):
-                debit_txn.status = 'failed'
-                debit_txn.save()
+                    # Reverse transaction
+                    PaymentProcessor.reverse_transaction(
+                        debit_txn,
+                        'Airtime purchase failed'
+                    )
 
-                # Reverse transaction
-                PaymentProcessor.reverse_transaction(
-                    debit_txn,
-                    'Airtime purchase failed'
-                )
+                    raise ValueError(
+                        api_response.get('message', 'Airtime purchase failed')
+                    )
 
-                raise ValueError(
-                    api_response.get('message', 'Airtime purchase failed')
+                logger.info(
+                    f"Airtime purchase: {phone_number} - "
+                    f"{provider} - ₦{amount}"
                 )
 
-            logger.info(
-                f"Airtime purchase: {phone_number} - "
-                f"{provider} - ₦{amount}"
-            )
-
-            return {
-                'success': True,
-                'transaction': debit_txn,
-                'bill_payment': bill_payment,
-                'message': 'Airtime purchase successful'
-            }
+                return {
+                    'success': True,
+                    'transaction': debit_txn,
+                    'bill_payment': bill_payment,
+                    'message': 'Airtime purchase successful'
+                }
 
         except Exception as e:
             logger.error(f"Airtime purchase error: {e}")
@@ -179,7 +182,6 @@ class DataService(BillPaymentService):
         }
     }
 
-    @db_transaction.atomic
     def purchase_data(self, user, wallet, provider, phone_number,
                       plan_code, transaction_pin):
         """
@@ -204,74 +206,75 @@ class DataService(BillPaymentService):
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Get plan details
-            plans = self.DATA_PLANS.get(provider, {})
-            plan = plans.get(plan_code)
-
-            if not plan:
-                raise ValueError("Invalid data plan")
-
-            amount = plan['amount']
+            with db_transaction.atomic():
+                # Get plan details
+                plans = self.DATA_PLANS.get(provider, {})
+                plan = plans.get(plan_code)
+
+                if not plan:
+                    raise ValueError("Invalid data plan")
+
+                amount = plan['amount']
+
+                # Debit wallet
+                debit_txn = PaymentProcessor.debit_wallet(
+                    wallet=wallet,
+                    amount=amount,
+                    fee=fee_engine.calculate('data', amount, user),
+                    description=f"Data purchase - {plan['name']}",
+                    transaction_type='data',
+                    metadata={
+                        'provider': provider,
+                        'phone_number': phone_number,
+                        'plan_code': plan_code,
+                        'plan_name': plan['name']
+                    }
+                )
 
-            # Debit wallet
-            debit_txn = PaymentProcessor.debit_wallet(
-                wallet=wallet,
-                amount=amount,
-                fee=Decimal('0.00'),
-                description=f"Data purchase - {plan['name']}",
-                transaction_type='data',
-                metadata={
+                # Call external API
+                api_response = self._make_request('/data/purchase', {
                     'provider': provider,
                     'phone_number': phone_number,
                     'plan_code': plan_code,
-                    'plan_name': plan['name']
-                }
-            )
+                    'reference': debit_txn.reference
+                })
+
+                # Create bill payment record
+                bill_payment = BillPayment.objects.create(
+                    user=user,
+                    transaction=debit_txn,
+                    bill_type='data',
+                    provider=provider,
+                    amount=amount,
+                    phone_number=phone_number,
+                    status='completed' if api_response.get('status') else 'failed',
+                    response_data=api_response
+                )
 
-            # Call external API
-            api_response = self._make_request('/data/purchase', {
-                'provider': provider,
-                'phone_number': phone_number,
-                'plan_code': plan_code,
-                'reference': debit_txn.reference
-            })
-
-            # Create bill payment record
-            bill_payment = BillPayment.objects.create(
-                user=user,
-                transaction=debit_txn,
-                bill_type='data',
-                provider=provider,
-                amount=amount,
-                phone_number=phone_number,
-                status='completed' if api_response.get('status') else 'failed',
-                response_data=api_response
-            )
+                if not api_response.get('status'):
+                    debit_txn.status = 'failed'
+                    debit_txn.save()
 
-            if not api_response.get('status'):
-                debit_txn.status = 'failed'
-                debit_txn.save()
+                    PaymentProcessor.reverse_transaction(
+                        debit_txn,
+                        'Data purchase failed'
+                    )
 
-                PaymentProcessor.reverse_transaction(
-                    debit_txn,
-                    'Data purchase failed'
-                )
+                    raise ValueError(
+                        api_response.get('message', 'Data purchase failed')
+                    )
 
-                raise ValueError(
-                    api_response.get('message', 'Data purchase failed')
+                logger.info(
+                    f"Data purchase: {phone_number} - "
+                    f"{plan['name']} - ₦{amount}"
                 )
 
-            logger.info(
-                f"Data purchase: {phone_number} - "
-                f"{plan['name']} - ₦{amount}"
-            )
-
-            return {
-                'success': True,
-                'transaction': debit_txn,
-                'bill_payment': bill_payment,
-                'message': 'Data purchase successful'
-            }
+                return {
+                    'success': True,
+                    'transaction': debit_txn,
+                    'bill_payment': bill_payment,
+                    'message': 'Data purchase successful'
+                }
 
         except Exception as e:
             logger.error(f"Data purchase error: {e}")
@@ -304,7 +307,6 @@ class TVService(BillPaymentService):
 
         return api_response
 
-    @db_transaction.atomic
     def purchase_subscription(self, user, wallet, provider,
                               smartcard_number, plan_code,
                               transaction_pin):
@@ -330,83 +332,84 @@ class TVService(BillPaymentService):
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Validate smartcard
-            validation = self.validate_smartcard(provider, smartcard_number)
-            if not validation.get('status'):
-                raise ValueError("Invalid smartcard number")
-
-            customer_name = validation.get('customer_name', 'N/A')
-
-            # Get plan details
-            plans = self.TV_PLANS.get(provider, {})
-            plan = plans.get(plan_code)
-
-            if not plan:
-                raise ValueError("Invalid subscription plan")
-
-            amount = plan['amount']
+            with db_transaction.atomic():
+                # Validate smartcard
+                validation = self.validate_smartcard(provider, smartcard_number)
+                if not validation.get('status'):
+                    raise ValueError("Invalid smartcard number")
+
+                customer_name = validation.get('customer_name', 'N/A')
+
+                # Get plan details
+                plans = self.TV_PLANS.get(provider, {})
+                plan = plans.get(plan_code)
+
+                if not plan:
+                    raise ValueError("Invalid subscription plan")
+
+                amount = plan['amount']
+
+                # Debit wallet
+                debit_txn = PaymentProcessor.debit_wallet(
+                    wallet=wallet,
+                    amount=amount,
+                    fee=fee_engine.calculate('tv', amount, user),  # Service fee
+                    description=f"TV Subscription - {provider.upper()}",
+                    transaction_type='tv',
+                    metadata={
+                        'provider': provider,
+                        'smartcard_number': smartcard_number,
+                        'plan_code': plan_code,
+                        'plan_name': plan['name'],
+                        'customer_name': customer_name
+                    }
+                )
 
-            # Debit wallet
-            debit_txn = PaymentProcessor.debit_wallet(
-                wallet=wallet,
-                amount=amount,
-                fee=Decimal('100.00'),  # Service fee
-                description=f"TV Subscription - {provider.upper()}",
-                transaction_type='tv',
-                metadata={
+                # Call external API
+                api_response = self._make_request('/tv/subscribe', {
                     'provider': provider,
                     'smartcard_number': smartcard_number,
                     'plan_code': plan_code,
-                    'plan_name': plan['name'],
-                    'customer_name': customer_name
-                }
-            )
+                    'reference': debit_txn.reference
+                })
+
+                # Create bill payment record
+                bill_payment = BillPayment.objects.create(
+                    user=user,
+                    transaction=debit_txn,
+                    bill_type='tv',
+                    provider=provider,
+                    amount=amount,
+                    smartcard_number=smartcard_number,
+                    customer_name=customer_name,
+                    status='completed' if api_response.get('status') else 'failed',
+                    response_data=api_response
+                )
 
-            # Call external API
-            api_response = self._make_request('/tv/subscribe', {
-                'provider': provider,
-                'smartcard_number': smartcard_number,
-                'plan_code': plan_code,
-                'reference': debit_txn.reference
-            })
-
-            # Create bill payment record
-            bill_payment = BillPayment.objects.create(
-                user=user,
-                transaction=debit_txn,
-                bill_type='tv',
-                provider=provider,
-                amount=amount,
-                smartcard_number=smartcard_number,
-                customer_name=customer_name,
-                status='completed' if api_response.get('status') else 'failed',
-                response_data=api_response
-            )
+                if not api_response.get('status'):
+                    debit_txn.status = 'failed'
+                    debit_txn.save()
 
-            if not api_response.get('status'):
-                debit_txn.status = 'failed'
-                debit_txn.save()
+                    PaymentProcessor.reverse_transaction(
+                        debit_txn,
+                        'TV subscription failed'
+                    )
 
-                PaymentProcessor.reverse_transaction(
-                    debit_txn,
-                    'TV subscription failed'
-                )
+                    raise ValueError(
+                        api_response.get('message', 'Subscription failed')
+                    )
 
-                raise ValueError(
-                    api_response.get('message', 'Subscription failed')
+                logger.info(
+                    f"TV subscription: {smartcard_number} - "
+                    f"{provider} - ₦{amount}"
                 )
 
-            logger.info(
-                f"TV subscription: {smartcard_number} - "
-                f"{provider} - ₦{amount}"
-            )
-
-            return {
-                'success': True,
-                'transaction': debit_txn,
-                'bill_payment': bill_payment,
-                'message': 'Subscription successful'
-            }
+                return {
+                    'success': True,
+                    'transaction': debit_txn,
+                    'bill_payment': bill_payment,
+                    'message': 'Subscription successful'
+                }
 
         except Exception as e:
             logger.error(f"TV subscription error: {e}")
@@ -434,7 +437,6 @@ class ElectricityService(BillPaymentService):
 
         return api_response
 
-    @db_transaction.atomic
     def purchase_electricity(self, user, wallet, provider, meter_number,
                              meter_type, amount, transaction_pin):
         """
@@ -460,87 +462,88 @@ class ElectricityService(BillPaymentService):
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Validate meter
-            validation = self.validate_meter(
-                provider,
-                meter_number,
-                meter_type
-            )
-            if not validation.get('status'):
-                raise ValueError("Invalid meter number")
-
-            customer_name = validation.get('customer_name', 'N/A')
-
-            # Validate amount
-            if amount < Decimal('500.00'):
-                raise ValueError("Minimum amount is ₦500")
-
-            # Debit wallet
-            service_fee = Decimal('100.00')
-            debit_txn = PaymentProcessor.debit_wallet(
-                wallet=wallet,
-                amount=amount,
-                fee=service_fee,
-                description=f"Electricity - {provider.upper()}",
-                transaction_type='electricity',
-                metadata={
+            with db_transaction.atomic():
+                # Validate meter
+                validation = self.validate_meter(
+                    provider,
+                    meter_number,
+                    meter_type
+                )
+                if not validation.get('status'):
+                    raise ValueError("Invalid meter number")
+
+                customer_name = validation.get('customer_name', 'N/A')
+
+                # Validate amount
+                if amount < Decimal('500.00'):
+                    raise ValueError("Minimum amount is ₦500")
+
+                # Debit wallet
+                service_fee = fee_engine.calculate('electricity', amount, user)
+                debit_txn = PaymentProcessor.debit_wallet(
+                    wallet=wallet,
+                    amount=amount,
+                    fee=service_fee,
+                    description=f"Electricity - {provider.upper()}",
+                    transaction_type='electricity',
+                    metadata={
+                        'provider': provider,
+                        'meter_number': meter_number,
+                        'meter_type': meter_type,
+                        'customer_name': customer_name
+                    }
+                )
+
+                # Call external API
+                api_response = self._make_request('/electricity/vend', {
                     'provider': provider,
                     'meter_number': meter_number,
                     'meter_type': meter_type,
-                    'customer_name': customer_name
-                }
-            )
+                    'amount': float(amount),
+                    'reference': debit_txn.reference
+                })
+
+                token = api_response.get('token', '')
+
+                # Create bill payment record
+                bill_payment = BillPayment.objects.create(
+                    user=user,
+                    transaction=debit_txn,
+                    bill_type='electricity',
+                    provider=provider,
+                    amount=amount,
+                    meter_number=meter_number,
+                    customer_name=customer_name,
+                    token=token,
+                    status='completed' if api_response.get('status') else 'failed',
+                    response_data=api_response
+                )
 
-            # Call external API
-            api_response = self._make_request('/electricity/vend', {
-                'provider': provider,
-                'meter_number': meter_number,
-                'meter_type': meter_type,
-                'amount': float(amount),
-                'reference': debit_txn.reference
-            })
-
-            token = api_response.get('token', '')
-
-            # Create bill payment record
-            bill_payment = BillPayment.objects.create(
-                user=user,
-                transaction=debit_txn,
-                bill_type='electricity',
-                provider=provider,
-                amount=amount,
-                meter_number=meter_number,
-                customer_name=customer_name,
-                token=token,
-                status='completed' if api_response.get('status') else 'failed',
-                response_data=api_response
-            )
+                if not api_response.get('status'):
+                    debit_txn.status = 'failed'
+                    debit_txn.save()
 
-            if not api_response.get('status'):
-                debit_txn.status = 'failed'
-                debit_txn.save()
+                    PaymentProcessor.reverse_transaction(
+                        debit_txn,
+                        'Electricity payment failed'
+                    )
 
-                PaymentProcessor.reverse_transaction(
-                    debit_txn,
-                    'Electricity payment failed'
-                )
+                    raise ValueError(
+                        api_response.get('message', 'Payment failed')
+                    )
 
-                raise ValueError(
-                    api_response.get('message', 'Payment failed')
+                logger.info(
+                    f"Electricity payment: {meter_number} - "
+                    f"{provider} - ₦{amount}"
                 )
 
-            logger.info(
-                f"Electricity payment: {meter_number} - "
-                f"{provider} - ₦{amount}"
-            )
-
-            return {
-                'success': True,
-                'transaction': debit_txn,
-                'bill_payment': bill_payment,
-                'token': token,
-                'message': 'Payment successful'
-            }
+                return {
+                    'success': True,
+                    'transaction': debit_txn,
+                    'bill_payment': bill_payment,
+                    'token': token,
+                    'message': 'Payment successful'
+                }
 
         except Exception as e:
             logger.error(f"Electricity payment error: {e}")
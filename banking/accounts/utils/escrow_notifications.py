@@ -0,0 +1,213 @@
+"""
+Escrow notifications
+Deliver escrow events to the TRINITY escrow service in the background
+"""
+import logging
+import requests
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from ..models import EscrowAccount, EscrowNotification
+from .retry_worker import RetryWorker
+
+logger = logging.getLogger(__name__)
+
+
+class EscrowNotifier(RetryWorker):
+    """
+    Send EscrowNotification rows to TRINITY outside the request
+
+    queue() writes the row inside the escrow's own transaction and, once
+    it commits, hands it to the worker thread, so no wallet lock is ever
+    held across the HTTP call; `manage.py send_escrow_notifications`
+    retries failed deliveries. Events for one escrow are sent in order:
+    a notification waits while an earlier one is pending, and fails once
+    an earlier one has failed, so TRINITY never sees a release before the
+    escrow was created.
+    """
+    model = EscrowNotification
+    settings_prefix = 'ESCROW_NOTIFICATION'
+    thread_name = 'escrow-notifier'
+    success_key = 'sent'
+    default_max_attempts = 8
+    default_retry_delay = 30
+    default_lease = 60
+
+    endpoints = {
+        'created': '/api/escrow/create/',
+        'released': '/api/escrow/release/',
+        'refunded': '/api/escrow/refund/',
+        'disputed': '/api/escrow/dispute/',
+    }
+
+    @property
+    def base_url(self):
+        return getattr(settings, 'TRINITY_API_URL', '')
+
+    @property
+    def service_key(self):
+        return getattr(settings, 'SHARED_SERVICE_SECRET', '')
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'ESCROW_NOTIFICATION_TIMEOUT', 10)
+
+    def queue(self, escrow, event, payload):
+        """
+        Write a notification and send it after the transaction commits
+
+        Returns:
+            EscrowNotification: Created row
+        """
+        notification = EscrowNotification.objects.create(
+            escrow=escrow,
+            event=event,
+            payload=payload
+        )
+        db_transaction.on_commit(lambda: self.submit([notification.id]))
+        return notification
+
+    def queue_many(self, escrows, event, payloads):
+        """
+        Bulk-write one notification per escrow and send them after commit
+
+        Returns:
+            list: Created rows
+        """
+        notifications = EscrowNotification.objects.bulk_create([
+            EscrowNotification(escrow=escrow, event=event, payload=payload)
+            for escrow, payload in zip(escrows, payloads)
+        ])
+        notification_ids = [
+            notification.id for notification in notifications
+            if notification.id is not None
+        ]
+        if notification_ids:
+            db_transaction.on_commit(lambda: self.submit(notification_ids))
+        return notifications
+
+    @staticmethod
+    def settlement_payload(escrow, reference, settlement_reference=None):
+        """Payload for a released, refunded or disputed event"""
+        return {
+            'escrow_ref': str(escrow.id),
+            'escrow_id': escrow.external_id,
+            'status': escrow.status,
+            'amount': str(escrow.amount),
+            'transaction_ref': reference,
+            'settlement_ref': settlement_reference
+        }
+
+    @staticmethod
+    def earlier(*statuses):
+        """Earlier notifications for the same escrow in one of statuses"""
+        return EscrowNotification.objects.filter(
+            escrow_id=OuterRef('escrow_id'),
+            id__lt=OuterRef('id'),
+            status__in=statuses
+        )
+
+    def claimable(self):
+        return super().claimable().filter(
+            ~Exists(self.earlier('pending', 'failed'))
+        )
+
+    def attempt(self, notification_id):
+        return self.deliver(notification_id)
+
+    def deliver(self, notification_id):
+        """
+        Send one pending notification
+
+        Returns:
+            bool: True if TRINITY accepted it
+        """
+        if not self.claim(notification_id):
+            self.fail_blocked(notification_id)
+            return False
+
+        notification = EscrowNotification.objects.get(id=notification_id)
+
+        payload = notification.payload
+        if notification.event != 'created' and not payload.get('escrow_id'):
+            # Queued before TRINITY acknowledged the escrow
+            payload = dict(payload, escrow_id=EscrowAccount.objects.filter(
+                id=notification.escrow_id
+            ).values_list('external_id', flat=True).first())
+
+        try:
+            response = requests.post(
+                f"{self.base_url}{self.endpoints[notification.event]}",
+                json=payload,
+                headers={
+                    'X-Service-Key': self.service_key,
+                    'Content-Type': 'application/json'
+                },
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            result = {'success': False, 'message': str(e)}
+
+        if not result.get('success'):
+            self.record_failure(notification, result.get('message') or 'Unknown error')
+            return False
+
+        notification.status = 'sent'
+        notification.response = result
+        notification.last_error = None
+        notification.sent_at = timezone.now()
+        notification.save(update_fields=[
+            'status', 'response', 'last_error', 'sent_at', 'updated_at'
+        ])
+
+        external_id = result.get('escrow_id')
+        if notification.event == 'created' and external_id:
+            EscrowAccount.objects.filter(id=notification.escrow_id).update(
+                external_id=str(external_id)
+            )
+
+        logger.info(
+            f"Escrow {notification.event} sent to TRINITY: {notification.escrow_id}"
+        )
+        return True
+
+    def fail_blocked(self, notification_id):
+        """Fail a notification that can never be sent in order"""
+        if EscrowNotification.objects.filter(
+            Exists(self.earlier('failed')),
+            id=notification_id,
+            status='pending'
+        ).update(
+            status='failed',
+            last_error='An earlier event for this escrow failed',
+            updated_at=timezone.now()
+        ):
+            logger.warning(
+                f"Escrow notification {notification_id} failed: "
+                f"an earlier event for its escrow failed"
+            )
+
+    def record_failure(self, notification, message):
+        super().record_failure(notification, message)
+        if notification.status == 'failed':
+            # Later events would reach TRINITY out of order
+            EscrowNotification.objects.filter(
+                escrow_id=notification.escrow_id,
+                id__gt=notification.id,
+                status='pending'
+            ).update(
+                status='failed',
+                last_error=f'Earlier {notification.event} notification failed',
+                updated_at=timezone.now()
+            )
+
+        logger.warning(
+            f"Escrow {notification.event} notification failed for "
+            f"{notification.escrow_id} (attempt {notification.attempts}): {message}"
+        )
+
+
+escrow_notifier = EscrowNotifier()
@@ -0,0 +1,157 @@
+"""
+Escrow auto-release
+Release held escrows to sellers in batches once release_at passes
+"""
+import logging
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from ..models import EscrowAccount, Transaction, Wallet
+from .escrow_notifications import escrow_notifier
+from .payment import PaymentProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class EscrowReleaseScheduler:
+    """
+    Release due escrows in set-based batches
+
+    Each batch runs in one database transaction: due escrows are claimed
+    with SELECT ... FOR UPDATE SKIP LOCKED, so several workers take
+    disjoint batches. Sellers are credited through
+    PaymentProcessor.credit_wallets (one UPDATE for the batch, bulk
+    inserted transactions), the escrows are bulk-updated and a 'released'
+    notification for TRINITY is bulk-written per escrow. Disputed
+    escrows are never picked up; a release webhook arriving later is a
+    no-op. Escrows whose seller has no wallet stay held, so one of them
+    cannot roll back the batch for everyone else.
+    """
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'ESCROW_RELEASE_BATCH_SIZE', 500)
+
+    def due(self, now=None):
+        return EscrowAccount.objects.filter(
+            status='held',
+            release_at__lte=now or timezone.now(),
+            seller__wallet__isnull=False
+        )
+
+    def release_batch(self, batch_size=None):
+        """
+        Release the next batch of due escrows
+
+        Returns:
+            dict: released, sellers, amount (total credited)
+        """
+        now = timezone.now()
+
+        with db_transaction.atomic():
+            escrows = list(
+                self.due(now)
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('release_at')
+                .only(
+                    'id', 'seller_id', 'amount', 'balance', 'product_id',
+                    'transaction_id', 'external_id'
+                )
+                [:batch_size or self.batch_size]
+            )
+            if not escrows:
+                return {'released': 0, 'sellers': 0, 'amount': Decimal('0.00')}
+
+            wallet_ids = dict(
+                Wallet.objects.filter(
+                    user_id__in={escrow.seller_id for escrow in escrows}
+                ).values_list('user_id', 'id')
+            )
+            # A wallet removed since the escrow was claimed
+            skipped = [
+                escrow for escrow in escrows if escrow.seller_id not in wallet_ids
+            ]
+            if skipped:
+                logger.error(
+                    f"Escrow auto-release: sellers have no wallet, leaving "
+                    f"{len(skipped)} escrows held: "
+                    f"{[str(escrow.id) for escrow in skipped[:20]]}"
+                )
+                escrows = [
+                    escrow for escrow in escrows if escrow.seller_id in wallet_ids
+                ]
+                if not escrows:
+                    return {'released': 0, 'sellers': 0, 'amount': Decimal('0.00')}
+
+            purchases = Transaction.objects.in_bulk(
+                [escrow.transaction_id for escrow in escrows]
+            )
+
+            releases = PaymentProcessor.credit_wallets(
+                (
+                    wallet_ids[escrow.seller_id],
+                    escrow.balance,
+                    f'Escrow auto-release for product {escrow.product_id}',
+                    'escrow_release',
+                    {
+                        'escrow_id': str(escrow.id),
+                        'purchase_reference': purchases[escrow.transaction_id].reference,
+                        'auto_release': True
+                    }
+                )
+                for escrow in escrows
+            )
+
+            for escrow, release in zip(escrows, releases):
+                escrow.status = 'released'
+                escrow.balance = Decimal('0.00')
+                escrow.settlement_transaction = release
+                escrow.settled_at = now
+                escrow.updated_at = now
+
+                purchase = purchases[escrow.transaction_id]
+                purchase.metadata['escrow_status'] = 'released'
+                if purchase.status == 'escrowed':
+                    # Purchases escrowed before EscrowAccount existed
+                    purchase.status = 'completed'
+                purchase.updated_at = now
+
+            EscrowAccount.objects.bulk_update(escrows, [
+                'status', 'balance', 'settlement_transaction', 'settled_at', 'updated_at'
+            ])
+            Transaction.objects.bulk_update(
+                list(purchases.values()), ['status', 'metadata', 'updated_at']
+            )
+            escrow_notifier.queue_many(escrows, 'released', [
+                escrow_notifier.settlement_payload(
+                    escrow, purchases[escrow.transaction_id].reference, release.reference
+                )
+                for escrow, release in zip(escrows, releases)
+            ])
+
+        amount = sum((release.amount for release in releases), Decimal('0.00'))
+        logger.info(
+            f"Escrow auto-release: {len(escrows)} escrows, "
+            f"{len(wallet_ids)} sellers, ₦{amount}"
+        )
+
+        return {'released': len(escrows), 'sellers': len(wallet_ids), 'amount': amount}
+
+    def run(self, batch_size=None, max_batches=None):
+        """
+        Release batches until nothing is due
+
+        Yields:
+            dict: release_batch() result for each non-empty batch
+        """
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            result = self.release_batch(batch_size)
+            if not result['released']:
+                return
+            batches += 1
+            yield result
+
+
+escrow_release_scheduler = EscrowReleaseScheduler()
@@ -0,0 +1,232 @@
+"""
+Fee engine
+Calculate transaction fees from FeeRule rule sets compiled in memory
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from ..models import FeeRule
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+UNLIMITED = Decimal('Infinity')
+VERSION_KEY = 'fees:version'
+
+# Built-in schedule, used for fee types without a matching rule in the
+# database: (max_amount, flat_fee, percentage, min_fee, max_fee)
+DEFAULT_RULES = {
+    'transfer': [
+        (Decimal('5000.00'), Decimal('10.00'), Decimal('0'), None, None),
+        (Decimal('50000.00'), Decimal('25.00'), Decimal('0'), None, None),
+        (None, Decimal('50.00'), Decimal('0'), None, None),
+    ],
+    'withdrawal': [
+        (None, Decimal('50.00'), Decimal('0'), None, None),
+    ],
+    'payment': [
+        (None, Decimal('0.00'), Decimal('1.5'), None, Decimal('2000.00')),
+    ],
+    'tv': [
+        (None, Decimal('100.00'), Decimal('0'), None, None),
+    ],
+    'electricity': [
+        (None, Decimal('100.00'), Decimal('0'), None, None),
+    ],
+}
+
+
+class FeeTable:
+    """One compiled rule set: tier upper bounds and their fee terms"""
+
+    __slots__ = ('bounds', 'tiers')
+
+    def __init__(self, rules):
+        rules = sorted(
+            rules, key=lambda rule: UNLIMITED if rule[0] is None else rule[0]
+        )
+        self.bounds = [UNLIMITED if rule[0] is None else rule[0] for rule in rules]
+        self.tiers = [
+            (flat_fee, percentage / 100 if percentage else None, min_fee, max_fee)
+            for _, flat_fee, percentage, min_fee, max_fee in rules
+        ]
+
+    def fee(self, amount):
+        """Fee for amount, or None if it is above the last tier"""
+        index = bisect_left(self.bounds, amount)
+        if index == len(self.bounds):
+            return None
+
+        fee, rate, min_fee, max_fee = self.tiers[index]
+        if rate is not None:
+            fee = (fee + amount * rate).quantize(CENT)
+        if min_fee is not None and fee < min_fee:
+            return min_fee
+        if max_fee is not None and fee > max_fee:
+            return max_fee
+        return fee
+
+
+class FeeSchedule:
+    """Compiled rule sets for one fee type, most specific first"""
+
+    __slots__ = ('users', 'user_types', 'defaults')
+
+    def __init__(self):
+        self.users = {}
+        self.user_types = {}
+        self.defaults = []
+
+    def fee(self, amount, user):
+        if user is not None:
+            if self.users:
+                table = self.users.get(user.pk)
+                if table is not None:
+                    fee = table.fee(amount)
+                    if fee is not None:
+                        return fee
+            if self.user_types:
+                table = self.user_types.get(user.user_type)
+                if table is not None:
+                    fee = table.fee(amount)
+                    if fee is not None:
+                        return fee
+
+        for table in self.defaults:
+            fee = table.fee(amount)
+            if fee is not None:
+                return fee
+        return ZERO
+
+
+class FeeEngine:
+    """
+    Look up fees without touching the database
+
+    Active FeeRule rows are loaded in one query and compiled into a
+    FeeTable per (fee_type, scope), and a fee is a couple of dict lookups
+    plus a bisect over the tier bounds. Rules for the user win over rules for
+    their user type, then the default rules, then DEFAULT_RULES; a rule
+    set that does not cover the amount falls through to the next.
+
+    Saving or deleting a FeeRule recompiles the tables in this process
+    and bumps a version in the shared cache, which other processes check
+    at most every FEE_RULES_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._tables = None
+        self._version = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def check_interval(self):
+        return getattr(settings, 'FEE_RULES_CHECK_INTERVAL', 5)
+
+    def tables(self):
+        if time.monotonic() < self._expires_at:
+            return self._tables
+
+        with self._lock:
+            version = cache.get(VERSION_KEY)
+            if self._tables is None or version != self._version:
+                self._tables = self.compile()
+                self._version = version
+            self._expires_at = time.monotonic() + self.check_interval
+        return self._tables
+
+    @staticmethod
+    def compile():
+        """Build a FeeSchedule per fee type from active FeeRules and DEFAULT_RULES"""
+        rule_sets = defaultdict(list)
+        for rule in FeeRule.objects.filter(is_active=True).values_list(
+            'fee_type', 'user_id', 'user_type', 'max_amount', 'flat_fee',
+            'percentage', 'min_fee', 'max_fee'
+        ):
+            fee_type, user_id, user_type = rule[:3]
+            if user_id is not None:
+                scope = ('user', user_id)
+            elif user_type:
+                scope = ('user_type', user_type)
+            else:
+                scope = ('default', None)
+            rule_sets[(fee_type, scope)].append(rule[3:])
+
+        schedules = defaultdict(FeeSchedule)
+        for (fee_type, (kind, value)), rules in rule_sets.items():
+            schedule = schedules[fee_type]
+            if kind == 'user':
+                schedule.users[value] = FeeTable(rules)
+            elif kind == 'user_type':
+                schedule.user_types[value] = FeeTable(rules)
+            else:
+                schedule.defaults.append(FeeTable(rules))
+
+        for fee_type, rules in DEFAULT_RULES.items():
+            schedules[fee_type].defaults.append(FeeTable(rules))
+
+        return dict(schedules)
+
+    def invalidate(self):
+        """Recompile on next use, here and (via the cache) in other processes"""
+        # A version no cache value can match; the tables stay usable by
+        # other threads until the recompile replaces them
+        self._version = object()
+        self._expires_at = 0.0
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+        except Exception as e:
+            logger.error(f"Fee rule version bump error: {e}")
+
+    def invalidate_on_commit(self):
+        db_transaction.on_commit(self.invalidate)
+
+    def calculate(self, fee_type, amount, user=None):
+        """
+        Fee for a transaction
+
+        Args:
+            fee_type: FeeRule.FEE_TYPES key
+            amount: Decimal transaction amount
+            user: Paying user or merchant (for overrides)
+
+        Returns:
+            Decimal: Fee, 0.00 if no rule applies
+        """
+        schedule = self.tables().get(fee_type)
+        if schedule is None:
+            return ZERO
+        return schedule.fee(amount, user)
+
+    def quote(self, fee_type, amount, user=None):
+        """
+        Fee and resulting totals before posting
+
+        Returns:
+            dict: type, amount, fee, total_amount (debited) and, for
+                gateway payments, merchant_amount (settled)
+        """
+        fee = self.calculate(fee_type, amount, user)
+        quote = {
+            'type': fee_type,
+            'amount': amount,
+            'fee': fee,
+            'total_amount': amount + fee,
+        }
+        if fee_type == 'payment':
+            quote['total_amount'] = amount
+            quote['merchant_amount'] = amount - fee
+        return quote
+
+
+fee_engine = FeeEngine()
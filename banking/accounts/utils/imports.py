@@ -0,0 +1,335 @@
+"""
+Bulk user import
+Onboard partner customers from CSV or JSONL in chunks
+"""
+import csv
+import json
+import logging
+import os
+import re
+import time
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import IntegrityError, transaction as db_transaction
+from ..models import User, Wallet, Profile
+from .provisioning import virtual_account_provisioner
+
+logger = logging.getLogger(__name__)
+
+PHONE_NUMBER_RE = re.compile(r'^(\+234|234|0)[789][01]\d{8}$')
+
+
+class UserImporter:
+    """
+    Import users with their wallets and profiles in bulk
+
+    Rows are read lazily and written in chunks: each chunk is one
+    transaction with a bulk_create per model, so no post_save signals run.
+    Virtual accounts are queued as pending rows for
+    `manage.py provision_virtual_accounts`. After every committed chunk
+    the number of consumed rows is written to a checkpoint file, and a
+    rerun with resume=True skips them. Rejected rows are appended to a
+    JSONL error report as each chunk commits; only counts stay in memory. Rows whose username, email or
+    phone number already exist are skipped, so reruns are also safe
+    without a checkpoint.
+
+    Columns: username, phone_number (required), email, first_name,
+    last_name, address, user_type and password_hash (a hash from one of
+    the PASSWORD_HASHERS). Plain-text passwords are rejected: hashing
+    them here would cost a full PBKDF2 run per row. Users without a hash
+    get an unusable password.
+    """
+    CHUNK_SIZE = 1000
+    MAX_CHUNK_RETRIES = 3
+    USER_TYPES = {choice for choice, _ in User.USER_TYPES}
+
+    def __init__(self, path, file_format=None, chunk_size=None,
+                 checkpoint_path=None, error_path=None, provision=True):
+        self.path = path
+        self.file_format = file_format or self.detect_format(path)
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.checkpoint_path = checkpoint_path or f'{path}.checkpoint.json'
+        self.error_path = error_path or f'{path}.errors.jsonl'
+        self.provision = provision
+        self.stats = {'rows': 0, 'created': 0, 'skipped': 0, 'invalid': 0}
+        self.errors = []
+
+    @staticmethod
+    def detect_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        if extension == '.csv':
+            return 'csv'
+        raise ValueError(f"Cannot detect import format for {path}")
+
+    def iter_rows(self):
+        """Yield (row_number, dict) lazily from the input file"""
+        with open(self.path, newline='', encoding='utf-8') as handle:
+            if self.file_format == 'csv':
+                for row_number, row in enumerate(csv.DictReader(handle), 1):
+                    yield row_number, row
+            elif self.file_format == 'jsonl':
+                for row_number, line in enumerate(handle, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield row_number, json.loads(line)
+                    except ValueError:
+                        yield row_number, None
+            else:
+                raise ValueError(f"Unsupported import format: {self.file_format}")
+
+    def iter_chunks(self, skip=0):
+        chunk = []
+        for row_number, row in self.iter_rows():
+            if row_number <= skip:
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, last_row):
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump({
+                'last_row': last_row,
+                'stats': self.stats,
+                'error_offset': self.error_offset()
+            }, handle)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def error_offset(self):
+        try:
+            return os.path.getsize(self.error_path)
+        except FileNotFoundError:
+            return 0
+
+    def reset_errors(self, offset=0):
+        """Drop error report lines written after offset"""
+        if offset or os.path.exists(self.error_path):
+            with open(self.error_path, 'a', encoding='utf-8') as handle:
+                handle.truncate(offset)
+
+    def flush_errors(self):
+        """Append the current chunk's errors to the report and forget them"""
+        if not self.errors:
+            return
+        with open(self.error_path, 'a', encoding='utf-8') as handle:
+            for error in self.errors:
+                handle.write(json.dumps(error) + '\n')
+        self.errors.clear()
+
+    def iter_errors(self):
+        """Yield rejected rows from the error report"""
+        try:
+            with open(self.error_path, encoding='utf-8') as handle:
+                for line in handle:
+                    yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def run(self, resume=False, on_chunk=None):
+        """
+        Import the file
+
+        Args:
+            resume: Continue after the last checkpointed row
+            on_chunk: Optional callback(stats, rows_per_second) per chunk
+
+        Returns:
+            dict: Row counts plus elapsed seconds and rows per second
+        """
+        skip = 0
+        error_offset = 0
+        if resume:
+            checkpoint = self.load_checkpoint()
+            if checkpoint:
+                skip = checkpoint['last_row']
+                self.stats.update(checkpoint.get('stats', {}))
+                error_offset = checkpoint.get('error_offset', 0)
+        self.reset_errors(error_offset)
+
+        started = time.perf_counter()
+        rows_this_run = 0
+
+        for chunk in self.iter_chunks(skip=skip):
+            self.import_chunk(chunk)
+            rows_this_run += len(chunk)
+            self.stats['rows'] += len(chunk)
+            self.flush_errors()
+            self.save_checkpoint(chunk[-1][0])
+
+            if on_chunk:
+                elapsed = time.perf_counter() - started
+                on_chunk(self.stats, rows_this_run / elapsed if elapsed else 0)
+
+        elapsed = time.perf_counter() - started
+        return dict(
+            self.stats,
+            elapsed=elapsed,
+            rows_per_second=rows_this_run / elapsed if elapsed else 0
+        )
+
+    def import_chunk(self, chunk):
+        """Validate and insert one chunk, retrying on unique conflicts"""
+        rows = []
+        for row_number, row in chunk:
+            error = self.validate_row(row)
+            if error:
+                self.record_error(row_number, error)
+            else:
+                rows.append(self.clean_row(row))
+
+        for attempt in range(1, self.MAX_CHUNK_RETRIES + 1):
+            try:
+                created, skipped = self.insert(rows)
+                break
+            except IntegrityError as e:
+                # A concurrent signup race; the chunk is rolled back, so
+                # recompute existing users and retry
+                if attempt == self.MAX_CHUNK_RETRIES:
+                    raise
+                logger.warning(f"User import chunk conflict, retrying: {e}")
+
+        self.stats['created'] += created
+        self.stats['skipped'] += skipped
+
+    def validate_row(self, row):
+        if not isinstance(row, dict):
+            return 'Malformed row'
+        if not (row.get('username') or '').strip():
+            return 'Missing username'
+        if not PHONE_NUMBER_RE.match((row.get('phone_number') or '').strip()):
+            return 'Invalid Nigerian phone number format'
+        user_type = (row.get('user_type') or 'user').strip()
+        if user_type not in self.USER_TYPES:
+            return f'Invalid user_type: {user_type}'
+        if row.get('password'):
+            return 'Plain-text password not accepted; supply password_hash'
+        password_hash = (row.get('password_hash') or '').strip()
+        if password_hash:
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                return 'Unrecognised password_hash'
+        return None
+
+    @staticmethod
+    def clean_row(row):
+        return {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in row.items()
+        }
+
+    def record_error(self, row_number, error):
+        self.stats['invalid'] += 1
+        self.errors.append({'row': row_number, 'error': error})
+
+    @db_transaction.atomic
+    def insert(self, rows):
+        """
+        Bulk create users, wallets and profiles for new rows
+
+        Returns:
+            tuple: (created, skipped)
+        """
+        rows, duplicates = self.exclude_existing(rows)
+        skipped = len(duplicates)
+
+        if not rows:
+            return 0, skipped
+
+        users = [self.build_user(row) for row in rows]
+        User.objects.bulk_create(users, batch_size=self.chunk_size)
+
+        account_numbers = Wallet.generate_account_numbers(len(users))
+        Wallet.objects.bulk_create(
+            [
+                Wallet(user=user, account_number=account_number)
+                for user, account_number in zip(users, account_numbers)
+            ],
+            batch_size=self.chunk_size
+        )
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user=user,
+                    name=f"{user.first_name} {user.last_name}",
+                    phone_number=user.phone_number
+                )
+                for user in users
+            ],
+            batch_size=self.chunk_size
+        )
+
+        if self.provision:
+            virtual_account_provisioner.queue(
+                [user.pk for user in users], submit=False
+            )
+
+        return len(users), skipped
+
+    def exclude_existing(self, rows):
+        """Split rows into (new, duplicate) by username, email and phone"""
+        usernames = {row['username'] for row in rows}
+        phone_numbers = {row['phone_number'] for row in rows}
+        emails = {row['email'] for row in rows if row.get('email')}
+
+        taken_usernames = set(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', flat=True))
+        taken_phones = set(User.objects.filter(
+            phone_number__in=phone_numbers
+        ).values_list('phone_number', flat=True))
+        taken_phones |= set(Profile.objects.filter(
+            phone_number__in=phone_numbers
+        ).values_list('phone_number', flat=True))
+        taken_emails = set(User.objects.filter(
+            email__in=emails
+        ).values_list('email', flat=True)) if emails else set()
+
+        new_rows, duplicates = [], []
+        for row in rows:
+            email = row.get('email')
+            if (
+                row['username'] in taken_usernames
+                or row['phone_number'] in taken_phones
+                or (email and email in taken_emails)
+            ):
+                duplicates.append(row)
+                continue
+            # Also catch duplicates within the file
+            taken_usernames.add(row['username'])
+            taken_phones.add(row['phone_number'])
+            if email:
+                taken_emails.add(email)
+            new_rows.append(row)
+
+        return new_rows, duplicates
+
+    @staticmethod
+    def build_user(row):
+        # None gives an unusable password (no hashing work)
+        password = row.get('password_hash') or make_password(None)
+
+        return User(
+            username=row['username'],
+            email=row.get('email') or '',
+            phone_number=row['phone_number'],
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            address=row.get('address') or None,
+            user_type=row.get('user_type') or 'user',
+            password=password
+        )
@@ -0,0 +1,444 @@
+"""
+Ledger to blockchain sync
+Mirror wallet postings into the core_ledger chain through an outbox
+"""
+import logging
+import sys
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from ..models import LedgerOutbox, LedgerSyncCheckpoint, Transaction, Wallet
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'core_ledger'
+
+
+def get_ledger_chain():
+    """core_ledger binding for this process, loaded on first use"""
+    path = str(getattr(settings, 'CORE_LEDGER_PATH', ''))
+    if path and path not in sys.path:
+        sys.path.append(path)
+
+    from blockchain_bindings import get_blockchain
+    return get_blockchain(
+        difficulty=getattr(settings, 'LEDGER_CHAIN_DIFFICULTY', 4),
+        path=str(getattr(settings, 'LEDGER_CHAIN_PATH', '')) or None,
+        snapshot_interval=getattr(settings, 'LEDGER_CHAIN_SNAPSHOT_INTERVAL', 100)
+    )
+
+
+class LedgerSync:
+    """
+    Mirror wallet postings into core_ledger
+
+    Every balance change writes a LedgerOutbox row inside the posting's
+    own database transaction (record), so the two commit or roll back
+    together. sync_batch() takes unsynced rows in id order, submits them
+    to the chain in one native call, mines one block for the batch and
+    stamps the rows' synced_at in the same transaction as the checkpoint.
+    Selecting on synced_at rather than an id high-water mark picks up
+    rows whose transaction committed after a higher id was synced. Each
+    account number is a chain address: credits are issued to it, debits
+    spend from it to the settlement address.
+
+    Balances from before the outbox existed are brought onto the chain by
+    backfill_opening_balances(), one 'opening' row per wallet, which
+    sync_batch() sends ahead of any other unsynced row.
+
+    The chain is stored under LEDGER_CHAIN_PATH by the single sync
+    worker and reopened on restart. The checkpoint is the source of truth:
+    blocks mined after the last checkpoint commit (a crash or a rolled
+    back batch) are truncated before the next batch, and a chain shorter
+    than the checkpoint (lost store, in-memory chain) is truncated to
+    genesis and rebuilt from the start of the outbox.
+    """
+
+    def __init__(self, chain=None):
+        self._chain = chain
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            self._chain = get_ledger_chain()
+        return self._chain
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'LEDGER_SYNC_ENABLED', True)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'LEDGER_SYNC_BATCH_SIZE', 500)
+
+    @property
+    def issuer_address(self):
+        return getattr(settings, 'LEDGER_CHAIN_ISSUER_ADDRESS', 'gax_ledger')
+
+    @property
+    def settlement_address(self):
+        return getattr(
+            settings, 'LEDGER_CHAIN_SETTLEMENT_ADDRESS', 'gax_settlement'
+        )
+
+    def record(self, txn, entry_type, amount):
+        """
+        Write the outbox row for a posting
+
+        Call inside the posting's atomic block.
+
+        Args:
+            txn: Transaction that moved the balance
+            entry_type: 'credit' or 'debit'
+            amount: Amount the wallet balance moved by
+
+        Returns:
+            LedgerOutbox: Created row, or None if sync is disabled
+        """
+        if not self.enabled:
+            return None
+
+        return LedgerOutbox.objects.create(
+            transaction=txn,
+            account_number=txn.wallet.account_number,
+            entry_type=entry_type,
+            amount=amount
+        )
+
+    def record_many(self, entries):
+        """
+        Write outbox rows for a batch of postings in one insert
+
+        Args:
+            entries: (txn, entry_type, amount) tuples; txn.wallet must be
+                loaded
+
+        Returns:
+            list: Created rows (empty if sync is disabled)
+        """
+        if not self.enabled:
+            return []
+
+        return LedgerOutbox.objects.bulk_create([
+            LedgerOutbox(
+                transaction=txn,
+                account_number=txn.wallet.account_number,
+                entry_type=entry_type,
+                amount=amount
+            )
+            for txn, entry_type, amount in entries
+        ])
+
+    def get_checkpoint(self, lock=False):
+        queryset = LedgerSyncCheckpoint.objects.all()
+        if lock:
+            # A second worker skips the batch instead of waiting for it
+            queryset = queryset.select_for_update(skip_locked=True)
+        checkpoint = queryset.filter(name=CHECKPOINT_NAME).first()
+        if checkpoint is None and not lock:
+            checkpoint = LedgerSyncCheckpoint(name=CHECKPOINT_NAME)
+        return checkpoint
+
+    def backfill_opening_balances(self, chunk_size=1000):
+        """
+        Write an opening row for balances the outbox does not account for
+
+        A wallet's opening balance is its balance less the net of its
+        outbox rows, taken under the wallet lock so no posting lands in
+        between. Wallets that already have an opening row are skipped, so
+        the backfill can be re-run.
+
+        Returns:
+            dict: wallets (checked), created, amount (total opened),
+                negative (wallets whose postings exceed the balance)
+        """
+        report = {
+            'wallets': 0,
+            'created': 0,
+            'amount': Decimal('0.00'),
+            'negative': [],
+        }
+
+        wallet_ids = Wallet.objects.order_by('id').values_list('id', flat=True)
+        last_id = None
+        while True:
+            chunk = wallet_ids.filter(id__gt=last_id) if last_id else wallet_ids
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                return report
+            last_id = chunk[-1]
+
+            with db_transaction.atomic():
+                wallets = list(
+                    Wallet.objects.filter(id__in=chunk)
+                    .select_for_update().order_by('id')
+                    .only('id', 'account_number', 'balance')
+                )
+                postings = {
+                    row['account_number']: row
+                    for row in LedgerOutbox.objects.filter(
+                        account_number__in=[w.account_number for w in wallets]
+                    )
+                    .values('account_number')
+                    .annotate(
+                        credits=Sum('amount', filter=~Q(entry_type='debit')),
+                        debits=Sum('amount', filter=Q(entry_type='debit')),
+                        openings=Count('id', filter=Q(entry_type='opening'))
+                    )
+                    .order_by()
+                }
+
+                openings = []
+                for wallet in wallets:
+                    row = postings.get(wallet.account_number, {})
+                    if row.get('openings'):
+                        continue
+                    amount = wallet.balance - (
+                        (row.get('credits') or Decimal('0'))
+                        - (row.get('debits') or Decimal('0'))
+                    )
+                    if amount > 0:
+                        openings.append(LedgerOutbox(
+                            account_number=wallet.account_number,
+                            entry_type='opening',
+                            amount=amount
+                        ))
+                    elif amount < 0:
+                        report['negative'].append((wallet.account_number, amount))
+
+                LedgerOutbox.objects.bulk_create(openings)
+
+            report['wallets'] += len(wallets)
+            report['created'] += len(openings)
+            report['amount'] += sum(
+                (opening.amount for opening in openings), Decimal('0.00')
+            )
+
+    def to_chain_transaction(self, row):
+        """Chain submission for an outbox row (values dict)"""
+        if row['entry_type'] == 'debit':
+            sender, recipient = row['account_number'], self.settlement_address
+            tx_type = row['transaction__transaction_type']
+        else:
+            sender, recipient = self.issuer_address, row['account_number']
+            tx_type = 'issue'
+
+        return {
+            'type': tx_type,
+            'sender': sender,
+            'recipient': recipient,
+            'amount': row['amount'],
+            'metadata': (
+                row['transaction__reference']
+                or f"opening:{row['account_number']}"
+            ),
+        }
+
+    def _replay(self, checkpoint):
+        """Truncate the chain to genesis and mark every outbox row unsynced"""
+        self.chain.truncate(1)
+        LedgerOutbox.objects.filter(synced_at__isnull=False).update(
+            synced_at=None, rejected=False
+        )
+        checkpoint.last_outbox_id = 0
+        checkpoint.chain_length = self.chain.get_chain_length()
+        checkpoint.synced_count = checkpoint.rejected_count = 0
+
+    def replay(self):
+        """
+        Rebuild the chain from the start of the outbox on the next sync
+
+        Used after backfilling opening balances on a chain that already
+        rejected debits from accounts it had never been issued.
+        """
+        LedgerSyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        with db_transaction.atomic():
+            checkpoint = self.get_checkpoint(lock=True)
+            if checkpoint is None:
+                raise RuntimeError('Ledger sync is running')
+            self._replay(checkpoint)
+            checkpoint.save()
+
+    def sync_batch(self, batch_size=None):
+        """
+        Mirror the next batch of outbox rows into one block
+
+        Returns:
+            dict: synced, rejected, last_outbox_id, block (None if idle)
+        """
+        LedgerSyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+
+        with db_transaction.atomic():
+            checkpoint = self.get_checkpoint(lock=True)
+            if checkpoint is None:
+                return {'synced': 0, 'rejected': 0, 'block': None,
+                        'last_outbox_id': None}
+
+            length = self.chain.get_chain_length()
+            if length < checkpoint.chain_length:
+                logger.warning(
+                    f"Ledger chain has {length} blocks, "
+                    f"checkpoint expects {checkpoint.chain_length}; "
+                    f"replaying the outbox"
+                )
+                self._replay(checkpoint)
+            elif length > max(checkpoint.chain_length, 1):
+                logger.warning(
+                    f"Ledger chain has {length} blocks, checkpoint covers "
+                    f"{checkpoint.chain_length}; discarding the rest"
+                )
+                self.chain.truncate(checkpoint.chain_length)
+
+            unsynced = LedgerOutbox.objects.filter(synced_at__isnull=True)
+            # Opening balances go on the chain before the postings that
+            # spend them, whatever their ids
+            if unsynced.filter(entry_type='opening').exists():
+                unsynced = unsynced.filter(entry_type='opening')
+
+            rows = list(
+                unsynced
+                .order_by('id')
+                .values(
+                    'id', 'account_number', 'entry_type', 'amount',
+                    'transaction__transaction_type', 'transaction__reference'
+                )[:batch_size or self.batch_size]
+            )
+            if not rows:
+                return {'synced': 0, 'rejected': 0, 'block': None,
+                        'last_outbox_id': checkpoint.last_outbox_id}
+
+            accepted = self.chain.submit_transactions(
+                self.to_chain_transaction(row) for row in rows
+            )
+            block = self.chain.mine_block()
+
+            LedgerOutbox.objects.filter(
+                id__in=[row['id'] for row in rows]
+            ).update(synced_at=timezone.now())
+
+            rejected_ids = [
+                row['id'] for row, ok in zip(rows, accepted) if not ok
+            ]
+            if rejected_ids:
+                LedgerOutbox.objects.filter(id__in=rejected_ids).update(
+                    rejected=True
+                )
+                logger.error(
+                    f"Ledger chain rejected {len(rejected_ids)} postings, "
+                    f"outbox ids {rejected_ids[:20]}"
+                )
+
+            checkpoint.last_outbox_id = max(
+                checkpoint.last_outbox_id, rows[-1]['id']
+            )
+            checkpoint.chain_length = self.chain.get_chain_length()
+            checkpoint.synced_count += len(rows) - len(rejected_ids)
+            checkpoint.rejected_count += len(rejected_ids)
+            checkpoint.save()
+
+        return {
+            'synced': len(rows) - len(rejected_ids),
+            'rejected': len(rejected_ids),
+            'block': block,
+            'last_outbox_id': checkpoint.last_outbox_id,
+        }
+
+    def sync(self, batch_size=None, max_batches=None):
+        """
+        Drain the outbox, one block per batch
+
+        Yields:
+            dict: sync_batch() result for each non-empty batch
+        """
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            result = self.sync_batch(batch_size)
+            if result['block'] is None:
+                return
+            batches += 1
+            yield result
+
+    def verify(self, chunk_size=1000, max_mismatches=100):
+        """
+        Compare synced ledger totals with chain balances
+
+        Per-account net synced postings are aggregated by
+        the database and streamed in account order; chain balances are
+        fetched with one native call per chunk of accounts. Postings the
+        chain rejected are left out of the totals and counted separately.
+
+        Returns:
+            dict: accounts, mismatch_count, mismatches (first
+                max_mismatches as (account, ledger, chain)), ledger_total,
+                chain_total, rejected (postings the chain refused),
+                unrecorded (completed wallet transactions since the first
+                outbox row without one)
+        """
+        rows = (
+            LedgerOutbox.objects.filter(synced_at__isnull=False, rejected=False)
+            .values('account_number')
+            .annotate(
+                credits=Sum('amount', filter=~Q(entry_type='debit')),
+                debits=Sum('amount', filter=Q(entry_type='debit'))
+            )
+            .order_by('account_number')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        report = {
+            'accounts': 0,
+            'mismatches': [],
+            'mismatch_count': 0,
+            'ledger_total': Decimal('0.00'),
+            'chain_total': Decimal('0.00'),
+            'rejected': LedgerOutbox.objects.filter(rejected=True).count(),
+            'unrecorded': self.count_unrecorded(),
+        }
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                self._compare(chunk, report, max_mismatches)
+                chunk = []
+        if chunk:
+            self._compare(chunk, report, max_mismatches)
+
+        return report
+
+    def _compare(self, chunk, report, max_mismatches):
+        balances = self.chain.get_balances(
+            row['account_number'] for row in chunk
+        )
+        for row, balance in zip(chunk, balances):
+            ledger = (
+                (row['credits'] or Decimal('0')) - (row['debits'] or Decimal('0'))
+            ).quantize(Decimal('0.01'))
+            chain = Decimal(str(round(balance, 2)))
+
+            report['accounts'] += 1
+            report['ledger_total'] += ledger
+            report['chain_total'] += chain
+            if ledger != chain:
+                report['mismatch_count'] += 1
+                if len(report['mismatches']) < max_mismatches:
+                    report['mismatches'].append(
+                        (row['account_number'], ledger, chain)
+                    )
+
+    def count_unrecorded(self):
+        """Completed wallet transactions since the outbox started without a row"""
+        first = LedgerOutbox.objects.order_by('id').values('created_at').first()
+        if first is None:
+            return 0
+        return Transaction.objects.filter(
+            status='completed',
+            wallet__isnull=False,
+            created_at__gte=first['created_at'],
+            ledger_entries__isnull=True
+        ).count()
+
+
+ledger_sync = LedgerSync()
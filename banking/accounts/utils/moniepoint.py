@@ -10,6 +10,7 @@ import logging
 from datetime import datetime
 from decimal import Decimal
 from django.conf import settings
+from ..metrics import instrument_provider
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -59,6 +60,7 @@ class MoniepointAPI:
             headers['Signature'] = signature
         return headers
 
+    @instrument_provider('moniepoint')
     def _make_request(
         self,
         method,
@@ -4,14 +4,20 @@ Handle wallet operations, transaction processing, and fees
 Integrated with Paystack for virtual accounts and transfers
 """
 import logging
+from collections import defaultdict
 from decimal import Decimal
+from django.core.cache import cache
 from django.db import transaction as db_transaction
-from django.db.models import F
+from django.db.models import Case, DecimalField, F, Value, When
 from django.utils import timezone
 from django.conf import settings
-from ..models import Wallet, Transaction, PaymentGateway
-from .signature import SignatureVerifier
+from ..hashers import check_pin, make_pin
+from ..models import User, Wallet, Transaction, PaymentGateway
+from .fees import fee_engine
+from .ledger_sync import ledger_sync
 from .paystack import get_paystack_client
+from .resolver import account_resolver
+from .wallet_cache import wallet_cache
 
 logger = logging.getLogger(__name__)
 
@@ -19,41 +25,49 @@ logger = logging.getLogger(__name__)
 class PaymentProcessor:
     """Process payments and wallet operations"""
 
-    # Fee configuration (can be moved to database/settings)
-    TRANSFER_FEE = Decimal('10.00')
-    WITHDRAWAL_FEE = Decimal('50.00')
-    PAYMENT_GATEWAY_FEE_PERCENTAGE = Decimal('1.5')  # 1.5%
-    PAYMENT_GATEWAY_CAP = Decimal('2000.00')
+    REVERSIBLE_STATUSES = ('completed', 'failed')
 
     @staticmethod
-    def calculate_transfer_fee(amount):
+    def is_reversible(transaction):
+        """
+        Whether a transaction can be reversed
+
+        Pending withdrawals are debited up front as holds, so a rejection
+        reverses them; other pending transactions cannot be.
+        """
+        if transaction.status in PaymentProcessor.REVERSIBLE_STATUSES:
+            return True
+        return transaction.status == 'pending' and PaymentProcessor.is_hold(transaction)
+
+    @staticmethod
+    def is_hold(transaction):
+        """
+        Whether a posting moved only the available balance
+
+        Withdrawals hold funds from balance and leave ledger_balance alone,
+        so reversing one releases the hold instead of crediting both.
+        """
+        return transaction.transaction_type == 'withdrawal'
+
+    @staticmethod
+    def calculate_transfer_fee(amount, user=None):
         """Calculate transfer fee"""
-        if amount <= Decimal('5000.00'):
-            return Decimal('10.00')
-        elif amount <= Decimal('50000.00'):
-            return Decimal('25.00')
-        else:
-            return Decimal('50.00')
+        return fee_engine.calculate('transfer', amount, user)
 
     @staticmethod
-    def calculate_withdrawal_fee(amount):
+    def calculate_withdrawal_fee(amount, user=None):
         """Calculate withdrawal fee"""
-        return PaymentProcessor.WITHDRAWAL_FEE
+        return fee_engine.calculate('withdrawal', amount, user)
 
     @staticmethod
-    def calculate_payment_gateway_fee(amount):
+    def calculate_payment_gateway_fee(amount, merchant=None):
         """Calculate payment gateway fee"""
-        fee = (amount * PaymentProcessor.PAYMENT_GATEWAY_FEE_PERCENTAGE) / 100
-
-        if fee > PaymentProcessor.PAYMENT_GATEWAY_CAP:
-            fee = PaymentProcessor.PAYMENT_GATEWAY_CAP
-
-        return fee.quantize(Decimal('0.01'))
+        return fee_engine.calculate('payment', amount, merchant)
 
     @staticmethod
     @db_transaction.atomic
     def credit_wallet(wallet, amount, description, transaction_type='deposit',
-                      metadata=None):
+                      metadata=None, update_ledger_balance=True):
         """
         Credit wallet with amount
 
@@ -63,6 +77,8 @@ class PaymentProcessor:
             description: Transaction description
             transaction_type: Type of transaction
             metadata: Additional metadata
+            update_ledger_balance: False to credit balance only (releasing
+                a hold)
 
         Returns:
             Transaction: Created transaction
@@ -76,9 +92,11 @@ class PaymentProcessor:
             balance_before = wallet.balance
 
             # Update wallet balance using F() to prevent race conditions
+            balances = {'balance': F('balance') + amount}
+            if update_ledger_balance:
+                balances['ledger_balance'] = F('ledger_balance') + amount
             Wallet.objects.filter(id=wallet.id).update(
-                balance=F('balance') + amount,
-                ledger_balance=F('ledger_balance') + amount,
+                **balances,
                 updated_at=timezone.now()
             )
 
@@ -102,6 +120,9 @@ class PaymentProcessor:
                 completed_at=timezone.now()
             )
 
+            ledger_sync.record(txn, 'credit', amount)
+            wallet_cache.refresh_on_commit(wallet.user_id)
+
             logger.info(
                 f"Wallet credited: {wallet.account_number} - "
                 f"₦{amount} - {txn.reference}"
@@ -113,6 +134,89 @@ class PaymentProcessor:
             logger.error(f"Credit wallet error: {e}")
             raise
 
+    @staticmethod
+    @db_transaction.atomic
+    def credit_wallets(credits, update_ledger_balance=True):
+        """
+        Credit many wallets in one set-based posting
+
+        Wallets are locked in id order and each is updated once with the
+        sum of its credits; the transactions and ledger outbox rows are
+        bulk-created (no post_save signals).
+
+        Args:
+            credits: (wallet_id, amount, description, transaction_type,
+                metadata) tuples
+            update_ledger_balance: False to credit balance only (releasing
+                holds)
+
+        Returns:
+            list: Created transactions, in the order of credits
+        """
+        credits = list(credits)
+        if not credits:
+            return []
+
+        totals = defaultdict(Decimal)
+        for wallet_id, amount, *_ in credits:
+            if amount <= 0:
+                raise ValueError("Amount must be greater than zero")
+            totals[wallet_id] += amount
+
+        wallets = {
+            wallet.id: wallet
+            for wallet in Wallet.objects.select_for_update()
+            .filter(id__in=totals)
+            .order_by('id')
+            .only('id', 'user_id', 'account_number', 'balance')
+        }
+        if len(wallets) != len(totals):
+            raise ValueError("Wallet not found")
+
+        now = timezone.now()
+        per_wallet = Case(
+            *[When(id=wallet_id, then=Value(total)) for wallet_id, total in totals.items()],
+            output_field=DecimalField(max_digits=15, decimal_places=2)
+        )
+        balances = {'balance': F('balance') + per_wallet}
+        if update_ledger_balance:
+            balances['ledger_balance'] = F('ledger_balance') + per_wallet
+        Wallet.objects.filter(id__in=totals).update(**balances, updated_at=now)
+
+        txns = []
+        for wallet_id, amount, description, transaction_type, metadata in credits:
+            wallet = wallets[wallet_id]
+            balance_before = wallet.balance
+            wallet.balance += amount
+
+            txns.append(Transaction(
+                user_id=wallet.user_id,
+                wallet=wallet,
+                transaction_type=transaction_type,
+                amount=amount,
+                fee=Decimal('0.00'),
+                total_amount=amount,
+                reference=Transaction.generate_reference(),
+                status='completed',
+                description=description,
+                metadata=metadata or {},
+                balance_before=balance_before,
+                balance_after=wallet.balance,
+                completed_at=now
+            ))
+
+        Transaction.objects.bulk_create(txns)
+        ledger_sync.record_many((txn, 'credit', txn.amount) for txn in txns)
+        for wallet in wallets.values():
+            wallet_cache.refresh_on_commit(wallet.user_id)
+
+        logger.info(
+            f"Wallets credited: {len(txns)} credits to {len(wallets)} "
+            f"wallets - ₦{sum(totals.values())}"
+        )
+
+        return txns
+
     @staticmethod
     @db_transaction.atomic
     def debit_wallet(wallet, amount, fee, description, transaction_type,
@@ -183,6 +287,9 @@ class PaymentProcessor:
                 completed_at=timezone.now()
             )
 
+            ledger_sync.record(txn, 'debit', total_amount)
+            wallet_cache.refresh_on_commit(wallet.user_id)
+
             logger.info(
                 f"Wallet debited: {wallet.account_number} - "
                 f"₦{total_amount} - {txn.reference}"
@@ -195,7 +302,6 @@ class PaymentProcessor:
             raise
 
     @staticmethod
-    @db_transaction.atomic
     def process_transfer(sender_wallet, recipient_account, amount,
                          narration, transaction_pin):
         """
@@ -212,66 +318,74 @@ class PaymentProcessor:
             dict: Transfer result with transactions
         """
         try:
-            # Verify transaction PIN
-            if not SignatureVerifier.verify_transaction_pin(
-                transaction_pin,
-                sender_wallet.user.transaction_pin
+            # Verify PIN before the posting transaction takes row locks
+            if not PaymentProcessor.verify_transaction_pin(
+                sender_wallet.user,
+                transaction_pin
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Find recipient wallet
-            try:
-                recipient_wallet = Wallet.objects.get(
-                    account_number=recipient_account,
-                    is_active=True
-                )
-            except Wallet.DoesNotExist:
+            # Resolve recipient (cached account number lookup)
+            recipient = account_resolver.resolve(recipient_account)
+            if recipient is None or not recipient.is_active:
                 raise ValueError("Recipient account not found")
 
             # Check self-transfer
-            if sender_wallet.id == recipient_wallet.id:
+            if sender_wallet.id == recipient.wallet_id:
                 raise ValueError("Cannot transfer to same account")
 
-            # Calculate fee
-            fee = PaymentProcessor.calculate_transfer_fee(amount)
+            with db_transaction.atomic():
+                # Fetch recipient wallet by primary key
+                try:
+                    recipient_wallet = Wallet.objects.get(
+                        id=recipient.wallet_id,
+                        is_active=True
+                    )
+                except Wallet.DoesNotExist:
+                    raise ValueError("Recipient account not found")
+
+                # Calculate fee
+                fee = PaymentProcessor.calculate_transfer_fee(
+                    amount, sender_wallet.user
+                )
 
-            # Debit sender
-            debit_txn = PaymentProcessor.debit_wallet(
-                wallet=sender_wallet,
-                amount=amount,
-                fee=fee,
-                description=f"Transfer to {recipient_wallet.account_number}",
-                transaction_type='transfer',
-                metadata={'narration': narration},
-                recipient_account=recipient_wallet.account_number,
-                recipient_name=recipient_wallet.user.get_full_name(),
-                recipient_bank='GAX Bank'
-            )
+                # Debit sender
+                debit_txn = PaymentProcessor.debit_wallet(
+                    wallet=sender_wallet,
+                    amount=amount,
+                    fee=fee,
+                    description=f"Transfer to {recipient_wallet.account_number}",
+                    transaction_type='transfer',
+                    metadata={'narration': narration},
+                    recipient_account=recipient_wallet.account_number,
+                    recipient_name=recipient.account_name,
+                    recipient_bank='GAX Bank'
+                )
 
-            # Credit recipient
-            credit_txn = PaymentProcessor.credit_wallet(
-                wallet=recipient_wallet,
-                amount=amount,
-                description=f"Transfer from {sender_wallet.account_number}",
-                transaction_type='deposit',
-                metadata={
-                    'narration': narration,
-                    'sender_reference': debit_txn.reference
-                }
-            )
+                # Credit recipient
+                credit_txn = PaymentProcessor.credit_wallet(
+                    wallet=recipient_wallet,
+                    amount=amount,
+                    description=f"Transfer from {sender_wallet.account_number}",
+                    transaction_type='deposit',
+                    metadata={
+                        'narration': narration,
+                        'sender_reference': debit_txn.reference
+                    }
+                )
 
-            logger.info(
-                f"Transfer completed: {sender_wallet.account_number} -> "
-                f"{recipient_wallet.account_number} - ₦{amount}"
-            )
+                logger.info(
+                    f"Transfer completed: {sender_wallet.account_number} -> "
+                    f"{recipient_wallet.account_number} - ₦{amount}"
+                )
 
-            return {
-                'success': True,
-                'debit_transaction': debit_txn,
-                'credit_transaction': credit_txn,
-                'fee': fee,
-                'message': 'Transfer successful'
-            }
+                return {
+                    'success': True,
+                    'debit_transaction': debit_txn,
+                    'credit_transaction': credit_txn,
+                    'fee': fee,
+                    'message': 'Transfer successful'
+                }
 
         except Exception as e:
             logger.error(f"Transfer error: {e}")
@@ -282,23 +396,54 @@ class PaymentProcessor:
         """
         Verify user's transaction PIN
 
+        Failed attempts are counted in the cache; after
+        TRANSACTION_PIN_MAX_ATTEMPTS failures the PIN is locked for
+        TRANSACTION_PIN_LOCKOUT_SECONDS. PINs stored with an older hasher
+        are rehashed on a successful check.
+
         Args:
             user: User instance
             pin: Plain text PIN
 
         Returns:
             bool: True if PIN is valid
+
+        Raises:
+            ValueError: If the PIN is locked after too many failures
         """
         if not user.transaction_pin:
             return False
 
-        return SignatureVerifier.verify_transaction_pin(
-            pin,
-            user.transaction_pin
-        )
+        attempts_key = f'pin:attempts:{user.pk}'
+        max_attempts = getattr(settings, 'TRANSACTION_PIN_MAX_ATTEMPTS', 5)
+
+        if cache.get(attempts_key, 0) >= max_attempts:
+            raise ValueError(
+                "Too many invalid PIN attempts. Please try again later"
+            )
+
+        is_valid, must_update = check_pin(pin, user.transaction_pin)
+
+        if not is_valid:
+            lockout = getattr(settings, 'TRANSACTION_PIN_LOCKOUT_SECONDS', 900)
+            if not cache.add(attempts_key, 1, timeout=lockout):
+                try:
+                    cache.incr(attempts_key)
+                except ValueError:
+                    cache.set(attempts_key, 1, timeout=lockout)
+            return False
+
+        cache.delete(attempts_key)
+
+        if must_update:
+            user.transaction_pin = make_pin(pin)
+            User.objects.filter(pk=user.pk).update(
+                transaction_pin=user.transaction_pin
+            )
+
+        return True
 
     @staticmethod
-    @db_transaction.atomic
     def process_withdrawal(wallet, amount, bank_account, transaction_pin):
         """
         Process withdrawal to external bank account
@@ -320,56 +465,63 @@ class PaymentProcessor:
             ):
                 raise ValueError("Invalid transaction PIN")
 
-            # Calculate fee
-            fee = PaymentProcessor.calculate_withdrawal_fee(amount)
-            total_amount = amount + fee
+            with db_transaction.atomic():
+                # Calculate fee
+                fee = PaymentProcessor.calculate_withdrawal_fee(
+                    amount, wallet.user
+                )
+                total_amount = amount + fee
 
-            # Check balance
-            if wallet.balance < total_amount:
-                raise ValueError("Insufficient balance")
+                # Check balance
+                if wallet.balance < total_amount:
+                    raise ValueError("Insufficient balance")
 
-            # Get balance before
-            balance_before = wallet.balance
+                # Get balance before
+                balance_before = wallet.balance
 
-            # Deduct from wallet (mark as pending)
-            Wallet.objects.filter(id=wallet.id).update(
-                balance=F('balance') - total_amount,
-                updated_at=timezone.now()
-            )
+                # Deduct from wallet (mark as pending)
+                Wallet.objects.filter(id=wallet.id).update(
+                    balance=F('balance') - total_amount,
+                    updated_at=timezone.now()
+                )
 
-            wallet.refresh_from_db()
-            balance_after = wallet.balance
+                wallet.refresh_from_db()
+                balance_after = wallet.balance
+
+                # Create transaction (pending admin approval)
+                txn = Transaction.objects.create(
+                    user=wallet.user,
+                    wallet=wallet,
+                    transaction_type='withdrawal',
+                    amount=amount,
+                    fee=fee,
+                    total_amount=total_amount,
+                    status='pending',
+                    description=f"Withdrawal to {bank_account.bank_name}",
+                    metadata={
+                        'bank_account_id': str(bank_account.id),
+                        'account_number': bank_account.account_number,
+                        'bank_name': bank_account.bank_name,
+                        'account_name': bank_account.account_name
+                    },
+                    recipient_account=bank_account.account_number,
+                    recipient_name=bank_account.account_name,
+                    recipient_bank=bank_account.bank_name,
+                    balance_before=balance_before,
+                    balance_after=balance_after,
+                    requires_approval=True
+                )
 
-            # Create transaction (pending admin approval)
-            txn = Transaction.objects.create(
-                user=wallet.user,
-                wallet=wallet,
-                transaction_type='withdrawal',
-                amount=amount,
-                fee=fee,
-                total_amount=total_amount,
-                status='pending',
-                description=f"Withdrawal to {bank_account.bank_name}",
-                metadata={
-                    'bank_account_id': str(bank_account.id),
-                    'account_number': bank_account.account_number,
-                    'bank_name': bank_account.bank_name,
-                    'account_name': bank_account.account_name
-                },
-                recipient_account=bank_account.account_number,
-                recipient_name=bank_account.account_name,
-                recipient_bank=bank_account.bank_name,
-                balance_before=balance_before,
-                balance_after=balance_after,
-                requires_approval=True
-            )
+                # The balance is held now, so the chain mirrors it now
+                ledger_sync.record(txn, 'debit', total_amount)
+                wallet_cache.refresh_on_commit(wallet.user_id)
 
-            logger.info(
-                f"Withdrawal initiated: {wallet.account_number} - "
-                f"₦{amount} - {txn.reference}"
-            )
+                logger.info(
+                    f"Withdrawal initiated: {wallet.account_number} - "
+                    f"₦{amount} - {txn.reference}"
+                )
 
-            return txn
+                return txn
 
         except Exception as e:
             logger.error(f"Withdrawal error: {e}")
@@ -392,7 +544,7 @@ class PaymentProcessor:
             if transaction.status == 'reversed':
                 raise ValueError("Transaction already reversed")
 
-            if transaction.status not in ['completed', 'failed']:
+            if not PaymentProcessor.is_reversible(transaction):
                 raise ValueError("Cannot reverse transaction in this state")
 
             wallet = transaction.wallet
@@ -406,7 +558,8 @@ class PaymentProcessor:
                 metadata={
                     'original_reference': transaction.reference,
                     'reason': reason
-                }
+                },
+                update_ledger_balance=not PaymentProcessor.is_hold(transaction)
             )
 
             # Update original transaction
@@ -423,3 +576,67 @@ class PaymentProcessor:
         except Exception as e:
             logger.error(f"Reversal error: {e}")
             raise
+
+    @staticmethod
+    @db_transaction.atomic
+    def reverse_transactions(transactions, reason):
+        """
+        Reverse many transactions with one batched credit posting
+
+        Callers should hold row locks on the transactions.
+
+        Args:
+            transactions: Transactions to reverse (wallet_id, reference,
+                transaction_type, total_amount and status loaded)
+            reason: Reason for reversal
+
+        Returns:
+            list: Reversal transactions, in the order given
+        """
+        transactions = list(transactions)
+        for transaction in transactions:
+            if transaction.status == 'reversed':
+                raise ValueError(
+                    f"Transaction already reversed: {transaction.reference}"
+                )
+            if not PaymentProcessor.is_reversible(transaction):
+                raise ValueError(
+                    f"Cannot reverse transaction in this state: {transaction.reference}"
+                )
+
+        # Credit back the total amounts, releasing holds from balance only
+        reversals = {}
+        for release_holds in (True, False):
+            batch = [
+                transaction for transaction in transactions
+                if PaymentProcessor.is_hold(transaction) == release_holds
+            ]
+            reversals.update(zip(
+                (transaction.id for transaction in batch),
+                PaymentProcessor.credit_wallets(
+                    (
+                        (
+                            transaction.wallet_id,
+                            transaction.total_amount,
+                            f"Reversal: {transaction.reference}",
+                            'refund',
+                            {
+                                'original_reference': transaction.reference,
+                                'reason': reason
+                            }
+                        )
+                        for transaction in batch
+                    ),
+                    update_ledger_balance=not release_holds
+                )
+            ))
+        reversals = [reversals[transaction.id] for transaction in transactions]
+
+        # Update original transactions
+        Transaction.objects.filter(
+            id__in=[transaction.id for transaction in transactions]
+        ).update(status='reversed', updated_at=timezone.now())
+
+        logger.info(f"Transactions reversed: {len(reversals)} - {reason}")
+
+        return reversals
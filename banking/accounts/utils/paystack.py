@@ -10,6 +10,7 @@ import logging
 from typing import Dict, Any, Optional
 from decimal import Decimal
 from django.conf import settings
+from ..metrics import instrument_provider
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,7 @@ class PaystackAPI:
             'Content-Type': 'application/json',
         }
 
+    @instrument_provider('paystack')
     def _make_request(
         self,
         method: str,
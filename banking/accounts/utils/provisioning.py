@@ -0,0 +1,159 @@
+"""
+Virtual account provisioning
+Create provider (Paystack) accounts for wallets in the background
+"""
+import logging
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from ..models import User, VirtualAccount
+from .paystack import get_paystack_client
+from .retry_worker import RetryWorker
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualAccountProvisioner(RetryWorker):
+    """
+    Provision dedicated provider accounts outside the request
+
+    queue() stores pending VirtualAccount rows and, once the surrounding
+    transaction commits, hands their users to the worker thread;
+    `manage.py provision_virtual_accounts` retries failed attempts.
+    """
+    model = VirtualAccount
+    settings_prefix = 'VIRTUAL_ACCOUNT'
+    thread_name = 'virtual-account-provisioner'
+    success_key = 'provisioned'
+    provider = 'paystack'
+
+    def queue(self, user_ids, submit=True):
+        """
+        Create pending accounts for users that have none
+
+        Args:
+            user_ids: User ids to provision
+            submit: Hand the users to the worker thread after commit
+
+        Returns:
+            list: The user ids
+        """
+        user_ids = list(user_ids)
+        VirtualAccount.objects.bulk_create(
+            [
+                VirtualAccount(user_id=user_id, provider=self.provider)
+                for user_id in user_ids
+            ],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+        if submit:
+            db_transaction.on_commit(lambda: self.submit(user_ids))
+
+        return user_ids
+
+    def process(self, user_id):
+        account_id = self.pending().filter(
+            user_id=user_id
+        ).values_list('id', flat=True).first()
+
+        if account_id is not None:
+            self.provision(account_id)
+
+    def pending(self):
+        return super().pending().filter(provider=self.provider)
+
+    def attempt(self, account_id):
+        return self.provision(account_id)
+
+    def provision(self, account_id):
+        """
+        Create the provider account for one pending VirtualAccount
+
+        Returns:
+            bool: True if the account is now active
+        """
+        if not self.claim(account_id):
+            return False
+
+        account = VirtualAccount.objects.select_related('user').get(
+            id=account_id
+        )
+
+        try:
+            result = self.create_provider_account(account.user)
+        except Exception as e:
+            result = {'status': False, 'message': str(e)}
+
+        if not result.get('status'):
+            self.record_failure(account, result.get('message') or 'Unknown error')
+            return False
+
+        data = result.get('data') or {}
+        bank = data.get('bank') or {}
+
+        account.status = 'active'
+        account.account_number = data.get('account_number')
+        account.account_name = data.get('account_name')
+        account.bank_name = bank.get('name')
+        account.bank_slug = bank.get('slug')
+        account.provider_customer_code = (
+            data.get('customer') or {}
+        ).get('customer_code')
+        account.provider_response = data
+        account.last_error = None
+        account.provisioned_at = timezone.now()
+        account.save(update_fields=[
+            'status', 'account_number', 'account_name', 'bank_name',
+            'bank_slug', 'provider_customer_code', 'provider_response',
+            'last_error', 'provisioned_at', 'updated_at'
+        ])
+
+        logger.info(
+            f"Paystack virtual account created: "
+            f"{account.account_number} for {account.user.username}"
+        )
+        return True
+
+    def record_failure(self, account, message):
+        super().record_failure(account, message)
+        logger.warning(
+            f"Paystack virtual account creation failed for "
+            f"{account.user.username} (attempt {account.attempts}): {message}"
+        )
+
+    def create_provider_account(self, user):
+        if not user.email:
+            return {'status': False, 'message': 'User has no email address'}
+
+        return get_paystack_client().create_dedicated_account(
+            customer_email=user.email,
+            customer_name=user.get_full_name() or user.username,
+            customer_phone=user.phone_number or '+2348000000000',
+            preferred_bank=getattr(settings, 'PAYSTACK_PREFERRED_BANK', 'wema-bank')
+        )
+
+    def backfill(self, batch_size=1000):
+        """
+        Queue pending accounts for users that have none
+
+        Yields:
+            int: Users queued per batch
+        """
+        missing = User.objects.exclude(
+            virtual_accounts__provider=self.provider
+        ).order_by('pk').values_list('pk', flat=True)
+
+        batch = []
+        for user_id in missing.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                yield len(self.queue(batch, submit=False))
+                batch = []
+
+        if batch:
+            yield len(self.queue(batch, submit=False))
+
+
+virtual_account_provisioner = VirtualAccountProvisioner()
@@ -0,0 +1,151 @@
+"""
+Account number resolution
+Resolve wallet account numbers to their holder for name enquiry and transfers
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from ..metrics import record_cache_lookup
+from ..models import Wallet
+
+
+class ResolvedAccount:
+    """Cached wallet details for an account number"""
+
+    __slots__ = (
+        'wallet_id', 'user_id', 'account_number', 'account_name',
+        'is_active', 'is_frozen'
+    )
+
+    def __init__(self, wallet_id, user_id, account_number, account_name,
+                 is_active, is_frozen):
+        self.wallet_id = wallet_id
+        self.user_id = user_id
+        self.account_number = account_number
+        self.account_name = account_name
+        self.is_active = is_active
+        self.is_frozen = is_frozen
+
+    def to_dict(self):
+        """
+        Public name enquiry fields
+
+        is_active and is_frozen are for transfer checks only; an account's
+        status is never shown to other users.
+        """
+        return {
+            'account_number': self.account_number,
+            'account_name': self.account_name,
+            'bank_name': 'GAX Bank',
+        }
+
+
+class AccountResolver:
+    """
+    Resolve account numbers through the shared cache
+
+    Entries (including a marker for unknown numbers) are cached for
+    ACCOUNT_RESOLVER_CACHE_TTL seconds and dropped when the wallet or its
+    user is saved, so freezing a wallet or renaming a user is visible on
+    the next lookup. Batch lookups use one cache round trip and at most
+    one query.
+    """
+    # Cached marker for account numbers that do not exist
+    UNKNOWN = 'unknown'
+
+    @staticmethod
+    def cache_key(account_number):
+        return f'account:resolve:{account_number}'
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'ACCOUNT_RESOLVER_CACHE_TTL', 300)
+
+    @property
+    def unknown_timeout(self):
+        return getattr(settings, 'ACCOUNT_RESOLVER_UNKNOWN_CACHE_TTL', 30)
+
+    def resolve(self, account_number):
+        """
+        Resolve one account number
+
+        Returns:
+            ResolvedAccount or None if no wallet has this number
+        """
+        return self.resolve_many([account_number]).get(account_number)
+
+    def resolve_many(self, account_numbers):
+        """
+        Resolve several account numbers at once
+
+        Returns:
+            dict: account_number -> ResolvedAccount for known numbers
+        """
+        account_numbers = list(dict.fromkeys(account_numbers))
+        keys = {self.cache_key(number): number for number in account_numbers}
+        cached = cache.get_many(list(keys))
+
+        resolved, missing = {}, []
+        for key, number in keys.items():
+            entry = cached.get(key)
+            record_cache_lookup(entry is not None)
+            if entry is None:
+                missing.append(number)
+            elif entry != self.UNKNOWN:
+                resolved[number] = entry
+
+        if missing:
+            loaded = self.load(missing)
+            cache.set_many(
+                {
+                    self.cache_key(number): account
+                    for number, account in loaded.items()
+                },
+                timeout=self.timeout
+            )
+            unknown = set(missing) - set(loaded)
+            if unknown:
+                cache.set_many(
+                    {self.cache_key(number): self.UNKNOWN for number in unknown},
+                    timeout=self.unknown_timeout
+                )
+            resolved.update(loaded)
+
+        return resolved
+
+    @staticmethod
+    def load(account_numbers):
+        """Fetch wallets and holder names in one query"""
+        wallets = Wallet.objects.filter(
+            account_number__in=account_numbers
+        ).values(
+            'id', 'user_id', 'account_number', 'is_active', 'is_frozen',
+            'user__first_name', 'user__last_name'
+        )
+
+        return {
+            wallet['account_number']: ResolvedAccount(
+                wallet_id=wallet['id'],
+                user_id=wallet['user_id'],
+                account_number=wallet['account_number'],
+                account_name=(
+                    f"{wallet['user__first_name']} {wallet['user__last_name']}"
+                ).strip(),
+                is_active=wallet['is_active'],
+                is_frozen=wallet['is_frozen']
+            )
+            for wallet in wallets
+        }
+
+    def invalidate(self, account_numbers):
+        """Drop cached entries now and again once the transaction commits"""
+        keys = [self.cache_key(number) for number in account_numbers if number]
+        if not keys:
+            return
+
+        cache.delete_many(keys)
+        # A concurrent lookup may re-cache the old row before we commit
+        db_transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+account_resolver = AccountResolver()
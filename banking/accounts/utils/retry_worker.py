@@ -0,0 +1,163 @@
+"""
+Background retry worker
+Process leased outbox-style rows on a daemon thread with backoff retries
+"""
+import atexit
+import logging
+import queue
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class RetryWorker:
+    """
+    Attempt pending rows on a daemon thread, retrying from a scheduled job
+
+    Rows carry status, attempts, next_attempt_at, last_error and
+    updated_at. submit() hands items to the worker thread, which makes one
+    attempt for each; attempt() claims a row by pushing next_attempt_at
+    out by a lease, so concurrent workers never work on one row twice.
+    record_failure() schedules the next attempt with exponential backoff
+    or gives up after max_attempts, and process_due() - run from a
+    management command on a schedule - makes the retries.
+
+    Subclasses set model, settings_prefix, thread_name, the setting
+    defaults and success_key, and implement attempt().
+    """
+    model = None
+    settings_prefix = None
+    thread_name = None
+    success_key = 'succeeded'
+    default_max_attempts = 5
+    default_retry_delay = 60
+    default_lease = 120
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop_registered = False
+
+    def setting(self, name, default):
+        return getattr(settings, f'{self.settings_prefix}_{name}', default)
+
+    @property
+    def max_attempts(self):
+        return self.setting('MAX_ATTEMPTS', self.default_max_attempts)
+
+    @property
+    def retry_delay(self):
+        return self.setting('RETRY_DELAY', self.default_retry_delay)
+
+    @property
+    def lease(self):
+        return self.setting('LEASE_SECONDS', self.default_lease)
+
+    def submit(self, items):
+        """Process items on the worker thread"""
+        if not self.setting('BACKGROUND_WORKER', True):
+            return
+
+        for item in items:
+            self._queue.put(item)
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=self.thread_name,
+                    daemon=True
+                )
+                self._thread.start()
+                if not self._stop_registered:
+                    atexit.register(self.stop)
+                    self._stop_registered = True
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            try:
+                self.process(item)
+            except Exception as e:
+                logger.error(f"{self.thread_name} error for {item}: {e}")
+            finally:
+                close_old_connections()
+
+    def process(self, item):
+        """Handle one submitted item; items are row ids unless overridden"""
+        self.attempt(item)
+
+    def attempt(self, pk):
+        """
+        Make one attempt for a row
+
+        Returns:
+            bool: True if the row is done
+        """
+        raise NotImplementedError
+
+    def pending(self):
+        return self.model.objects.filter(status='pending')
+
+    def claimable(self):
+        """Pending rows an attempt may claim"""
+        return self.pending()
+
+    def claim(self, pk):
+        """Take a due pending row; returns False if it cannot be taken"""
+        now = timezone.now()
+        return bool(self.claimable().filter(
+            id=pk,
+            next_attempt_at__lte=now
+        ).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=self.lease),
+            updated_at=now
+        ))
+
+    def record_failure(self, row, message):
+        """Schedule a retry, or give up after max_attempts"""
+        if row.attempts >= self.max_attempts:
+            row.status = 'failed'
+        else:
+            row.next_attempt_at = timezone.now() + timedelta(
+                seconds=self.retry_delay * 2 ** (row.attempts - 1)
+            )
+        row.last_error = message
+        row.save(update_fields=[
+            'status', 'next_attempt_at', 'last_error', 'updated_at'
+        ])
+
+    def process_due(self, limit=100):
+        """
+        Attempt pending rows whose next attempt is due
+
+        Returns:
+            dict: Counts of successful (success_key) and unsuccessful
+                attempts
+        """
+        pks = list(
+            self.pending().filter(
+                next_attempt_at__lte=timezone.now()
+            ).order_by('next_attempt_at').values_list('id', flat=True)[:limit]
+        )
+
+        results = {self.success_key: 0, 'unsuccessful': 0}
+        for pk in pks:
+            if self.attempt(pk):
+                results[self.success_key] += 1
+            else:
+                results['unsuccessful'] += 1
+        return results
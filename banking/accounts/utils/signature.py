@@ -156,6 +156,48 @@ class SignatureVerifier:
             logger.error(f"Paystack signature verification error: {e}")
             return False
 
+    @staticmethod
+    def hash_api_key(key_secret, pepper=None):
+        """
+        Hash the secret part of a merchant API key
+
+        Uses HMAC-SHA256 with a server-side pepper rather than a slow
+        password hasher: keys are high-entropy random tokens, so a keyed
+        hash is enough and keeps per-request verification in microseconds.
+
+        Args:
+            key_secret: Secret part of the API key
+            pepper: HMAC key (optional, uses settings if not provided)
+
+        Returns:
+            str: Hex digest
+        """
+        if pepper is None:
+            pepper = settings.API_KEY_PEPPER
+
+        return hmac.new(
+            pepper.encode('utf-8'),
+            key_secret.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+    @staticmethod
+    def verify_api_key(key_secret, key_hash):
+        """
+        Verify an API key secret against its stored hash
+
+        Args:
+            key_secret: Secret part of the presented API key
+            key_hash: Stored HMAC digest
+
+        Returns:
+            bool: True if the secret matches
+        """
+        return hmac.compare_digest(
+            SignatureVerifier.hash_api_key(key_secret),
+            key_hash
+        )
+
     @staticmethod
     def hash_transaction_pin(pin):
         """
@@ -167,8 +209,8 @@ class SignatureVerifier:
         Returns:
             str: Hashed PIN
         """
-        from django.contrib.auth.hashers import make_password
-        return make_password(pin)
+        from ..hashers import make_pin
+        return make_pin(pin)
 
     @staticmethod
     def verify_transaction_pin(pin, hashed_pin):
@@ -182,5 +224,5 @@ class SignatureVerifier:
         Returns:
             bool: True if PIN matches
         """
-        from django.contrib.auth.hashers import check_password
-        return check_password(pin, hashed_pin)
+        from ..hashers import check_pin
+        return check_pin(pin, hashed_pin)[0]
@@ -0,0 +1,131 @@
+"""
+Wallet read cache
+Serve wallet balance and recent transactions without a database hit
+"""
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from ..metrics import record_cache_lookup
+from ..models import Wallet, Transaction
+from ..serializers import WalletSerializer, FastTransactionSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class WalletCache:
+    """
+    Per-user snapshot of the wallet and its most recent transactions
+
+    Snapshots are stored under a per-user version number. Every posting
+    bumps the version once its transaction commits and then writes a fresh
+    snapshot under the new version (write-through), so a reader never sees
+    a snapshot loaded before the last committed write. A snapshot written
+    late under an old version is simply never read again.
+
+    Versions start from a nanosecond timestamp rather than 0, so an
+    evicted version key cannot bring back an old snapshot.
+    """
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'WALLET_CACHE_TTL', 300)
+
+    @property
+    def recent_limit(self):
+        return getattr(settings, 'WALLET_CACHE_RECENT_TRANSACTIONS', 10)
+
+    @staticmethod
+    def version_key(user_id):
+        return f'wallet:version:{user_id}'
+
+    @staticmethod
+    def snapshot_key(user_id, version):
+        return f'wallet:snapshot:{user_id}:{version}'
+
+    def get_version(self, user_id):
+        key = self.version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def get(self, user_id):
+        """
+        Cached wallet snapshot for a user
+
+        Returns:
+            dict: {'wallet': serialized wallet, 'transactions': value rows
+            in FastTransactionSerializer field order}, or None if the
+            user has no wallet
+        """
+        version = self.get_version(user_id)
+        snapshot = cache.get(self.snapshot_key(user_id, version))
+        record_cache_lookup(snapshot is not None)
+
+        if snapshot is None:
+            snapshot = self.load(user_id)
+            if snapshot is not None and version is not None:
+                cache.set(
+                    self.snapshot_key(user_id, version),
+                    snapshot,
+                    timeout=self.timeout
+                )
+
+        return snapshot
+
+    def load(self, user_id):
+        """Read the snapshot from the database (two queries)"""
+        wallet = Wallet.objects.select_related('user').filter(
+            user_id=user_id
+        ).first()
+        if wallet is None:
+            return None
+
+        rows = FastTransactionSerializer.get_values(
+            Transaction.objects.filter(user_id=user_id).order_by('-created_at')
+        )[:self.recent_limit]
+
+        return {
+            'wallet': dict(WalletSerializer(wallet).data),
+            'transactions': list(rows),
+        }
+
+    def refresh(self, user_id):
+        """Bump the user's version and write a fresh snapshot"""
+        key = self.version_key(user_id)
+        try:
+            try:
+                version = cache.incr(key)
+            except ValueError:
+                version = time.time_ns()
+                cache.set(key, version, timeout=None)
+
+            snapshot = self.load(user_id)
+            if snapshot is not None:
+                cache.set(
+                    self.snapshot_key(user_id, version),
+                    snapshot,
+                    timeout=self.timeout
+                )
+        except Exception as e:
+            logger.error(f"Wallet cache refresh error for {user_id}: {e}")
+            cache.delete(key)
+
+    def refresh_on_commit(self, user_id):
+        """Refresh the snapshot once the current transaction commits"""
+        db_transaction.on_commit(lambda: self.refresh(user_id))
+
+    def transactions(self, snapshot):
+        """Snapshot transactions as API-ready dicts"""
+        return FastTransactionSerializer(snapshot['transactions']).data
+
+    def transaction_values(self, snapshot):
+        """Snapshot transactions as dicts of model values (for templates)"""
+        fields = FastTransactionSerializer.fields
+        return [dict(zip(fields, row)) for row in snapshot['transactions']]
+
+
+wallet_cache = WalletCache()
@@ -22,6 +22,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from .utils.moniepoint import MoniepointAPI
 from .utils.payment import PaymentProcessor
+from .utils.wallet_cache import wallet_cache
 
 # Stripe configuration commented out - Using Moniepoint
 # stripe.api_key = settings.STRIPE_SECRET_KEY
@@ -101,7 +102,12 @@ def dashboard(request):
 
 @login_required
 def dashboard(request):
-    return render(request, 'accounts/dashboard.html')
+    snapshot = wallet_cache.get(request.user.pk)
+    context = {
+        'wallet': snapshot['wallet'] if snapshot else None,
+        'transactions': wallet_cache.transaction_values(snapshot)[:5] if snapshot else [],
+    }
+    return render(request, 'accounts/dashboard.html', context)
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
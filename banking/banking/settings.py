@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.middleware.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'accounts.middleware.log_request.LogRequestMiddleware',
@@ -76,14 +78,28 @@ TEMPLATES = [
 WSGI_APPLICATION = 'banking.wsgi.application'
 
 # Database - Using SQLite for easy local testing
+# DB_CONNECTION_MODE: 'persistent' or 'pooler' (PgBouncer transaction
+# pooling, see accounts/db_connections.py)
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='persistent')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
         'ATOMIC_REQUESTS': True,
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas - aliases in DATABASES used for history, admin reports and
+# reconciliation scans; routing is a no-op while this is empty
+REPLICA_DATABASES = []
+DATABASE_ROUTERS = ['accounts.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_LAG_CHECK_INTERVAL = 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -182,10 +198,44 @@ CACHES = {
     }
 }
 
+# Pepper for API key hashes - changing it invalidates every issued key
+API_KEY_PEPPER = config('API_KEY_PEPPER', default=SECRET_KEY)
+
+# API key authentication caching (seconds)
+API_KEY_CACHE_TTL = 300
+API_KEY_LOCAL_CACHE_TTL = 5
+API_KEY_INVALID_CACHE_TTL = 30
+API_KEY_LAST_USED_INTERVAL = 60
+
+# Transaction PINs - hasher (pin_hmac_sha256 or pin_scrypt), pepper and
+# lockout after repeated failures
+TRANSACTION_PIN_HASHER = config('TRANSACTION_PIN_HASHER', default='pin_hmac_sha256')
+TRANSACTION_PIN_PEPPER = config('TRANSACTION_PIN_PEPPER', default=SECRET_KEY)
+TRANSACTION_PIN_SCRYPT_WORK_FACTOR = 2**12
+TRANSACTION_PIN_MAX_ATTEMPTS = 5
+TRANSACTION_PIN_LOCKOUT_SECONDS = 900
+
+# Throttle rates per tier (accounts.throttling); admins can override them
+# per API key (APIKey.rate_limit) and per merchant (User.api_rate_limit)
+API_THROTTLE_RATES = {
+    'user': '100/min',
+    'name_enquiry': '200/hour',
+    'merchant': '1000/min',
+    'api_key': '1000/min',
+    'webhook': '500/min',
+}
+
 # Celery Configuration - Disabled for simple testing
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Statement exports - longer date ranges are built in the background
+STATEMENT_EXPORT_SYNC_MAX_DAYS = config(
+    'STATEMENT_EXPORT_SYNC_MAX_DAYS',
+    default=93,
+    cast=int
+)
+
 # Email Configuration - Console backend for testing
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -205,6 +255,61 @@ PAYSTACK_BASE_URL = config(
     'PAYSTACK_BASE_URL',
     default='https://api.paystack.co'
 )
+PAYSTACK_PREFERRED_BANK = config('PAYSTACK_PREFERRED_BANK', default='wema-bank')
+
+# Virtual account provisioning - queued on registration, created by a
+# background worker and retried by `manage.py provision_virtual_accounts`
+VIRTUAL_ACCOUNT_BACKGROUND_WORKER = True
+VIRTUAL_ACCOUNT_MAX_ATTEMPTS = 5
+VIRTUAL_ACCOUNT_RETRY_DELAY = 60
+VIRTUAL_ACCOUNT_LEASE_SECONDS = 120
+
+# Wallet account numbers - 9-digit serial + NUBAN check digit, allocated
+# from blocks of serials reserved per process
+NUBAN_BANK_CODE = config('NUBAN_BANK_CODE', default='999')
+ACCOUNT_NUMBER_BLOCK_SIZE = 100
+ACCOUNT_NUMBER_FIRST_SERIAL = 300000000
+
+# Account number -> holder lookups for name enquiry and transfers
+ACCOUNT_RESOLVER_CACHE_TTL = 300
+ACCOUNT_RESOLVER_UNKNOWN_CACHE_TTL = 30
+
+# Cached wallet balance + recent transactions, refreshed after each posting
+WALLET_CACHE_TTL = 300
+WALLET_CACHE_RECENT_TRANSACTIONS = 10
+
+# Ledger -> core_ledger blockchain sync. Postings write outbox rows;
+# `manage.py sync_ledger_chain` mirrors them, one block per batch
+# into the block store at LEDGER_CHAIN_PATH (empty = in memory)
+CORE_LEDGER_PATH = config('CORE_LEDGER_PATH', default=str(BASE_DIR.parent / 'core_ledger'))
+LEDGER_SYNC_ENABLED = config('LEDGER_SYNC_ENABLED', default=True, cast=bool)
+LEDGER_SYNC_BATCH_SIZE = 500
+LEDGER_SYNC_INTERVAL = 5
+LEDGER_CHAIN_DIFFICULTY = 4
+LEDGER_CHAIN_PATH = config('LEDGER_CHAIN_PATH', default=str(BASE_DIR / 'ledger_chain'))
+LEDGER_CHAIN_SNAPSHOT_INTERVAL = 100
+LEDGER_CHAIN_ISSUER_ADDRESS = 'gax_ledger'
+LEDGER_CHAIN_SETTLEMENT_ADDRESS = 'gax_settlement'
+
+# TRINITY escrow service. Escrowed purchases hold funds in a local
+# EscrowAccount and notify TRINITY after commit; failed notifications
+# are retried by `manage.py send_escrow_notifications`. Held escrows are
+# released after DEFAULT_ESCROW_AUTO_RELEASE_HOURS by `manage.py release_escrows`
+TRINITY_API_URL = config('TRINITY_API_URL', default='http://localhost:8002')
+SHARED_SERVICE_SECRET = config('SHARED_SERVICE_SECRET', default='')
+DEFAULT_ESCROW_AUTO_RELEASE_HOURS = 72
+ESCROW_NOTIFICATION_BACKGROUND_WORKER = True
+ESCROW_NOTIFICATION_TIMEOUT = 10
+ESCROW_NOTIFICATION_MAX_ATTEMPTS = 8
+ESCROW_NOTIFICATION_RETRY_DELAY = 30
+ESCROW_NOTIFICATION_LEASE_SECONDS = 60
+ESCROW_RELEASE_BATCH_SIZE = 500
+ESCROW_RELEASE_INTERVAL = 60
+
+# Fees come from FeeRule rule sets (built-in schedule where none match),
+# compiled in memory; other processes pick up rule changes within
+# FEE_RULES_CHECK_INTERVAL seconds
+FEE_RULES_CHECK_INTERVAL = 5
 
 # Moniepoint Configuration (BACKUP)
 MONIEPOINT_SANDBOX_BASE_URL = config(
@@ -287,18 +392,31 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'access_json': {
+            '()': 'accounts.middleware.log_request.AccessLogFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'access': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'access_json',
+        },
     },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
     'loggers': {
+        # Written from a queue listener thread (LogRequestMiddleware)
+        'api_requests': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console'],
             'level': 'INFO',
@@ -312,5 +430,15 @@ LOGGING = {
     },
 }
 
+# API access log - fraction of 2xx/3xx requests logged (errors and
+# requests slower than LOG_REQUEST_SLOW_MS are always logged)
+LOG_REQUEST_SAMPLE_RATE = config('LOG_REQUEST_SAMPLE_RATE', default=1.0, cast=float)
+LOG_REQUEST_SLOW_MS = 1000
+LOG_REQUEST_QUEUE_SIZE = 10000
+
+# Per-view request metrics served at /metrics (Prometheus text format)
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+
 
 
@@ -19,12 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from accounts import views as account_views
+from accounts.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', account_views.dashboard, name='home'),
     path('api/', include('accounts.api_urls')),
     path('accounts/', include('accounts.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,96 @@
+"""
+Benchmark balance lookups through the Python bindings
+Lookups/sec for single and batched calls at different UTXO pool sizes,
+or hash rate and block mining time with --mining
+
+Usage: make python && python3 bench_bindings.py [--pool-sizes 1000,10000,100000]
+       python3 bench_bindings.py --mining 3,4,5,6
+"""
+
+import argparse
+import random
+import time
+
+from blockchain_bindings import BlockchainBinding
+
+
+def fill_pool(chain, pool_size, outputs_per_address, batch_size):
+    """Issue pool_size outputs spread over pool_size / outputs_per_address addresses"""
+    address_count = max(1, pool_size // outputs_per_address)
+    addresses = [f'bench{number:010d}' for number in range(address_count)]
+
+    for start in range(0, pool_size, batch_size):
+        chain.submit_transactions(
+            {
+                'type': 'issue',
+                'sender': 'bench',
+                'recipient': addresses[number % address_count],
+                'amount': 1.0,
+                'metadata': f'bench-{number}',
+            }
+            for number in range(start, min(start + batch_size, pool_size))
+        )
+        chain.mine_block()
+
+    return addresses
+
+
+def measure(lookup, addresses, lookups, batch_size):
+    """Lookups per second for lookup(list_of_addresses)"""
+    sample = random.choices(addresses, k=lookups)
+    started = time.perf_counter()
+    for start in range(0, lookups, batch_size):
+        lookup(sample[start:start + batch_size])
+    return lookups / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pool-sizes', default='1000,10000,100000',
+                        help='Comma-separated UTXO pool sizes (default: 1000,10000,100000)')
+    parser.add_argument('--outputs-per-address', type=int, default=10,
+                        help='Unspent outputs per address (default: 10)')
+    parser.add_argument('--lookups', type=int, default=50000,
+                        help='Balance lookups per measurement (default: 50000)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Addresses per get_balances call (default: 1000)')
+    parser.add_argument('--difficulty', type=int, default=1,
+                        help='Mining difficulty while filling the pool (default: 1)')
+    parser.add_argument('--mining',
+                        help='Benchmark mining at these comma-separated difficulties instead')
+    parser.add_argument('--blocks', type=int, default=3,
+                        help='Blocks mined per difficulty with --mining (default: 3)')
+    parser.add_argument('--transactions', type=int, default=100,
+                        help='Transactions per block with --mining (default: 100)')
+    args = parser.parse_args()
+
+    chain = BlockchainBinding(difficulty=args.difficulty)
+
+    if args.mining:
+        print(f"{'difficulty':>10} {'hashes/s':>12} {'s/block':>10}")
+        for result in chain.benchmark_mining(
+            [int(level) for level in args.mining.split(',')],
+            blocks=args.blocks, transactions=args.transactions
+        ):
+            print(f"{result['difficulty']:>10} {result['hashes_per_second']:>12.0f} "
+                  f"{result['seconds_per_block']:>10.3f}")
+        return
+
+    print(f"{'pool size':>10} {'addresses':>10} {'single/s':>12} {'batched/s':>12}")
+    for pool_size in (int(size) for size in args.pool_sizes.split(',')):
+        chain.reset()
+        addresses = fill_pool(chain, pool_size, args.outputs_per_address, 10000)
+        assert chain.verify_chain()
+
+        single = measure(
+            lambda batch: [chain.get_balance(address) for address in batch],
+            addresses, args.lookups, args.batch_size
+        )
+        batched = measure(chain.get_balances, addresses, args.lookups, args.batch_size)
+
+        print(f"{chain.get_utxo_count():>10} {len(addresses):>10} "
+              f"{single:>12.0f} {batched:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,8 @@
  * - Transaction verification
  * - Block mining with difficulty adjustment
  * - Merkle tree for transaction verification
+ * - Optional append-only block store with UTXO snapshots
+ * - Incremental and parallel chain verification
  * 
  * Author: GAX Development Team
  * License: MIT
@@ -20,10 +22,27 @@
 #include <string>
 #include <vector>
 #include <ctime>
+#include <cerrno>
+#include <cstdint>
+#include <cstring>
+#include <iostream>
 #include <sstream>
 #include <iomanip>
 #include <memory>
+#include <algorithm>
+#include <array>
+#include <charconv>
+#include <atomic>
+#include <chrono>
 #include <map>
+#include <stdexcept>
+#include <thread>
+#include <unordered_map>
+#include <fcntl.h>
+#include <sys/file.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
 #include <openssl/sha.h>
 #include <openssl/ec.h>
 #include <openssl/ecdsa.h>
@@ -35,7 +54,6 @@ namespace gax {
 class Transaction;
 class Block;
 class Blockchain;
-class Wallet;
 
 /**
  * Utility functions for blockchain operations
@@ -47,16 +65,46 @@ public:
      */
     static std::string sha256(const std::string& input) {
         unsigned char hash[SHA256_DIGEST_LENGTH];
+        sha256Digest(input.data(), input.size(), hash);
+        return toHex(hash);
+    }
+    
+    /**
+     * Binary SHA-256 digest (out holds SHA256_DIGEST_LENGTH bytes)
+     */
+    static void sha256Digest(const void* data, size_t size, unsigned char* out) {
         SHA256_CTX sha256;
         SHA256_Init(&sha256);
-        SHA256_Update(&sha256, input.c_str(), input.size());
-        SHA256_Final(hash, &sha256);
-        
-        std::stringstream ss;
+        SHA256_Update(&sha256, data, size);
+        SHA256_Final(out, &sha256);
+    }
+    
+    /**
+     * Lowercase hex of a digest into out (2 * SHA256_DIGEST_LENGTH chars)
+     */
+    static void toHex(const unsigned char* digest, char* out) {
+        static const char digits[] = "0123456789abcdef";
         for(int i = 0; i < SHA256_DIGEST_LENGTH; i++) {
-            ss << std::hex << std::setw(2) << std::setfill('0') << static_cast<int>(hash[i]);
+            out[2 * i] = digits[digest[i] >> 4];
+            out[2 * i + 1] = digits[digest[i] & 0x0f];
         }
-        return ss.str();
+    }
+    
+    static std::string toHex(const unsigned char* digest) {
+        std::string hex(2 * SHA256_DIGEST_LENGTH, '0');
+        toHex(digest, &hex[0]);
+        return hex;
+    }
+    
+    /**
+     * True if the hex form of digest starts with zeros leading '0' digits
+     */
+    static bool hasLeadingZeros(const unsigned char* digest, int zeros) {
+        int bytes = zeros / 2;
+        for(int i = 0; i < bytes; i++) {
+            if(digest[i] != 0) return false;
+        }
+        return zeros % 2 == 0 || (digest[bytes] >> 4) == 0;
     }
     
     /**
@@ -66,13 +114,80 @@ public:
         return static_cast<long long>(std::time(nullptr));
     }
     
+    /**
+     * Progress output (mining, pool changes); off for the Python library
+     */
+    static bool& verbose() {
+        static bool enabled = true;
+        return enabled;
+    }
+    
     /**
      * Convert double to string with precision
      */
     static std::string doubleToString(double value, int precision = 8) {
-        std::ostringstream out;
-        out << std::fixed << std::setprecision(precision) << value;
-        return out.str();
+        char buffer[64];
+        int length = std::snprintf(buffer, sizeof(buffer), "%.*f", precision, value);
+        if(length < 0 || length >= static_cast<int>(sizeof(buffer))) {
+            std::ostringstream out;
+            out << std::fixed << std::setprecision(precision) << value;
+            return out.str();
+        }
+        return std::string(buffer, length);
+    }
+};
+
+/**
+ * Binary record encoding for the block store and UTXO snapshots
+ * (host byte order: files move between machines of the same architecture)
+ */
+class ByteWriter {
+private:
+    std::string buffer;
+    
+public:
+    template<typename T>
+    void put(T value) {
+        buffer.append(reinterpret_cast<const char*>(&value), sizeof(T));
+    }
+    
+    void putString(const std::string& value) {
+        put<uint32_t>(value.size());
+        buffer.append(value);
+    }
+    
+    const std::string& data() const { return buffer; }
+};
+
+class ByteReader {
+private:
+    const char* cursor;
+    const char* end;
+    
+    void require(size_t size) const {
+        if(static_cast<size_t>(end - cursor) < size) {
+            throw std::runtime_error("Truncated record");
+        }
+    }
+    
+public:
+    ByteReader(const char* data, size_t size) : cursor(data), end(data + size) {}
+    
+    template<typename T>
+    T get() {
+        require(sizeof(T));
+        T value;
+        std::memcpy(&value, cursor, sizeof(T));
+        cursor += sizeof(T);
+        return value;
+    }
+    
+    std::string getString() {
+        uint32_t size = get<uint32_t>();
+        require(size);
+        std::string value(cursor, size);
+        cursor += size;
+        return value;
     }
 };
 
@@ -98,6 +213,8 @@ struct TransactionOutput {
     std::string txHash;            // Hash of transaction containing this output
     int index;                     // Index in transaction outputs
     
+    TransactionOutput() : amount(0.0), index(0) {}
+    
     TransactionOutput(const std::string& addr, double amt)
         : recipientAddress(addr), amount(amt), index(0) {}
     
@@ -116,12 +233,14 @@ private:
     std::vector<TransactionOutput> outputs;
     long long timestamp;
     std::string senderAddress;
-    std::string type;  // "transfer", "coinbase", "premium", "purchase"
+    std::string type;  // "transfer", "coinbase", "issue", "premium", "purchase"
     std::string metadata;  // JSON metadata for additional info
+    uint64_t sequence;     // Node submission number, keeps hashes unique
     
 public:
     Transaction(const std::string& sender, const std::string& txType = "transfer")
-        : senderAddress(sender), type(txType), timestamp(Utils::getCurrentTimestamp()) {}
+        : timestamp(Utils::getCurrentTimestamp()), senderAddress(sender), type(txType),
+          sequence(0) {}
     
     void addInput(const TransactionInput& input) {
         inputs.push_back(input);
@@ -135,23 +254,31 @@ public:
         metadata = meta;
     }
     
+    void setSequence(uint64_t seq) {
+        sequence = seq;
+    }
+    
     /**
      * Calculate transaction hash
      */
     std::string calculateHash() const {
-        std::stringstream ss;
-        ss << senderAddress << timestamp << type;
+        std::string data = senderAddress + std::to_string(timestamp) + type;
         
         for(const auto& input : inputs) {
-            ss << input.previousTxHash << input.outputIndex;
+            data += input.previousTxHash;
+            data += std::to_string(input.outputIndex);
         }
         
         for(const auto& output : outputs) {
-            ss << output.recipientAddress << Utils::doubleToString(output.amount);
+            data += output.recipientAddress;
+            data += Utils::doubleToString(output.amount);
         }
         
-        ss << metadata;
-        return Utils::sha256(ss.str());
+        data += metadata;
+        if(sequence) {
+            data += std::to_string(sequence);
+        }
+        return Utils::sha256(data);
     }
     
     void finalize() {
@@ -168,8 +295,8 @@ public:
      */
     bool verify() const {
         // Basic validation
-        if(inputs.empty() && type != "coinbase") {
-            return false;  // Non-coinbase tx must have inputs
+        if(inputs.empty() && type != "coinbase" && type != "issue") {
+            return false;  // Only coinbase and issue (ledger credits) create value
         }
         
         if(outputs.empty()) {
@@ -204,6 +331,58 @@ public:
     const std::vector<TransactionOutput>& getOutputs() const { return outputs; }
     long long getTimestamp() const { return timestamp; }
     std::string getMetadata() const { return metadata; }
+    
+    void serialize(ByteWriter& out) const {
+        out.putString(txHash);
+        out.put<int64_t>(timestamp);
+        out.putString(senderAddress);
+        out.putString(type);
+        out.putString(metadata);
+        out.put<uint64_t>(sequence);
+        
+        out.put<uint32_t>(inputs.size());
+        for(const auto& input : inputs) {
+            out.putString(input.previousTxHash);
+            out.put<int32_t>(input.outputIndex);
+            out.putString(input.signature);
+            out.putString(input.publicKey);
+        }
+        
+        out.put<uint32_t>(outputs.size());
+        for(const auto& output : outputs) {
+            out.putString(output.recipientAddress);
+            out.put<double>(output.amount);
+        }
+    }
+    
+    static Transaction deserialize(ByteReader& in) {
+        Transaction tx("", "");
+        tx.txHash = in.getString();
+        tx.timestamp = in.get<int64_t>();
+        tx.senderAddress = in.getString();
+        tx.type = in.getString();
+        tx.metadata = in.getString();
+        tx.sequence = in.get<uint64_t>();
+        
+        uint32_t inputCount = in.get<uint32_t>();
+        for(uint32_t i = 0; i < inputCount; i++) {
+            std::string previousTxHash = in.getString();
+            TransactionInput input(previousTxHash, in.get<int32_t>());
+            input.signature = in.getString();
+            input.publicKey = in.getString();
+            tx.inputs.push_back(input);
+        }
+        
+        uint32_t outputCount = in.get<uint32_t>();
+        for(uint32_t i = 0; i < outputCount; i++) {
+            std::string recipientAddress = in.getString();
+            TransactionOutput output(recipientAddress, in.get<double>());
+            output.txHash = tx.txHash;
+            output.index = i;
+            tx.outputs.push_back(output);
+        }
+        return tx;
+    }
 };
 
 /**
@@ -211,6 +390,8 @@ public:
  */
 class MerkleTree {
 private:
+    static constexpr size_t HEX_LENGTH = 2 * SHA256_DIGEST_LENGTH;
+    
     std::vector<std::string> leaves;
     std::string root;
     
@@ -218,6 +399,36 @@ private:
         return Utils::sha256(left + right);
     }
     
+    /**
+     * Root over full-length hex leaves, one flat buffer per level
+     * Node = sha256(hex(left) + hex(right)), as in combinedHash
+     */
+    std::string calculateFlatRoot() const {
+        std::string level;
+        level.reserve(leaves.size() * HEX_LENGTH);
+        for(const auto& leaf : leaves) {
+            level += leaf;
+        }
+        
+        unsigned char digest[SHA256_DIGEST_LENGTH];
+        char pair[2 * HEX_LENGTH];
+        size_t count = leaves.size();
+        while(count > 1) {
+            size_t next = (count + 1) / 2;
+            for(size_t i = 0; i < next; i++) {
+                const char* left = &level[2 * i * HEX_LENGTH];
+                // Odd number - duplicate last hash
+                const char* right = 2 * i + 1 < count ? left + HEX_LENGTH : left;
+                std::memcpy(pair, left, HEX_LENGTH);
+                std::memcpy(pair + HEX_LENGTH, right, HEX_LENGTH);
+                Utils::sha256Digest(pair, sizeof(pair), digest);
+                Utils::toHex(digest, &level[i * HEX_LENGTH]);
+            }
+            count = next;
+        }
+        return level.substr(0, HEX_LENGTH);
+    }
+    
 public:
     void addLeaf(const std::string& hash) {
         leaves.push_back(hash);
@@ -227,6 +438,14 @@ public:
         if(leaves.empty()) return "";
         if(leaves.size() == 1) return leaves[0];
         
+        bool flat = std::all_of(leaves.begin(), leaves.end(), [](const std::string& leaf) {
+            return leaf.size() == HEX_LENGTH;
+        });
+        if(flat) {
+            root = calculateFlatRoot();
+            return root;
+        }
+        
         std::vector<std::string> currentLevel = leaves;
         
         while(currentLevel.size() > 1) {
@@ -264,6 +483,16 @@ private:
     std::string merkleRoot;
     int nonce;
     int difficulty;
+    // Merkle root of transactions, computed once (cleared by addTransaction)
+    mutable std::string merkleCache;
+    
+    /**
+     * Header fields hashed before the nonce
+     * Hash input = prefix + nonce + difficulty (decimal)
+     */
+    std::string headerPrefix() const {
+        return std::to_string(index) + std::to_string(timestamp) + previousHash + merkleRoot;
+    }
     
 public:
     Block(int idx, const std::string& prevHash, int diff = 4)
@@ -273,46 +502,67 @@ public:
     
     void addTransaction(const Transaction& tx) {
         transactions.push_back(tx);
+        merkleCache.clear();
     }
     
     /**
      * Calculate Merkle root of all transactions
      */
-    std::string calculateMerkleRoot() {
-        MerkleTree tree;
-        for(const auto& tx : transactions) {
-            tree.addLeaf(tx.getHash());
+    std::string calculateMerkleRoot() const {
+        if(merkleCache.empty() && !transactions.empty()) {
+            MerkleTree tree;
+            for(const auto& tx : transactions) {
+                tree.addLeaf(tx.getHash());
+            }
+            merkleCache = tree.calculateRoot();
         }
-        return tree.calculateRoot();
+        return merkleCache;
     }
     
     /**
      * Calculate block hash (without PoW)
      */
     std::string calculateHash() const {
-        std::stringstream ss;
-        ss << index << timestamp << previousHash << merkleRoot << nonce << difficulty;
-        
-        return Utils::sha256(ss.str());
+        return Utils::sha256(headerPrefix() + std::to_string(nonce) + std::to_string(difficulty));
     }
     
     /**
      * Mine block using Proof of Work
      * Find nonce such that hash starts with 'difficulty' number of zeros
+     *
+     * The SHA-256 state after the header prefix (midstate) is computed
+     * once; each attempt copies it and hashes only the nonce and
+     * difficulty digits, checking the binary digest for leading zeros.
      */
     void mineBlock() {
         merkleRoot = calculateMerkleRoot();
-        std::string target(difficulty, '0');
         
-        std::cout << "Mining block " << index << "..." << std::endl;
+        if(Utils::verbose()) {
+            std::cout << "Mining block " << index << "..." << std::endl;
+        }
+        
+        std::string prefix = headerPrefix();
+        SHA256_CTX midstate;
+        SHA256_Init(&midstate);
+        SHA256_Update(&midstate, prefix.data(), prefix.size());
+        std::string suffix = std::to_string(difficulty);
         
+        unsigned char digest[SHA256_DIGEST_LENGTH];
+        char digits[16];
         do {
             nonce++;
-            hash = calculateHash();
-        } while(hash.substr(0, difficulty) != target);
+            char* end = std::to_chars(digits, digits + sizeof(digits), nonce).ptr;
+            SHA256_CTX attempt = midstate;
+            SHA256_Update(&attempt, digits, end - digits);
+            SHA256_Update(&attempt, suffix.data(), suffix.size());
+            SHA256_Final(digest, &attempt);
+        } while(!Utils::hasLeadingZeros(digest, difficulty));
+        hash = Utils::toHex(digest);
         
-        std::cout << "Block mined! Hash: " << hash << std::endl;
-        std::cout << "Nonce: " << nonce << std::endl;
+        if(Utils::verbose()) {
+            std::cout << "Block mined! Hash: " << hash << std::endl;
+            std::cout << "Nonce: " << nonce << std::endl;
+        }
     }
     
     /**
@@ -330,12 +580,15 @@ public:
             return false;
         }
         
-        // Verify all transactions
+        // Verify all transactions, and that the header commits to them
         for(const auto& tx : transactions) {
-            if(!tx.verify()) {
+            if(!tx.verify() || tx.getHash() != tx.calculateHash()) {
                 return false;
             }
         }
+        if(merkleRoot != calculateMerkleRoot()) {
+            return false;
+        }
         
         return true;
     }
@@ -349,29 +602,308 @@ public:
     long long getTimestamp() const { return timestamp; }
     const std::vector<Transaction>& getTransactions() const { return transactions; }
     int getDifficulty() const { return difficulty; }
+    
+    void serialize(ByteWriter& out) const {
+        out.put<int32_t>(index);
+        out.put<int64_t>(timestamp);
+        out.putString(previousHash);
+        out.putString(hash);
+        out.putString(merkleRoot);
+        out.put<int32_t>(nonce);
+        out.put<int32_t>(difficulty);
+        out.put<uint32_t>(transactions.size());
+        for(const auto& tx : transactions) {
+            tx.serialize(out);
+        }
+    }
+    
+    static Block deserialize(ByteReader& in) {
+        int32_t index = in.get<int32_t>();
+        Block block(index, "", 0);
+        block.timestamp = in.get<int64_t>();
+        block.previousHash = in.getString();
+        block.hash = in.getString();
+        block.merkleRoot = in.getString();
+        block.nonce = in.get<int32_t>();
+        block.difficulty = in.get<int32_t>();
+        uint32_t count = in.get<uint32_t>();
+        block.transactions.reserve(count);
+        for(uint32_t i = 0; i < count; i++) {
+            block.transactions.push_back(Transaction::deserialize(in));
+        }
+        return block;
+    }
+};
+
+/**
+ * Block Store - Append-only block file with a memory-mapped index
+ *
+ * Directory layout:
+ *   blocks.dat     [u32 length][block record] per block, append-only
+ *   blocks.idx     [u64 magic][u64 count][u64 offset per block], mmap'd
+ *   utxo.snapshot  UTXO pool at some height, written by Blockchain
+ *
+ * Opening reads two words of the index, however long the chain. A block
+ * is synced to blocks.dat before the index count covers it, so a crash
+ * leaves at most a torn tail, which is cut off on the next open.
+ * The index is flock'ed, so a second process cannot open the store.
+ */
+class BlockStore {
+private:
+    static constexpr uint64_t MAGIC = 0x3158444958414700ULL;  // "\0GAXIDX1"
+    static constexpr size_t HEADER_WORDS = 2;
+    static constexpr size_t INDEX_GROWTH = 65536;  // Offsets added per resize
+    
+    std::string directory;
+    int dataFd;
+    int indexFd;
+    uint64_t* index;
+    size_t capacity;
+    uint64_t dataEnd;
+    
+    static void fail(const std::string& what) {
+        throw std::runtime_error(what + ": " + std::strerror(errno));
+    }
+    
+    size_t mappedBytes() const {
+        return (HEADER_WORDS + capacity) * sizeof(uint64_t);
+    }
+    
+    void mapIndex(size_t entries) {
+        if(index != nullptr) {
+            munmap(index, mappedBytes());
+            index = nullptr;
+        }
+        capacity = entries;
+        if(ftruncate(indexFd, mappedBytes()) != 0) fail("Cannot size block index");
+        void* mapped = mmap(nullptr, mappedBytes(), PROT_READ | PROT_WRITE, MAP_SHARED, indexFd, 0);
+        if(mapped == MAP_FAILED) fail("Cannot map block index");
+        index = static_cast<uint64_t*>(mapped);
+    }
+    
+    void syncIndex() {
+        if(msync(index, mappedBytes(), MS_SYNC) != 0) fail("Cannot sync block index");
+    }
+    
+    void readAt(uint64_t offset, char* buffer, size_t size) const {
+        while(size > 0) {
+            ssize_t n = pread(dataFd, buffer, size, offset);
+            if(n <= 0) throw std::runtime_error("Cannot read block record");
+            buffer += n;
+            size -= n;
+            offset += n;
+        }
+    }
+    
+    void writeAt(uint64_t offset, const char* buffer, size_t size) {
+        while(size > 0) {
+            ssize_t n = pwrite(dataFd, buffer, size, offset);
+            if(n <= 0) fail("Cannot write block record");
+            buffer += n;
+            size -= n;
+            offset += n;
+        }
+    }
+    
+    uint64_t recordEnd(size_t height) const {
+        uint64_t offset = index[HEADER_WORDS + height];
+        uint32_t length;
+        readAt(offset, reinterpret_cast<char*>(&length), sizeof(length));
+        return offset + sizeof(length) + length;
+    }
+    
+    void release() {
+        if(index != nullptr) munmap(index, mappedBytes());
+        if(dataFd >= 0) close(dataFd);
+        if(indexFd >= 0) close(indexFd);
+        index = nullptr;
+        dataFd = indexFd = -1;
+    }
+    
+    void openFiles() {
+        if(mkdir(directory.c_str(), 0755) != 0 && errno != EEXIST) fail("Cannot create " + directory);
+        
+        dataFd = open(path("blocks.dat").c_str(), O_RDWR | O_CREAT | O_CLOEXEC, 0644);
+        if(dataFd < 0) fail("Cannot open " + path("blocks.dat"));
+        indexFd = open(path("blocks.idx").c_str(), O_RDWR | O_CREAT | O_CLOEXEC, 0644);
+        if(indexFd < 0) fail("Cannot open " + path("blocks.idx"));
+        if(flock(indexFd, LOCK_EX | LOCK_NB) != 0) fail(directory + " is in use");
+        
+        struct stat st;
+        if(fstat(indexFd, &st) != 0) fail("Cannot stat block index");
+        uint64_t magic = 0;
+        if(st.st_size != 0 &&
+           (pread(indexFd, &magic, sizeof(magic), 0) != sizeof(magic) || magic != MAGIC)) {
+            throw std::runtime_error("Not a block index: " + path("blocks.idx"));
+        }
+        size_t words = st.st_size / sizeof(uint64_t);
+        mapIndex(words > HEADER_WORDS ? words - HEADER_WORDS : INDEX_GROWTH);
+        if(magic != MAGIC) {
+            index[0] = MAGIC;
+            syncIndex();
+        }
+        
+        // Cut off a record torn by a crash during append
+        dataEnd = size() ? recordEnd(size() - 1) : 0;
+        if(ftruncate(dataFd, dataEnd) != 0) fail("Cannot trim block file");
+    }
+    
+public:
+    explicit BlockStore(const std::string& dir)
+        : directory(dir), dataFd(-1), indexFd(-1), index(nullptr), capacity(0), dataEnd(0) {
+        try {
+            openFiles();
+        } catch(...) {
+            release();
+            throw;
+        }
+    }
+    
+    ~BlockStore() {
+        release();
+    }
+    
+    BlockStore(const BlockStore&) = delete;
+    BlockStore& operator=(const BlockStore&) = delete;
+    
+    size_t size() const { return index[1]; }
+    
+    std::string path(const std::string& name) const {
+        return directory + "/" + name;
+    }
+    
+    void append(const Block& block) {
+        ByteWriter out;
+        block.serialize(out);
+        uint32_t length = out.data().size();
+        
+        writeAt(dataEnd, reinterpret_cast<const char*>(&length), sizeof(length));
+        writeAt(dataEnd + sizeof(length), out.data().data(), length);
+        if(fdatasync(dataFd) != 0) fail("Cannot sync block file");
+        
+        size_t count = size();
+        if(count == capacity) {
+            mapIndex(capacity + INDEX_GROWTH);
+        }
+        index[HEADER_WORDS + count] = dataEnd;
+        index[1] = count + 1;
+        syncIndex();
+        dataEnd += sizeof(length) + length;
+    }
+    
+    Block read(size_t height) const {
+        if(height >= size()) {
+            throw std::out_of_range("Block " + std::to_string(height) + " is not stored");
+        }
+        uint64_t offset = index[HEADER_WORDS + height];
+        uint32_t length;
+        readAt(offset, reinterpret_cast<char*>(&length), sizeof(length));
+        std::string record(length, '\0');
+        readAt(offset + sizeof(length), &record[0], length);
+        
+        ByteReader in(record.data(), record.size());
+        return Block::deserialize(in);
+    }
+    
+    /**
+     * Drop blocks from height on (they were never acknowledged)
+     */
+    void truncate(size_t height) {
+        if(height >= size()) return;
+        index[1] = height;
+        syncIndex();
+        dataEnd = height ? recordEnd(height - 1) : 0;
+        if(ftruncate(dataFd, dataEnd) != 0) fail("Cannot trim block file");
+    }
+    
+    /**
+     * Replace a file atomically (write, sync, rename)
+     */
+    static void writeFile(const std::string& target, const std::string& data) {
+        std::string temp = target + ".tmp";
+        int fd = open(temp.c_str(), O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+        if(fd < 0) fail("Cannot open " + temp);
+        const char* buffer = data.data();
+        size_t remaining = data.size();
+        while(remaining > 0) {
+            ssize_t n = ::write(fd, buffer, remaining);
+            if(n <= 0) {
+                close(fd);
+                fail("Cannot write " + temp);
+            }
+            buffer += n;
+            remaining -= n;
+        }
+        if(fsync(fd) != 0) {
+            close(fd);
+            fail("Cannot sync " + temp);
+        }
+        close(fd);
+        if(rename(temp.c_str(), target.c_str()) != 0) fail("Cannot replace " + target);
+    }
+    
+    static bool readFile(const std::string& source, std::string& data) {
+        int fd = open(source.c_str(), O_RDONLY | O_CLOEXEC);
+        if(fd < 0) return false;
+        struct stat st;
+        bool ok = fstat(fd, &st) == 0;
+        if(ok) {
+            data.resize(st.st_size);
+            size_t done = 0;
+            while(ok && done < data.size()) {
+                ssize_t n = ::read(fd, &data[done], data.size() - done);
+                ok = n > 0;
+                done += ok ? n : 0;
+            }
+        }
+        close(fd);
+        return ok;
+    }
 };
 
 /**
  * UTXO Pool - Tracks unspent transaction outputs
+ *
+ * Outputs are also indexed by recipient address, so a balance or coin
+ * selection costs O(outputs of that address) instead of a pool scan.
  */
 class UTXOPool {
 private:
     // Map: txHash + outputIndex -> TransactionOutput
-    std::map<std::string, TransactionOutput> utxos;
+    std::unordered_map<std::string, TransactionOutput> utxos;
+    // Map: address -> (txHash + outputIndex -> amount)
+    std::unordered_map<std::string, std::unordered_map<std::string, double>> byAddress;
     
     std::string makeKey(const std::string& txHash, int index) const {
         return txHash + ":" + std::to_string(index);
     }
     
+    void unindex(const std::string& key, const std::string& address) {
+        auto it = byAddress.find(address);
+        if(it == byAddress.end()) return;
+        it->second.erase(key);
+        if(it->second.empty()) {
+            byAddress.erase(it);
+        }
+    }
+    
 public:
     void addUTXO(const TransactionOutput& output) {
         std::string key = makeKey(output.txHash, output.index);
+        auto existing = utxos.find(key);
+        if(existing != utxos.end()) {
+            unindex(key, existing->second.recipientAddress);
+        }
         utxos[key] = output;
+        byAddress[output.recipientAddress][key] = output.amount;
     }
     
     void removeUTXO(const std::string& txHash, int index) {
         std::string key = makeKey(txHash, index);
-        utxos.erase(key);
+        auto it = utxos.find(key);
+        if(it == utxos.end()) return;
+        unindex(key, it->second.recipientAddress);
+        utxos.erase(it);
     }
     
     TransactionOutput* getUTXO(const std::string& txHash, int index) {
@@ -384,35 +916,96 @@ public:
     }
     
     double getBalance(const std::string& address) const {
+        auto it = byAddress.find(address);
+        if(it == byAddress.end()) return 0.0;
+        
         double balance = 0.0;
-        for(const auto& pair : utxos) {
-            if(pair.second.recipientAddress == address) {
-                balance += pair.second.amount;
-            }
+        for(const auto& pair : it->second) {
+            balance += pair.second;
         }
         return balance;
     }
     
     std::vector<TransactionOutput> getUTXOsForAddress(const std::string& address) const {
         std::vector<TransactionOutput> result;
-        for(const auto& pair : utxos) {
-            if(pair.second.recipientAddress == address) {
-                result.push_back(pair.second);
-            }
+        auto it = byAddress.find(address);
+        if(it == byAddress.end()) return result;
+        
+        result.reserve(it->second.size());
+        for(const auto& pair : it->second) {
+            result.push_back(utxos.at(pair.first));
         }
         return result;
     }
+    
+    size_t size() const { return utxos.size(); }
+    
+    void clear() {
+        utxos.clear();
+        byAddress.clear();
+    }
+    
+    void serialize(ByteWriter& out) const {
+        out.put<uint64_t>(utxos.size());
+        for(const auto& pair : utxos) {
+            const TransactionOutput& output = pair.second;
+            out.putString(output.txHash);
+            out.put<int32_t>(output.index);
+            out.putString(output.recipientAddress);
+            out.put<double>(output.amount);
+        }
+    }
+    
+    void deserialize(ByteReader& in) {
+        clear();
+        uint64_t count = in.get<uint64_t>();
+        utxos.reserve(count);
+        for(uint64_t i = 0; i < count; i++) {
+            TransactionOutput output;
+            output.txHash = in.getString();
+            output.index = in.get<int32_t>();
+            output.recipientAddress = in.getString();
+            output.amount = in.get<double>();
+            addUTXO(output);
+        }
+    }
+};
+
+/**
+ * Verification result for blocks [start, end)
+ */
+struct VerifySegment {
+    size_t start = 0;
+    size_t end = 0;
+    bool valid = true;
+    size_t failedHeight = 0;   // First bad block when !valid
+    double seconds = 0.0;
+    std::string firstPrevious;  // previousHash of block start
+    std::string lastHash;       // hash of block end - 1
 };
 
 /**
  * Blockchain class - Main blockchain structure
+ *
+ * Blocks live in memory, or in a BlockStore when constructed with a
+ * directory; then only the latest block stays in memory and the UTXO pool
+ * is rebuilt on first use from the newest valid snapshot plus the blocks
+ * after it.
  */
 class Blockchain {
 private:
-    std::vector<Block> chain;
+    static constexpr uint64_t SNAPSHOT_MAGIC = 0x3150414E53584147ULL;  // "GAXSNAP1"
+    
+    std::vector<Block> chain;  // Whole chain, or only the latest block with a store
+    std::unique_ptr<BlockStore> store;
     int difficulty;
-    UTXOPool utxoPool;
     double miningReward;
+    size_t snapshotInterval;
+    // Blocks applied to the pool; 0 = rebuild on next use (genesis is never applied)
+    mutable UTXOPool utxoPool;
+    mutable size_t utxoHeight;
+    // Blocks [0, verifiedHeight) are known valid and linked
+    mutable size_t verifiedHeight;
     
     /**
      * Create genesis block (first block in chain)
@@ -432,34 +1025,224 @@ private:
         return genesis;
     }
     
+    static void applyBlock(UTXOPool& pool, const Block& block) {
+        for(const auto& tx : block.getTransactions()) {
+            // Remove spent UTXOs
+            for(const auto& input : tx.getInputs()) {
+                pool.removeUTXO(input.previousTxHash, input.outputIndex);
+            }
+            
+            // Add new UTXOs
+            for(const auto& output : tx.getOutputs()) {
+                pool.addUTXO(output);
+            }
+        }
+    }
+    
+    /**
+     * Load a snapshot taken at or below the current height on this chain
+     */
+    bool loadSnapshot(const std::string& path) const {
+        std::string data;
+        if(!BlockStore::readFile(path, data)) return false;
+        try {
+            ByteReader in(data.data(), data.size());
+            if(in.get<uint64_t>() != SNAPSHOT_MAGIC) return false;
+            uint64_t height = in.get<uint64_t>();
+            std::string tipHash = in.getString();
+            if(height == 0 || height > static_cast<uint64_t>(getChainLength()) ||
+               getBlock(height - 1).getHash() != tipHash) {
+                return false;
+            }
+            utxoPool.deserialize(in);
+            utxoHeight = height;
+            return true;
+        } catch(const std::exception&) {
+            utxoPool.clear();
+            return false;
+        }
+    }
+    
+    /**
+     * Bring the UTXO pool up to the latest block
+     */
+    void syncUTXOPool() const {
+        size_t length = getChainLength();
+        if(utxoHeight == length) return;
+        
+        if(utxoHeight == 0) {
+            if(!store || !loadSnapshot(store->path("utxo.snapshot"))) {
+                utxoPool.clear();
+                utxoHeight = 1;
+            }
+        }
+        for(; utxoHeight < length; utxoHeight++) {
+            applyBlock(utxoPool, getBlock(utxoHeight));
+        }
+    }
+    
+    /**
+     * Restore the verified height recorded by an earlier process
+     * (only if that block is still on the chain)
+     */
+    void loadVerifiedMark() {
+        std::string data;
+        if(!BlockStore::readFile(store->path("verified"), data)) return;
+        try {
+            ByteReader in(data.data(), data.size());
+            uint64_t height = in.get<uint64_t>();
+            std::string hash = in.getString();
+            if(height >= 1 && height <= store->size() && getBlock(height - 1).getHash() == hash) {
+                verifiedHeight = height;
+            }
+        } catch(const std::exception&) {
+            // Unreadable mark: verify from genesis
+        }
+    }
+    
+    void markVerified(size_t height) const {
+        verifiedHeight = height;
+        if(store) {
+            ByteWriter out;
+            out.put<uint64_t>(height);
+            out.putString(getBlock(height - 1).getHash());
+            BlockStore::writeFile(store->path("verified"), out.data());
+        }
+    }
+    
+    /**
+     * Verify blocks [segment.start, segment.end) and the links between them
+     */
+    void verifySegment(VerifySegment& segment, std::atomic<long>* progress) const {
+        auto started = std::chrono::steady_clock::now();
+        std::string previousHash;
+        for(size_t height = segment.start; height < segment.end && segment.valid; height++) {
+            Block block(0, "");
+            try {
+                block = getBlock(height);
+            } catch(const std::exception&) {
+                // Unreadable record (runs on worker threads: never throw)
+                segment.valid = false;
+                segment.failedHeight = height;
+                break;
+            }
+            if(height == segment.start) {
+                segment.firstPrevious = block.getPreviousHash();
+            } else if(block.getPreviousHash() != previousHash) {
+                segment.valid = false;
+            }
+            if(segment.valid && !block.verify()) {
+                segment.valid = false;
+            }
+            if(!segment.valid) {
+                segment.failedHeight = height;
+            }
+            previousHash = block.getHash();
+            if(progress) progress->fetch_add(1, std::memory_order_relaxed);
+        }
+        segment.lastHash = previousHash;
+        segment.seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - started).count();
+    }
+    
 public:
     Blockchain(int diff = 4, double reward = 50.0)
-        : difficulty(diff), miningReward(reward) {
+        : difficulty(diff), miningReward(reward), snapshotInterval(0), utxoHeight(1),
+          verifiedHeight(1) {
         chain.push_back(createGenesisBlock());
     }
     
+    /**
+     * Open (or create) a chain stored in directory
+     * Writes a UTXO snapshot every snapshotInterval blocks (0 = only on request)
+     */
+    Blockchain(const std::string& directory, int diff = 4, double reward = 50.0,
+               size_t snapshotEvery = 100)
+        : store(new BlockStore(directory)), difficulty(diff), miningReward(reward),
+          snapshotInterval(snapshotEvery), utxoHeight(0), verifiedHeight(1) {
+        if(store->size() == 0) {
+            store->append(createGenesisBlock());
+        }
+        chain.push_back(store->read(store->size() - 1));
+        loadVerifiedMark();
+    }
+    
     /**
      * Add new block to chain
      */
     void addBlock(Block& block) {
         block.mineBlock();
+        appendBlock(block);
+    }
+    
+    /**
+     * Append an already mined block
+     * Returns false if it is invalid or does not extend the latest block
+     */
+    bool appendBlock(const Block& block) {
+        if(!block.verify() || block.getPreviousHash() != getLatestBlock().getHash()) {
+            return false;
+        }
+        
+        // The checks above verify the block, so a verified chain stays verified
+        if(verifiedHeight == static_cast<size_t>(getChainLength())) {
+            verifiedHeight++;
+        }
         
-        if(block.verify()) {
+        // An unloaded pool stays unloaded; it catches up on first use
+        bool current = utxoHeight == static_cast<size_t>(getChainLength());
+        if(store) {
+            store->append(block);
+            chain.back() = block;
+        } else {
             chain.push_back(block);
-            
-            // Update UTXO pool
-            for(const auto& tx : block.getTransactions()) {
-                // Remove spent UTXOs
-                for(const auto& input : tx.getInputs()) {
-                    utxoPool.removeUTXO(input.previousTxHash, input.outputIndex);
-                }
-                
-                // Add new UTXOs
-                for(const auto& output : tx.getOutputs()) {
-                    utxoPool.addUTXO(output);
-                }
-            }
         }
+        
+        if(current) {
+            applyBlock(utxoPool, block);
+            utxoHeight++;
+        }
+        if(store && snapshotInterval && store->size() % snapshotInterval == 0) {
+            snapshot(store->path("utxo.snapshot"));
+        }
+        return true;
+    }
+    
+    /**
+     * Write the UTXO pool at the current height to path (atomically)
+     */
+    void snapshot(const std::string& path) const {
+        syncUTXOPool();
+        ByteWriter out;
+        out.put<uint64_t>(SNAPSHOT_MAGIC);
+        out.put<uint64_t>(utxoHeight);
+        out.putString(getLatestBlock().getHash());
+        utxoPool.serialize(out);
+        BlockStore::writeFile(path, out.data());
+    }
+    
+    /**
+     * Default snapshot location ("" without a store)
+     */
+    std::string snapshotPath() const {
+        return store ? store->path("utxo.snapshot") : "";
+    }
+    
+    /**
+     * Drop blocks after the first length (genesis always stays)
+     */
+    void truncate(size_t length) {
+        length = std::max<size_t>(length, 1);
+        if(length >= static_cast<size_t>(getChainLength())) return;
+        
+        if(store) {
+            store->truncate(length);
+            chain.back() = store->read(length - 1);
+        } else {
+            chain.erase(chain.begin() + length, chain.end());
+        }
+        utxoPool.clear();
+        utxoHeight = 0;
+        verifiedHeight = std::min(verifiedHeight, length);
     }
     
     /**
@@ -469,31 +1252,126 @@ public:
         return chain.back();
     }
     
+    /**
+     * Block at height (read from the store when there is one)
+     */
+    Block getBlock(size_t height) const {
+        if(store) {
+            return store->read(height);
+        }
+        return chain.at(height);
+    }
+    
+    /**
+     * Call fn(block) for every block from genesis to the latest
+     */
+    template<typename Fn>
+    void forEachBlock(Fn fn) const {
+        if(!store) {
+            for(const auto& block : chain) fn(block);
+            return;
+        }
+        for(size_t height = 0; height < store->size(); height++) {
+            fn(store->read(height));
+        }
+    }
+    
     /**
      * Verify entire blockchain integrity
      */
     bool verify() const {
-        for(size_t i = 1; i < chain.size(); i++) {
-            const Block& currentBlock = chain[i];
-            const Block& previousBlock = chain[i - 1];
-            
-            // Verify block is valid
-            if(!currentBlock.verify()) {
-                return false;
+        std::vector<VerifySegment> segments;
+        return verifyParallel(1, 1, segments);
+    }
+    
+    /**
+     * Verify only the blocks after the verified height
+     * Sets checked to the blocks verified and failedHeight to the first
+     * bad block; the verified height advances up to it.
+     */
+    bool verifyIncremental(size_t& checked, size_t& failedHeight) const {
+        VerifySegment segment;
+        segment.start = verifiedHeight;
+        segment.end = getChainLength();
+        checked = segment.end - segment.start;
+        if(checked == 0) return true;
+        
+        verifySegment(segment, nullptr);
+        if(segment.firstPrevious != getBlock(segment.start - 1).getHash()) {
+            segment.valid = false;
+            segment.failedHeight = segment.start;
+        }
+        if(!segment.valid) {
+            failedHeight = segment.failedHeight;
+            checked = failedHeight - segment.start;
+            if(failedHeight > verifiedHeight) markVerified(failedHeight);
+            return false;
+        }
+        markVerified(segment.end);
+        return true;
+    }
+    
+    /**
+     * Verify the whole chain, split into segmentCount ranges checked by
+     * up to threads workers; the links between segments are checked after
+     * they finish. Fills segments (in chain order) and progress (blocks
+     * checked so far). A valid chain becomes the verified height.
+     */
+    bool verifyParallel(size_t threads, size_t segmentCount, std::vector<VerifySegment>& segments,
+                        std::atomic<long>* progress = nullptr) const {
+        size_t length = getChainLength();
+        size_t blocks = length - 1;  // Genesis has nothing to verify against
+        segments.clear();
+        if(blocks == 0) return true;
+        
+        segmentCount = std::max<size_t>(1, std::min(segmentCount, blocks));
+        threads = std::max<size_t>(1, std::min(threads, segmentCount));
+        for(size_t i = 0; i < segmentCount; i++) {
+            VerifySegment segment;
+            segment.start = 1 + blocks * i / segmentCount;
+            segment.end = 1 + blocks * (i + 1) / segmentCount;
+            segments.push_back(segment);
+        }
+        
+        std::atomic<size_t> next(0);
+        auto worker = [&]() {
+            for(size_t i = next++; i < segments.size(); i = next++) {
+                verifySegment(segments[i], progress);
             }
-            
-            // Verify chain linkage
-            if(currentBlock.getPreviousHash() != previousBlock.getHash()) {
-                return false;
+        };
+        std::vector<std::thread> workers;
+        for(size_t i = 1; i < threads; i++) {
+            workers.emplace_back(worker);
+        }
+        worker();
+        for(auto& thread : workers) {
+            thread.join();
+        }
+        
+        // A segment after an invalid one has no trustworthy hash to link to
+        bool valid = true;
+        std::string previousHash = getBlock(0).getHash();
+        for(auto& segment : segments) {
+            if(valid && segment.valid && segment.firstPrevious != previousHash) {
+                segment.valid = false;
+                segment.failedHeight = segment.start;
             }
+            valid = valid && segment.valid;
+            previousHash = segment.lastHash;
         }
-        return true;
+        if(valid) {
+            markVerified(length);
+        }
+        return valid;
     }
     
+    size_t getVerifiedHeight() const { return verifiedHeight; }
+    
     /**
      * Get balance for address
      */
     double getBalance(const std::string& address) const {
+        syncUTXOPool();
         return utxoPool.getBalance(address);
     }
     
@@ -501,12 +1379,22 @@ public:
      * Create and mine new block with pending transactions
      */
     void mineBlock(const std::string& minerAddress, const std::vector<Transaction>& transactions) {
-        Block newBlock(chain.size(), getLatestBlock().getHash(), difficulty);
+        Block newBlock = createBlock(minerAddress, transactions);
+        addBlock(newBlock);
+    }
+    
+    /**
+     * Next block (not yet mined) with the mining reward and the valid transactions
+     */
+    Block createBlock(const std::string& minerAddress, const std::vector<Transaction>& transactions) const {
+        size_t height = getChainLength();
+        Block newBlock(height, getLatestBlock().getHash(), difficulty);
         
         // Add coinbase transaction (mining reward)
         Transaction coinbase(minerAddress, "coinbase");
         TransactionOutput reward(minerAddress, miningReward);
         coinbase.addOutput(reward);
+        coinbase.setSequence(height);  // Rewards in the same second hash differently
         coinbase.finalize();
         newBlock.addTransaction(coinbase);
         
@@ -517,14 +1405,17 @@ public:
             }
         }
         
-        addBlock(newBlock);
+        return newBlock;
     }
     
     // Getters
-    const std::vector<Block>& getChain() const { return chain; }
-    int getChainLength() const { return chain.size(); }
+    int getChainLength() const { return store ? store->size() : chain.size(); }
     int getDifficulty() const { return difficulty; }
-    const UTXOPool& getUTXOPool() const { return utxoPool; }
+    bool isPersistent() const { return store != nullptr; }
+    const UTXOPool& getUTXOPool() const {
+        syncUTXOPool();
+        return utxoPool;
+    }
 };
 
 } // namespace gax
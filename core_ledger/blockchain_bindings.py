@@ -1,18 +1,51 @@
 """
 Python bindings for GAX C++ Blockchain
 Allows Python/Django to interact with the C++ blockchain implementation
+
+The library is loaded with ctypes.CDLL, which releases the GIL for every
+native call, and the node serialises access internally, so one binding can
+be shared by all threads of a worker process. Proof-of-work runs on a
+background mining thread (mine_block_async); mine_block still mines on
+the calling thread.
+
+With a path the chain is kept on disk (blocks.dat, a memory-mapped
+blocks.idx and utxo.snapshot) and reopened on the next start; without one
+it lives in memory for the life of the process.
 """
 
 import ctypes
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 from pathlib import Path
 
+# Strings per transaction in submit_transactions (see blockchain_python.cpp)
+TRANSACTION_FIELDS = ('type', 'sender', 'recipient', 'metadata')
+
+
+def pack_strings(strings):
+    """
+    Pack strings into one buffer plus an int32 offsets array
+
+    String i is buffer[offsets[i]:offsets[i + 1]], the layout the batch
+    calls of the C library expect.
+    """
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = (ctypes.c_int32 * (len(encoded) + 1))(
+        *accumulate(map(len, encoded), initial=0)
+    )
+    return b''.join(encoded), offsets
+
+
 class BlockchainBinding:
     """
     Python wrapper for C++ blockchain library
     """
     
-    def __init__(self, lib_path=None):
+    def __init__(self, lib_path=None, difficulty=4, path=None,
+                 snapshot_interval=100):
         if lib_path is None:
             # Try to find the .so file
             current_dir = Path(__file__).parent
@@ -31,11 +64,44 @@ class BlockchainBinding:
         self.lib.init_blockchain.argtypes = [ctypes.c_int]
         self.lib.init_blockchain.restype = None
         
+        self.lib.reset_blockchain.argtypes = [ctypes.c_int]
+        self.lib.reset_blockchain.restype = None
+        
+        self.lib.load_blockchain.argtypes = [
+            ctypes.c_char_p, ctypes.c_int, ctypes.c_int
+        ]
+        self.lib.load_blockchain.restype = ctypes.c_int
+        
+        self.lib.snapshot_blockchain.argtypes = [ctypes.c_char_p]
+        self.lib.snapshot_blockchain.restype = ctypes.c_bool
+        
+        self.lib.truncate_blockchain.argtypes = [ctypes.c_int]
+        self.lib.truncate_blockchain.restype = ctypes.c_int
+        
         self.lib.get_balance.argtypes = [ctypes.c_char_p]
         self.lib.get_balance.restype = ctypes.c_double
         
+        self.lib.get_balances.argtypes = [
+            ctypes.c_char_p, ctypes.POINTER(ctypes.c_int32), ctypes.c_int,
+            ctypes.POINTER(ctypes.c_double)
+        ]
+        self.lib.get_balances.restype = ctypes.c_int
+        
+        self.lib.submit_transactions.argtypes = [
+            ctypes.c_char_p, ctypes.POINTER(ctypes.c_int32),
+            ctypes.POINTER(ctypes.c_double), ctypes.c_int,
+            ctypes.POINTER(ctypes.c_int8)
+        ]
+        self.lib.submit_transactions.restype = ctypes.c_int
+        
+        self.lib.get_pending_count.argtypes = []
+        self.lib.get_pending_count.restype = ctypes.c_int
+        
+        self.lib.get_utxo_count.argtypes = []
+        self.lib.get_utxo_count.restype = ctypes.c_longlong
+        
         self.lib.mine_block.argtypes = []
-        self.lib.mine_block.restype = None
+        self.lib.mine_block.restype = ctypes.c_int
         
         self.lib.get_chain_length.argtypes = []
         self.lib.get_chain_length.restype = ctypes.c_int
@@ -43,32 +109,344 @@ class BlockchainBinding:
         self.lib.verify_chain.argtypes = []
         self.lib.verify_chain.restype = ctypes.c_bool
         
+        int_ptr = ctypes.POINTER(ctypes.c_int)
+        self.lib.verify_chain_incremental.argtypes = [int_ptr, int_ptr, int_ptr]
+        self.lib.verify_chain_incremental.restype = ctypes.c_bool
+        
+        self.lib.verify_chain_parallel.argtypes = [
+            ctypes.c_int, ctypes.c_int, int_ptr, int_ptr,
+            ctypes.POINTER(ctypes.c_int8), int_ptr,
+            ctypes.POINTER(ctypes.c_double)
+        ]
+        self.lib.verify_chain_parallel.restype = ctypes.c_int
+        
+        self.lib.get_verify_progress.argtypes = []
+        self.lib.get_verify_progress.restype = ctypes.c_long
+        
+        self.lib.get_verified_height.argtypes = []
+        self.lib.get_verified_height.restype = ctypes.c_int
+        
+        self.lib.benchmark_mining.argtypes = [
+            ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            ctypes.POINTER(ctypes.c_longlong)
+        ]
+        self.lib.benchmark_mining.restype = ctypes.c_double
+        
+        # Background mining: one thread, jobs run in submission order
+        self._miner = None
+        self._queued_job = None
+        self._mining = False
+        self._lock = threading.Lock()
+        
         # Initialize blockchain
-        self.lib.init_blockchain(4)  # Difficulty 4
+        self.difficulty = difficulty
+        self.snapshot_interval = snapshot_interval
+        self.path = None
+        if path is not None:
+            self.load(path)
+        else:
+            self.lib.init_blockchain(difficulty)
+    
+    def _drain_miner(self):
+        with self._lock:
+            miner = self._miner
+        if miner is not None:
+            # Let queued mining jobs finish before the node is replaced
+            miner.submit(int).result()
+    
+    def reset(self):
+        """Start over with an empty in-memory chain (benchmarks, tests)"""
+        self._drain_miner()
+        self.lib.reset_blockchain(self.difficulty)
+        self.path = None
+    
+    def load(self, path) -> int:
+        """
+        Open the chain stored in a directory, creating it if missing
+        
+        Opening reads the block index header only; the UTXO pool is
+        restored from the latest snapshot on first use.
+        
+        Returns:
+            int: Chain length
+        """
+        self._drain_miner()
+        length = self.lib.load_blockchain(
+            os.fsencode(path), self.difficulty, self.snapshot_interval
+        )
+        if length < 0:
+            raise OSError(f"Cannot open blockchain store at {path}")
+        self.path = Path(path)
+        return length
+    
+    def snapshot(self, path=None):
+        """Write the UTXO pool to path (default: the store's snapshot file)"""
+        target = os.fsencode(path) if path is not None else b''
+        if not self.lib.snapshot_blockchain(target):
+            raise OSError(f"Cannot write UTXO snapshot to {path or self.path}")
+    
+    def truncate(self, length) -> int:
+        """
+        Drop blocks after the first length (genesis is kept) and the
+        pending transactions
+        
+        Returns:
+            int: New chain length
+        """
+        result = self.lib.truncate_blockchain(max(int(length), 1))
+        if result < 0:
+            raise OSError("Cannot truncate blockchain store")
+        return result
     
     def get_balance(self, address: str) -> float:
         """Get balance for a blockchain address"""
         return self.lib.get_balance(address.encode('utf-8'))
     
-    def mine_block(self):
-        """Mine a new block with pending transactions"""
-        self.lib.mine_block()
+    def get_balances(self, addresses) -> list:
+        """Get balances for many addresses in one call into the library"""
+        addresses = list(addresses)
+        buffer, offsets = pack_strings(addresses)
+        out = (ctypes.c_double * len(addresses))()
+        self.lib.get_balances(buffer, offsets, len(addresses), out)
+        return list(out)
+    
+    def submit_transactions(self, transactions) -> list:
+        """
+        Queue transactions for the next block in one call
+        
+        Args:
+            transactions: dicts with type ('issue' credits the recipient,
+                anything else spends the sender's outputs), sender,
+                recipient, amount and optional metadata
+        
+        Returns:
+            list: True for each transaction accepted into the pending pool
+        """
+        transactions = list(transactions)
+        buffer, offsets = pack_strings(
+            str(tx.get(field) or '')
+            for tx in transactions
+            for field in TRANSACTION_FIELDS
+        )
+        amounts = (ctypes.c_double * len(transactions))(
+            *(float(tx['amount']) for tx in transactions)
+        )
+        accepted = (ctypes.c_int8 * len(transactions))()
+        self.lib.submit_transactions(
+            buffer, offsets, amounts, len(transactions), accepted
+        )
+        return [bool(flag) for flag in accepted]
+    
+    def mine_block(self) -> int:
+        """Mine a new block with pending transactions; returns its index"""
+        index = self.lib.mine_block()
+        if index < 0:
+            raise RuntimeError("Mined block was rejected by the chain")
+        return index
+    
+    def mine_block_async(self, callback=None):
+        """
+        Queue a block for the background mining thread
+        
+        Calls made while a job is still waiting to start share that job, so
+        a burst of requests mines one block with all their transactions.
+        
+        Args:
+            callback: called with the Future once the block is mined, on
+                the mining thread (or immediately if it already finished)
+        
+        Returns:
+            Future: result() is the new block's index; done() polls it
+        """
+        with self._lock:
+            if self._miner is None:
+                self._miner = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='gax-miner'
+                )
+            job = self._queued_job
+            if job is None:
+                job = self._queued_job = self._miner.submit(self._run_mining_job)
+        
+        if callback is not None:
+            job.add_done_callback(callback)
+        return job
+    
+    def _run_mining_job(self):
+        with self._lock:
+            # Later requests need a new job: this one has taken the pool
+            self._queued_job = None
+            self._mining = True
+        try:
+            return self.mine_block()
+        finally:
+            self._mining = False
+    
+    def get_mining_status(self) -> dict:
+        """Non-blocking snapshot of the mining queue and chain"""
+        with self._lock:
+            queued = self._queued_job is not None
+        return {
+            'mining': self._mining,
+            'job_queued': queued,
+            'pending_transactions': self.get_pending_count(),
+            'chain_length': self.get_chain_length(),
+        }
+    
+    def shutdown(self, wait=True):
+        """Stop the mining thread, by default after its queued jobs"""
+        with self._lock:
+            miner, self._miner = self._miner, None
+        if miner is not None:
+            miner.shutdown(wait=wait)
     
     def get_chain_length(self) -> int:
         """Get current blockchain length"""
         return self.lib.get_chain_length()
     
+    def get_pending_count(self) -> int:
+        """Transactions waiting for the next block"""
+        return self.lib.get_pending_count()
+    
+    def get_utxo_count(self) -> int:
+        """Unspent outputs in the UTXO pool"""
+        return self.lib.get_utxo_count()
+    
     def verify_chain(self) -> bool:
-        """Verify blockchain integrity"""
+        """Verify blockchain integrity (every block, on this thread)"""
         return self.lib.verify_chain()
+    
+    def benchmark_mining(self, difficulties=(3, 4, 5, 6), blocks=3,
+                         transactions=100) -> list:
+        """
+        Mine throwaway blocks (the chain is untouched) at each difficulty
+        
+        Returns:
+            list: dicts with difficulty, blocks, hashes, seconds_per_block
+                and hashes_per_second
+        """
+        results = []
+        for difficulty in difficulties:
+            hashes = ctypes.c_longlong()
+            seconds = self.lib.benchmark_mining(
+                difficulty, blocks, transactions, ctypes.byref(hashes)
+            )
+            results.append({
+                'difficulty': difficulty,
+                'blocks': blocks,
+                'hashes': hashes.value,
+                'seconds_per_block': seconds / blocks,
+                'hashes_per_second': hashes.value / seconds if seconds else 0.0,
+            })
+        return results
+    
+    def get_verified_height(self) -> int:
+        """Blocks below this height have been verified"""
+        return self.lib.get_verified_height()
+    
+    def verify_incremental(self) -> dict:
+        """
+        Verify only the blocks added since the last verification
+        
+        Blocks mined by this process are verified as they are appended, and
+        a stored chain remembers its verified height, so periodic checks
+        cost O(new blocks).
+        
+        Returns:
+            dict: valid, verified_height, checked (blocks verified),
+                failed_height (first bad block or None), seconds
+        """
+        verified, checked, failed = ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+        started = time.perf_counter()
+        valid = self.lib.verify_chain_incremental(
+            ctypes.byref(verified), ctypes.byref(checked), ctypes.byref(failed)
+        )
+        return {
+            'valid': valid,
+            'verified_height': verified.value,
+            'checked': checked.value,
+            'failed_height': failed.value if not valid and failed.value else None,
+            'seconds': time.perf_counter() - started,
+        }
+    
+    def verify_full(self, threads=None, segments=None, progress=None,
+                    progress_interval=0.5) -> dict:
+        """
+        Re-verify every block on worker threads
+        
+        The chain is split into segments verified in parallel; the links
+        between adjacent segments are checked once they finish. Other calls
+        into the library wait until verification completes.
+        
+        Args:
+            threads: Worker threads (default: CPU count)
+            segments: Ranges to split the chain into (default: threads)
+            progress: called as progress(checked, total) every
+                progress_interval seconds while verification runs
+        
+        Returns:
+            dict: valid, blocks, verified_height, failed_height, seconds and
+                segments (start, end, valid, failed_height, seconds each)
+        """
+        threads = threads or os.cpu_count() or 1
+        segments = segments or threads
+        starts = (ctypes.c_int * segments)()
+        ends = (ctypes.c_int * segments)()
+        valid = (ctypes.c_int8 * segments)()
+        failed = (ctypes.c_int * segments)()
+        seconds = (ctypes.c_double * segments)()
+        result = []
+        
+        def run():
+            result.append(self.lib.verify_chain_parallel(
+                threads, segments, starts, ends, valid, failed, seconds
+            ))
+        
+        total = max(self.get_chain_length() - 1, 0)
+        started = time.perf_counter()
+        if progress is None:
+            run()
+        else:
+            # The native call releases the GIL; poll its counter meanwhile
+            worker = threading.Thread(target=run, name='gax-verify')
+            worker.start()
+            while worker.is_alive():
+                worker.join(progress_interval)
+                progress(self.lib.get_verify_progress(), total)
+        elapsed = time.perf_counter() - started
+        
+        if result[0] < 0:
+            raise RuntimeError("Chain verification could not run")
+        
+        report = [
+            {
+                'start': starts[i],
+                'end': ends[i],
+                'valid': bool(valid[i]),
+                'failed_height': failed[i] if not valid[i] else None,
+                'seconds': seconds[i],
+            }
+            for i in range(result[0])
+        ]
+        bad = [segment['failed_height'] for segment in report if not segment['valid']]
+        return {
+            'valid': not bad,
+            'blocks': sum(segment['end'] - segment['start'] for segment in report),
+            'verified_height': self.get_verified_height(),
+            'failed_height': bad[0] if bad else None,
+            'seconds': elapsed,
+            'segments': report,
+        }
 
 
 # Singleton instance
 _blockchain = None
+_blockchain_lock = threading.Lock()
 
-def get_blockchain():
-    """Get global blockchain instance"""
+def get_blockchain(**kwargs):
+    """Get global blockchain instance (kwargs are used on the first call)"""
     global _blockchain
     if _blockchain is None:
-        _blockchain = BlockchainBinding()
+        with _blockchain_lock:
+            if _blockchain is None:
+                _blockchain = BlockchainBinding(**kwargs)
     return _blockchain
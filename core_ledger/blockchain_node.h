@@ -0,0 +1,366 @@
+/*
+ * GAX Blockchain - Node
+ *
+ * Wallet and BlockchainNode, shared by the demo executable
+ * (blockchain_main.cpp) and the Python library (blockchain_python.cpp)
+ */
+
+#ifndef BLOCKCHAIN_NODE_H
+#define BLOCKCHAIN_NODE_H
+
+#include "blockchain.h"
+#include <mutex>
+#include <stdexcept>
+#include <unordered_set>
+
+namespace gax {
+
+/**
+ * Wallet class - Manages public/private key pairs
+ * In production, this would use proper ECDSA key generation
+ */
+class Wallet {
+private:
+    std::string privateKey;
+    std::string publicKey;
+    std::string address;
+
+public:
+    Wallet() {
+        // In production: Generate EC key pair using OpenSSL
+        // For now, simplified version
+        generateKeys();
+    }
+
+    void generateKeys() {
+        // Simplified: In production use ECDSA secp256k1
+        privateKey = Utils::sha256(std::to_string(Utils::getCurrentTimestamp()));
+        publicKey = Utils::sha256(privateKey);
+        address = Utils::sha256(publicKey).substr(0, 40);  // First 40 chars
+    }
+
+    std::string getAddress() const {
+        return address;
+    }
+
+    std::string getPublicKey() const {
+        return publicKey;
+    }
+
+    /**
+     * Sign transaction (simplified)
+     * In production: Use ECDSA signature
+     */
+    std::string sign(const std::string& data) const {
+        return Utils::sha256(data + privateKey);
+    }
+
+    /**
+     * Create transaction from this wallet
+     */
+    Transaction createTransaction(const std::string& recipientAddress, double amount,
+                                  Blockchain& blockchain) {
+        Transaction tx(address, "transfer");
+
+        // Get UTXOs for this address
+        std::vector<TransactionOutput> myUTXOs = blockchain.getUTXOPool().getUTXOsForAddress(address);
+
+        double total = 0.0;
+        for(const auto& utxo : myUTXOs) {
+            if(total >= amount) break;
+
+            TransactionInput input(utxo.txHash, utxo.index);
+            input.publicKey = publicKey;
+            input.signature = sign(utxo.txHash + std::to_string(utxo.index));
+
+            tx.addInput(input);
+            total += utxo.amount;
+        }
+
+        if(total < amount) {
+            throw std::runtime_error("Insufficient balance");
+        }
+
+        // Output to recipient
+        TransactionOutput output(recipientAddress, amount);
+        tx.addOutput(output);
+
+        // Change back to sender
+        if(total > amount) {
+            TransactionOutput change(address, total - amount);
+            tx.addOutput(change);
+        }
+
+        tx.finalize();
+        return tx;
+    }
+};
+
+/**
+ * Blockchain Node - Manages blockchain and provides API
+ *
+ * Public methods are thread-safe. Mining holds the node lock only to take
+ * the pending transactions and to append the block, so balance reads and
+ * submissions continue during proof-of-work; a second mining call waits
+ * for the first. getBlockchain() is unsynchronised (single-threaded use).
+ */
+class BlockchainNode {
+private:
+    // Recursive so batch callers can hold it across several calls
+    mutable std::recursive_mutex mutex;
+    std::mutex miningMutex;
+    Blockchain blockchain;
+    std::vector<Transaction> pendingTransactions;
+    // Outputs spent by pending transactions, so a batch cannot double-spend
+    std::unordered_set<std::string> pendingSpends;
+    // Outputs created by pending transactions, spendable by later ones
+    std::unordered_map<std::string, std::vector<TransactionOutput>> pendingOutputs;
+    uint64_t sequence;
+    Wallet minerWallet;
+
+    static std::string outpoint(const std::string& txHash, int index) {
+        return txHash + ":" + std::to_string(index);
+    }
+
+    void trackPending(const Transaction& tx) {
+        for(const auto& input : tx.getInputs()) {
+            pendingSpends.insert(outpoint(input.previousTxHash, input.outputIndex));
+        }
+        for(const auto& output : tx.getOutputs()) {
+            pendingOutputs[output.recipientAddress].push_back(output);
+        }
+    }
+
+public:
+    BlockchainNode(int difficulty = 4) : blockchain(difficulty), sequence(0) {
+        announce();
+    }
+    
+    /**
+     * Node over the chain stored in directory (created if missing)
+     */
+    BlockchainNode(const std::string& directory, int difficulty = 4, size_t snapshotInterval = 100)
+        : blockchain(directory, difficulty, 50.0, snapshotInterval), sequence(0) {
+        announce();
+    }
+    
+    void announce() const {
+        if(Utils::verbose()) {
+            std::cout << "GAX Blockchain Node initialized" << std::endl;
+            std::cout << "Miner address: " << minerWallet.getAddress() << std::endl;
+        }
+    }
+
+    std::recursive_mutex& getMutex() const {
+        return mutex;
+    }
+
+    bool addTransaction(const Transaction& tx) {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        if(tx.verify()) {
+            pendingTransactions.push_back(tx);
+            trackPending(tx);
+            if(Utils::verbose()) {
+                std::cout << "Transaction added to pool" << std::endl;
+            }
+            return true;
+        }
+        if(Utils::verbose()) {
+            std::cout << "Invalid transaction rejected" << std::endl;
+        }
+        return false;
+    }
+
+    /**
+     * Build and queue a node-authorised transaction
+     *
+     * "issue" creates value for the recipient (ledger credits); any other
+     * type spends the sender's unspent outputs, confirmed first and then
+     * those of earlier pending transactions, skipping outputs a pending
+     * transaction already spends, and returns the change to the sender.
+     * Returns false if the amount is invalid or the sender cannot cover it.
+     */
+    bool submitTransaction(const std::string& type, const std::string& sender,
+                           const std::string& recipient, double amount,
+                           const std::string& metadata) {
+        if(!(amount > 0.0) || recipient.empty()) {
+            return false;
+        }
+
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        Transaction tx(sender, type);
+        tx.setMetadata(metadata);
+        tx.setSequence(++sequence);
+
+        double total = 0.0;
+        if(type != "issue") {
+            auto select = [&](const std::vector<TransactionOutput>& outputs) {
+                for(const auto& utxo : outputs) {
+                    if(total >= amount) break;
+                    if(pendingSpends.count(outpoint(utxo.txHash, utxo.index))) continue;
+
+                    tx.addInput(TransactionInput(utxo.txHash, utxo.index));
+                    total += utxo.amount;
+                }
+            };
+            select(blockchain.getUTXOPool().getUTXOsForAddress(sender));
+            auto pending = pendingOutputs.find(sender);
+            if(pending != pendingOutputs.end()) {
+                select(pending->second);
+            }
+            if(total < amount) {
+                return false;
+            }
+        }
+
+        tx.addOutput(TransactionOutput(recipient, amount));
+        if(total > amount) {
+            tx.addOutput(TransactionOutput(sender, total - amount));
+        }
+
+        tx.finalize();
+        return addTransaction(tx);
+    }
+
+    /**
+     * Mine the pending transactions into a block
+     * Returns the new block's index, or -1 if it could not be appended
+     */
+    int minePendingTransactions() {
+        std::lock_guard<std::mutex> mining(miningMutex);
+        std::unique_lock<std::recursive_mutex> lock(mutex);
+
+        std::vector<Transaction> transactions;
+        transactions.swap(pendingTransactions);
+        if(Utils::verbose()) {
+            std::cout << "\n=== Mining new block ===" << std::endl;
+            std::cout << "Pending transactions: " << transactions.size() << std::endl;
+        }
+        Block block = blockchain.createBlock(minerWallet.getAddress(), transactions);
+
+        // Proof-of-work without the node lock; miningMutex keeps the tip fixed
+        lock.unlock();
+        block.mineBlock();
+        lock.lock();
+
+        bool appended = blockchain.appendBlock(block);
+
+        // Only transactions submitted during proof-of-work are still pending
+        pendingSpends.clear();
+        pendingOutputs.clear();
+        for(const auto& tx : pendingTransactions) {
+            trackPending(tx);
+        }
+
+        if(Utils::verbose()) {
+            std::cout << (appended ? "Block mined successfully!" : "Block rejected") << std::endl;
+            std::cout << "Miner balance: " << blockchain.getBalance(minerWallet.getAddress()) << " GAX" << std::endl;
+        }
+        return appended ? block.getIndex() : -1;
+    }
+
+    void printBlockchain() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        std::cout << "\n=== GAX Blockchain ===" << std::endl;
+        std::cout << "Chain length: " << blockchain.getChainLength() << std::endl;
+        std::cout << "Difficulty: " << blockchain.getDifficulty() << std::endl;
+        std::cout << "Is valid: " << (blockchain.verify() ? "Yes" : "No") << std::endl;
+
+        blockchain.forEachBlock([](const Block& block) {
+            std::cout << "\n--- Block " << block.getIndex() << " ---" << std::endl;
+            std::cout << "Hash: " << block.getHash() << std::endl;
+            std::cout << "Previous: " << block.getPreviousHash() << std::endl;
+            std::cout << "Merkle Root: " << block.getMerkleRoot() << std::endl;
+            std::cout << "Nonce: " << block.getNonce() << std::endl;
+            std::cout << "Timestamp: " << block.getTimestamp() << std::endl;
+            std::cout << "Transactions: " << block.getTransactions().size() << std::endl;
+
+            for(const auto& tx : block.getTransactions()) {
+                std::cout << "  - TX: " << tx.getHash().substr(0, 16) << "..." << std::endl;
+                std::cout << "    Type: " << tx.getType() << std::endl;
+                std::cout << "    Outputs: " << tx.getOutputs().size() << std::endl;
+            }
+        });
+    }
+
+    double getBalance(const std::string& address) const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.getBalance(address);
+    }
+
+    size_t getPendingCount() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return pendingTransactions.size();
+    }
+
+    int getChainLength() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.getChainLength();
+    }
+
+    size_t getUtxoCount() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.getUTXOPool().size();
+    }
+
+    bool verify() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.verify();
+    }
+    
+    bool verifyIncremental(size_t& checked, size_t& failedHeight) const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.verifyIncremental(checked, failedHeight);
+    }
+    
+    /**
+     * Full verification on worker threads; holds the node lock throughout
+     */
+    bool verifyParallel(size_t threads, size_t segmentCount, std::vector<VerifySegment>& segments,
+                        std::atomic<long>* progress) const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.verifyParallel(threads, segmentCount, segments, progress);
+    }
+    
+    size_t getVerifiedHeight() const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        return blockchain.getVerifiedHeight();
+    }
+    
+    /**
+     * Write a UTXO snapshot ("" = the store's own snapshot file)
+     */
+    void snapshot(const std::string& path) const {
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        std::string target = path.empty() ? blockchain.snapshotPath() : path;
+        if(target.empty()) {
+            throw std::runtime_error("No snapshot path for an in-memory chain");
+        }
+        blockchain.snapshot(target);
+    }
+    
+    /**
+     * Keep the first length blocks, discarding pending transactions
+     */
+    int truncate(size_t length) {
+        std::lock_guard<std::mutex> mining(miningMutex);
+        std::lock_guard<std::recursive_mutex> lock(mutex);
+        blockchain.truncate(length);
+        pendingTransactions.clear();
+        pendingSpends.clear();
+        pendingOutputs.clear();
+        return blockchain.getChainLength();
+    }
+
+    Blockchain& getBlockchain() {
+        return blockchain;
+    }
+
+    Wallet& getMinerWallet() {
+        return minerWallet;
+    }
+};
+
+} // namespace gax
+
+#endif // BLOCKCHAIN_NODE_H
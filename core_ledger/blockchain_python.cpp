@@ -0,0 +1,295 @@
+/*
+ * GAX Blockchain - Python Library
+ *
+ * C API loaded by blockchain_bindings.py through ctypes. Batch calls take
+ * strings as one contiguous buffer plus an offsets array (string i is
+ * buffer[offsets[i]:offsets[i + 1]]), so a whole batch crosses the
+ * Python/C boundary in a single call without per-item conversions.
+ *
+ * Every call may come from any thread: BlockchainNode serialises access
+ * and mine_block only holds the node lock around proof-of-work. ctypes
+ * releases the GIL for the duration of each call. init_blockchain,
+ * reset_blockchain and load_blockchain must not run concurrently with
+ * other calls.
+ *
+ * load_blockchain opens a chain stored on disk (see BlockStore); calls
+ * that touch the store return an error value instead of throwing.
+ *
+ * verify_chain_parallel blocks other node calls while it runs; its
+ * progress counter is read with get_verify_progress, which never locks.
+ */
+
+#include "blockchain_node.h"
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <mutex>
+#include <string>
+
+using namespace gax;
+using namespace std;
+
+// Strings per transaction in submit_transactions: type, sender, recipient, metadata
+static const int TRANSACTION_FIELDS = 4;
+
+static string slice(const char* buffer, const int32_t* offsets, int i) {
+    return string(buffer + offsets[i], offsets[i + 1] - offsets[i]);
+}
+
+extern "C" {
+    // Global node instance
+    static BlockchainNode* node = nullptr;
+    // Blocks checked by the running (or last) verify_chain_parallel
+    static std::atomic<long> verify_progress(0);
+
+    /**
+     * Initialize blockchain
+     */
+    void init_blockchain(int difficulty) {
+        if(node == nullptr) {
+            Utils::verbose() = false;
+            node = new BlockchainNode(difficulty);
+        }
+    }
+
+    /**
+     * Replace the node with an empty chain (benchmarks, tests)
+     */
+    void reset_blockchain(int difficulty) {
+        delete node;
+        node = nullptr;
+        init_blockchain(difficulty);
+    }
+
+    /**
+     * Replace the node with the chain stored in path (created if missing)
+     * Returns the chain length, or -1 if the store cannot be opened
+     */
+    int load_blockchain(const char* path, int difficulty, int snapshot_interval) {
+        delete node;
+        node = nullptr;
+        Utils::verbose() = false;
+        try {
+            node = new BlockchainNode(string(path), difficulty, snapshot_interval);
+            return node->getChainLength();
+        } catch(const exception& e) {
+            cerr << "load_blockchain: " << e.what() << endl;
+            return -1;
+        }
+    }
+
+    /**
+     * Write a UTXO snapshot to path ("" = the store's snapshot file)
+     */
+    bool snapshot_blockchain(const char* path) {
+        if(node == nullptr) return false;
+        try {
+            node->snapshot(string(path));
+            return true;
+        } catch(const exception& e) {
+            cerr << "snapshot_blockchain: " << e.what() << endl;
+            return false;
+        }
+    }
+
+    /**
+     * Keep the first length blocks; returns the new length, or -1
+     */
+    int truncate_blockchain(int length) {
+        if(node == nullptr || length < 1) return -1;
+        try {
+            return node->truncate(length);
+        } catch(const exception& e) {
+            cerr << "truncate_blockchain: " << e.what() << endl;
+            return -1;
+        }
+    }
+
+    /**
+     * Get balance for address
+     */
+    double get_balance(const char* address) {
+        if(node == nullptr) return 0.0;
+        return node->getBalance(string(address));
+    }
+
+    /**
+     * Get balances for count addresses packed in buffer/offsets
+     * Writes out[0..count); returns the number written
+     */
+    int get_balances(const char* buffer, const int32_t* offsets, int count, double* out) {
+        if(node == nullptr) return 0;
+        // One lock for the batch: all balances come from the same chain tip
+        lock_guard<recursive_mutex> lock(node->getMutex());
+        for(int i = 0; i < count; i++) {
+            out[i] = node->getBalance(slice(buffer, offsets, i));
+        }
+        return count;
+    }
+
+    /**
+     * Queue count transactions
+     * buffer/offsets hold TRANSACTION_FIELDS strings per transaction;
+     * accepted[i] is set to 1 if transaction i entered the pending pool.
+     * Returns the number accepted.
+     */
+    int submit_transactions(const char* buffer, const int32_t* offsets,
+                            const double* amounts, int count, int8_t* accepted) {
+        if(node == nullptr) return 0;
+        lock_guard<recursive_mutex> lock(node->getMutex());
+        int total = 0;
+        for(int i = 0; i < count; i++) {
+            int field = i * TRANSACTION_FIELDS;
+            bool ok = node->submitTransaction(
+                slice(buffer, offsets, field),
+                slice(buffer, offsets, field + 1),
+                slice(buffer, offsets, field + 2),
+                amounts[i],
+                slice(buffer, offsets, field + 3)
+            );
+            accepted[i] = ok ? 1 : 0;
+            total += ok;
+        }
+        return total;
+    }
+
+    /**
+     * Mine new block
+     * Returns its index, or -1 if no block was added
+     */
+    int mine_block() {
+        if(node == nullptr) return -1;
+        try {
+            return node->minePendingTransactions();
+        } catch(const exception& e) {
+            cerr << "mine_block: " << e.what() << endl;
+            return -1;
+        }
+    }
+
+    /**
+     * Get chain length
+     */
+    int get_chain_length() {
+        if(node == nullptr) return 0;
+        return node->getChainLength();
+    }
+
+    /**
+     * Transactions waiting for the next block
+     */
+    int get_pending_count() {
+        if(node == nullptr) return 0;
+        return node->getPendingCount();
+    }
+
+    /**
+     * Unspent outputs in the UTXO pool
+     */
+    long long get_utxo_count() {
+        if(node == nullptr) return 0;
+        return node->getUtxoCount();
+    }
+
+    /**
+     * Verify blockchain
+     */
+    bool verify_chain() {
+        if(node == nullptr) return false;
+        try {
+            return node->verify();
+        } catch(const exception& e) {
+            cerr << "verify_chain: " << e.what() << endl;
+            return false;
+        }
+    }
+
+    /**
+     * Verify blocks added since the last verification
+     * Writes the verified height, the blocks checked and the first bad
+     * block (0 if none); returns true if they are all valid
+     */
+    bool verify_chain_incremental(int* verified_height, int* checked, int* failed_height) {
+        *verified_height = *checked = *failed_height = 0;
+        if(node == nullptr) return false;
+        size_t blocks = 0, failed = 0;
+        bool valid;
+        try {
+            valid = node->verifyIncremental(blocks, failed);
+        } catch(const exception& e) {
+            cerr << "verify_chain_incremental: " << e.what() << endl;
+            return false;
+        }
+        *verified_height = node->getVerifiedHeight();
+        *checked = blocks;
+        *failed_height = failed;
+        return valid;
+    }
+
+    /**
+     * Verify the whole chain in up to segments ranges on threads workers
+     * Arrays hold segments entries; writes start/end heights, validity,
+     * first bad block and seconds per segment. Returns the number of
+     * segments used, or -1 on error.
+     */
+    int verify_chain_parallel(int threads, int segments, int* starts, int* ends,
+                              int8_t* valid, int* failed_heights, double* seconds) {
+        if(node == nullptr || threads < 1 || segments < 1) return -1;
+        verify_progress = 0;
+        vector<VerifySegment> results;
+        try {
+            node->verifyParallel(threads, segments, results, &verify_progress);
+        } catch(const exception& e) {
+            cerr << "verify_chain_parallel: " << e.what() << endl;
+            return -1;
+        }
+        for(size_t i = 0; i < results.size(); i++) {
+            starts[i] = results[i].start;
+            ends[i] = results[i].end;
+            valid[i] = results[i].valid ? 1 : 0;
+            failed_heights[i] = results[i].failedHeight;
+            seconds[i] = results[i].seconds;
+        }
+        return results.size();
+    }
+
+    /**
+     * Blocks checked so far by verify_chain_parallel (safe during the call)
+     */
+    long get_verify_progress() {
+        return verify_progress.load(memory_order_relaxed);
+    }
+
+    /**
+     * Mine blocks standalone blocks (never added to the chain), each with
+     * transactions issue transactions, at difficulty
+     * Writes the hashes tried; returns the seconds spent mining
+     */
+    double benchmark_mining(int difficulty, int blocks, int transactions, long long* hashes) {
+        *hashes = 0;
+        double seconds = 0.0;
+        for(int b = 0; b < blocks; b++) {
+            Block block(b + 1, string(64, '0'), difficulty);
+            for(int t = 0; t < transactions; t++) {
+                Transaction tx("benchmark", "issue");
+                tx.addOutput(TransactionOutput("benchmark" + to_string(t), 1.0 + t));
+                tx.setSequence(t + 1);
+                tx.finalize();
+                block.addTransaction(tx);
+            }
+            auto started = chrono::steady_clock::now();
+            block.mineBlock();
+            seconds += chrono::duration<double>(chrono::steady_clock::now() - started).count();
+            *hashes += block.getNonce();
+        }
+        return seconds;
+    }
+
+    /**
+     * Height up to which the chain has been verified
+     */
+    int get_verified_height() {
+        if(node == nullptr) return 0;
+        return node->getVerifiedHeight();
+    }
+}
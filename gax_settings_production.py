@@ -15,6 +15,12 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-change-this-key')
 
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
+# Pepper for API key hashes - changing it invalidates every issued key
+API_KEY_PEPPER = os.getenv('API_KEY_PEPPER', SECRET_KEY)
+
+# Pepper for transaction PIN hashes - changing it invalidates every PIN
+TRANSACTION_PIN_PEPPER = os.getenv('TRANSACTION_PIN_PEPPER', SECRET_KEY)
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 # Custom User Model
@@ -40,12 +46,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'banking.accounts.middleware.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'banking.accounts.middleware.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'banking.accounts.middleware.log_request.LogRequestMiddleware',
@@ -72,6 +80,11 @@ TEMPLATES = [
 WSGI_APPLICATION = 'gax.wsgi.application'
 
 # Database
+# DB_CONNECTION_MODE: 'persistent' keeps one health-checked connection per
+# worker thread for DB_CONN_MAX_AGE seconds; 'pooler' is for PgBouncer in
+# transaction pooling mode (see accounts/db_connections.py)
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE', 'persistent')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -81,9 +94,32 @@ DATABASES = {
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
         'ATOMIC_REQUESTS': True,
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_CONNECTION_MODE == 'pooler',
     }
 }
 
+# Read replicas (comma-separated hosts) for history, admin reports and
+# reconciliation scans; see accounts/db_router.py
+REPLICA_DATABASES = []
+for index, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host.strip(),
+        ATOMIC_REQUESTS=False,
+        TEST={'MIRROR': 'default'},
+    )
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['banking.accounts.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_LAG_CHECK_INTERVAL = 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -147,6 +183,15 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Throttle rates per tier (accounts.throttling)
+API_THROTTLE_RATES = {
+    'user': '100/min',
+    'name_enquiry': '200/hour',
+    'merchant': '1000/min',
+    'api_key': '1000/min',
+    'webhook': '500/min',
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(
@@ -236,12 +281,19 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'access_json': {
+            '()': 'banking.accounts.middleware.log_request.AccessLogFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'access': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'access_json',
+        },
         'file': {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs/django.log',
@@ -253,6 +305,12 @@ LOGGING = {
         'level': 'INFO',
     },
     'loggers': {
+        # Written from a queue listener thread (LogRequestMiddleware)
+        'api_requests': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
@@ -266,6 +324,70 @@ LOGGING = {
     },
 }
 
+# API access log - fraction of 2xx/3xx requests logged (errors and
+# requests slower than LOG_REQUEST_SLOW_MS are always logged)
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv('LOG_REQUEST_SAMPLE_RATE', 0.1))
+LOG_REQUEST_SLOW_MS = 1000
+LOG_REQUEST_QUEUE_SIZE = 10000
+
+# Per-view request metrics served at /metrics (Prometheus text format)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+
+# Virtual account provisioning - queued on registration, created by a
+# background worker and retried by `manage.py provision_virtual_accounts`
+VIRTUAL_ACCOUNT_BACKGROUND_WORKER = True
+VIRTUAL_ACCOUNT_MAX_ATTEMPTS = 5
+VIRTUAL_ACCOUNT_RETRY_DELAY = 60
+VIRTUAL_ACCOUNT_LEASE_SECONDS = 120
+
+# Wallet account numbers - 9-digit serial + NUBAN check digit, allocated
+# from blocks of serials reserved per process
+NUBAN_BANK_CODE = os.getenv('NUBAN_BANK_CODE', '999')
+ACCOUNT_NUMBER_BLOCK_SIZE = 100
+ACCOUNT_NUMBER_FIRST_SERIAL = 300000000
+
+# Account number -> holder lookups for name enquiry and transfers
+ACCOUNT_RESOLVER_CACHE_TTL = 300
+ACCOUNT_RESOLVER_UNKNOWN_CACHE_TTL = 30
+
+# Cached wallet balance + recent transactions, refreshed after each posting
+WALLET_CACHE_TTL = 300
+WALLET_CACHE_RECENT_TRANSACTIONS = 10
+
+# Ledger -> core_ledger blockchain sync. Postings write outbox rows;
+# `manage.py sync_ledger_chain` mirrors them, one block per batch
+# into the block store at LEDGER_CHAIN_PATH (empty = in memory)
+CORE_LEDGER_PATH = os.getenv('CORE_LEDGER_PATH', str(BASE_DIR.parent / 'core_ledger'))
+LEDGER_SYNC_ENABLED = os.getenv('LEDGER_SYNC_ENABLED', 'True') == 'True'
+LEDGER_SYNC_BATCH_SIZE = 500
+LEDGER_SYNC_INTERVAL = 5
+LEDGER_CHAIN_DIFFICULTY = 4
+LEDGER_CHAIN_PATH = os.getenv('LEDGER_CHAIN_PATH', str(BASE_DIR / 'ledger_chain'))
+LEDGER_CHAIN_SNAPSHOT_INTERVAL = 100
+LEDGER_CHAIN_ISSUER_ADDRESS = 'gax_ledger'
+LEDGER_CHAIN_SETTLEMENT_ADDRESS = 'gax_settlement'
+
+# TRINITY escrow service. Escrowed purchases hold funds in a local
+# EscrowAccount and notify TRINITY after commit; failed notifications
+# are retried by `manage.py send_escrow_notifications`. Held escrows are
+# released after DEFAULT_ESCROW_AUTO_RELEASE_HOURS by `manage.py release_escrows`
+TRINITY_API_URL = os.getenv('TRINITY_API_URL', '')
+SHARED_SERVICE_SECRET = os.getenv('SHARED_SERVICE_SECRET', '')
+DEFAULT_ESCROW_AUTO_RELEASE_HOURS = 72
+ESCROW_NOTIFICATION_BACKGROUND_WORKER = True
+ESCROW_NOTIFICATION_TIMEOUT = 10
+ESCROW_NOTIFICATION_MAX_ATTEMPTS = 8
+ESCROW_NOTIFICATION_RETRY_DELAY = 30
+ESCROW_NOTIFICATION_LEASE_SECONDS = 60
+ESCROW_RELEASE_BATCH_SIZE = 500
+ESCROW_RELEASE_INTERVAL = 60
+
+# Fees come from FeeRule rule sets (built-in schedule where none match),
+# compiled in memory; other processes pick up rule changes within
+# FEE_RULES_CHECK_INTERVAL seconds
+FEE_RULES_CHECK_INTERVAL = 5
+
 # Sentry (Error Tracking)
 if os.getenv('SENTRY_DSN'):
     import sentry_sdk